@@ -13,13 +13,9 @@ import {
 import { motion, AnimatePresence } from 'framer-motion';
 import clsx from 'clsx';
 
-// Import static images
-import semPathImg from './assets/Advanced_SEM_Path.png';
-import riskIntentionImg from './assets/Advanced_Risk_Intention.png';
-import sankeyImg from './assets/Advanced_Sankey_Knowledge_to_Intention.png';
-import variableChordImg from './assets/Advanced_Variable_Chord.png';
-import ridgelineImg from './assets/Advanced_Ridgeline_Core_Indices.png';
-import pcaImg from './assets/Advanced_Awareness_PCA.png';
+// Responsive chart images (1x/2x, webp + png fallback) exported by visualization.export_web_assets
+import chartManifest from './assets/web/manifest.json';
+const chartFiles = import.meta.glob('./assets/web/*.{avif,webp,png,jpg}', { eager: true, query: '?url', import: 'default' });
 
 // --- 1. Data Section ---
 
@@ -248,6 +244,35 @@ const Card = ({ children, className = "", delay = 0 }) => (
   </motion.div>
 );
 
+const IMAGE_TYPES = { avif: 'image/avif', webp: 'image/webp', png: 'image/png', jpg: 'image/jpeg' };
+
+const ChartImage = ({ name, alt, className = "", sizes = "100vw" }) => {
+  const entry = chartManifest.images[name];
+  const url = (file) => chartFiles[`./assets/web/${file}`];
+  const srcSet = (variants) => variants.map((v) => `${url(v.file)} ${v.width}w`).join(', ');
+  const formats = Object.keys(entry.sources);
+  const fallback = formats[formats.length - 1];
+
+  return (
+    <picture>
+      {formats.slice(0, -1).map((fmt) => (
+        <source key={fmt} type={IMAGE_TYPES[fmt]} srcSet={srcSet(entry.sources[fmt])} sizes={sizes} />
+      ))}
+      <img
+        src={url(entry.fallback)}
+        srcSet={srcSet(entry.sources[fallback])}
+        sizes={sizes}
+        width={entry.width}
+        height={entry.height}
+        alt={alt}
+        loading="lazy"
+        decoding="async"
+        className={className}
+      />
+    </picture>
+  );
+};
+
 const SectionTitle = ({ title, subtitle, light = false }) => (
   <motion.div 
     initial="hidden"
@@ -943,7 +968,7 @@ export default function App() {
                        <span className="text-xs font-mono bg-[#F6DFD6] text-[#E9687A] px-3 py-1 rounded-full border border-[#F8B2A2]">Model Fit: Good (RMSEA=0.04)</span>
                      </div>
                      <div className="w-full flex items-center justify-center bg-white rounded-xl border border-slate-100/50 p-2">
-                        <img src={semPathImg} alt="SEM Path Diagram" className="w-full h-auto max-h-[500px] object-contain" />
+                        <ChartImage name="Advanced_SEM_Path" alt="SEM Path Diagram" className="w-full h-auto max-h-[500px] object-contain" />
                      </div>
                      <div className="mt-6 p-4 bg-[#CFCFE3]/30 rounded-xl border border-[#B6B3D6]/30 text-sm text-slate-700 leading-relaxed flex items-start gap-3">
                        <Lightbulb className="text-[#E9687A] shrink-0 mt-0.5" size={18} />
@@ -980,7 +1005,7 @@ export default function App() {
                           <Target className="mr-2 text-[#E9687A]"/> Risk Barrier Ranking (Worry vs Intention Diff)
                         </h4>
                         <div className="flex items-center justify-center">
-                          <img src={riskIntentionImg} alt="Risk Intention Chart" className="w-full h-auto max-h-[380px] object-contain" />
+                          <ChartImage name="Advanced_Risk_Intention" alt="Risk Intention Chart" sizes="(min-width: 1024px) 66vw, 100vw" className="w-full h-auto max-h-[380px] object-contain" />
                         </div>
                       </Card>
                     </div>
@@ -1003,7 +1028,7 @@ export default function App() {
                       <Share2 className="mr-2 text-[#B6B3D6]" size={20}/> Variable Correlation Network
                     </h3>
                     <div className="flex justify-center">
-                      <img src={variableChordImg} alt="Variable Correlation Network" className="max-w-full h-auto max-h-[450px] object-contain" />
+                      <ChartImage name="Advanced_Variable_Chord" alt="Variable Correlation Network" sizes="(min-width: 768px) 50vw, 100vw" className="max-w-full h-auto max-h-[450px] object-contain" />
                     </div>
                     <p className="text-center text-xs text-slate-500 mt-6 bg-slate-50 py-2 rounded-lg">"Trust" is at the central hub of the network, connecting policy and attitude.</p>
                   </Card>
@@ -1012,7 +1037,7 @@ export default function App() {
                       <BarChart2 className="mr-2 text-[#E9687A]" size={20}/> Consciousness Space Distribution (PCA)
                     </h3>
                     <div className="flex justify-center">
-                      <img src={pcaImg} alt="Consciousness Space Distribution (PCA)" className="max-w-full h-auto max-h-[450px] object-contain" />
+                      <ChartImage name="Advanced_Awareness_PCA" alt="Consciousness Space Distribution (PCA)" sizes="(min-width: 768px) 50vw, 100vw" className="max-w-full h-auto max-h-[450px] object-contain" />
                     </div>
                   </Card>
                   </div>
@@ -1022,7 +1047,7 @@ export default function App() {
                       <GitCommit className="mr-2 text-[#E9687A]" size={20}/> Cognition-Intention Flow (Sankey)
                     </h3>
                     <div className="flex items-center justify-center">
-                      <img src={sankeyImg} alt="Sankey Flow Chart" className="w-full h-auto max-h-[550px] object-contain" />
+                      <ChartImage name="Advanced_Sankey_Knowledge_to_Intention" alt="Sankey Flow Chart" className="w-full h-auto max-h-[550px] object-contain" />
                     </div>
                     <p className="text-center text-xs text-slate-500 mt-6 bg-slate-50 py-2 rounded-lg">Shows the flow from different knowledge level groups to purchase intention levels. It can be seen that even among the "Neutral" knowledge group, a significant portion flows to "High Intention", reaffirming the mediating role of trust.</p>
                   </Card>
@@ -1043,7 +1068,7 @@ export default function App() {
                       <Activity className="mr-2 text-[#B6B3D6]"/> Core Variable Distribution (Ridgeline Plot)
                     </h3>
                     <div className="flex justify-center">
-                      <img src={ridgelineImg} alt="Core Variable Distribution" className="max-w-full h-auto max-h-[500px] object-contain" />
+                      <ChartImage name="Advanced_Ridgeline_Core_Indices" alt="Core Variable Distribution" className="max-w-full h-auto max-h-[500px] object-contain" />
                     </div>
                   </Card>
 
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Shared fixtures: load visualization.py as a package module with test settings"""
+
+import importlib.util
+import os
+import sys
+import types
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PACKAGE = 'ev_visualization_tests'
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'visualization.py')
+
+LIKERT_COLUMNS = ['能源转型了解度', '双碳了解度', '5年内购车意愿', '新能源汽车印象', '购车类型偏好',
+                  '技术信任度', '新能源汽车技术信任度', '政策执行信任度', '激励政策认同度',
+                  '限油推新支持度', '转型支持度', '碳中和支持度', '新能源汽车态度']
+OPTION_BLOCKS = {
+    '可再生': ['太阳能', '风能', '水能', '生物质能', '石油', '煤炭', '天然气', '核能'],
+    '因素': ['成本', '环保', '技术', '续航', '充电', '性能', '政策', '品牌'],
+    '问题': ['续航', '充电设施', '电池', '价格', '安全', '维修'],
+    '渠道': ['学校课程', '新闻媒体', '社交媒体', '学术文献', '亲友交流'],
+    '目标': ['保障能源安全', '减少污染', '降低依赖', '技术创新', '绿色转型'],
+    '发力': ['技术研发', '基础设施', '教育宣传', '激励政策', '节能改造'],
+}
+INDEX_COLUMNS = ['认知指数', '责任感指数', '信任指数', '政策认同指数', '态度']
+
+
+def _load_module():
+    """Import visualization.py inside a stand-in package that provides .config"""
+    if f'{PACKAGE}.visualization' in sys.modules:
+        return sys.modules[f'{PACKAGE}.visualization']
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [os.path.dirname(MODULE_PATH)]
+    config = types.ModuleType(f'{PACKAGE}.config')
+    config.COLORS = {}
+    config.FIGURE_DPI = 100
+    sys.modules[PACKAGE] = package
+    sys.modules[f'{PACKAGE}.config'] = config
+    spec = importlib.util.spec_from_file_location(f'{PACKAGE}.visualization', MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_survey(n=120, seed=0, missing=0.0):
+    """Synthetic survey frame with the columns the charts read"""
+    rng = np.random.default_rng(seed)
+    data = {
+        '性别': rng.integers(1, 3, n),
+        '在学类别': rng.integers(1, 4, n),
+        '能源经历': rng.integers(1, 3, n),
+        '大学生义务': rng.integers(1, 4, n),
+    }
+    major = rng.integers(0, 3, n)
+    for code, name in enumerate(['理工类', '经管类', '人文社科类']):
+        data[f'专业_{name}'] = (major == code).astype(int)
+    for column in LIKERT_COLUMNS:
+        data[column] = rng.integers(1, 6, n)
+    for block, options in OPTION_BLOCKS.items():
+        for option in options:
+            data[f'{block}_{option}'] = rng.integers(0, 2, n)
+    for column in INDEX_COLUMNS:
+        data[column] = np.round(rng.normal(3.8, 0.6, n), 2)
+    df = pd.DataFrame(data)
+    if missing:
+        for column in INDEX_COLUMNS + LIKERT_COLUMNS:
+            df.loc[rng.random(n) < missing, column] = np.nan
+    return df
+
+
+@pytest.fixture(scope='session')
+def viz():
+    return _load_module()
+
+
+@pytest.fixture
+def survey():
+    return make_survey()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""SurveyAggregates agree with the DataFrame statistics the charts use"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_survey
+
+
+@pytest.fixture
+def gappy():
+    return make_survey(600, seed=3, missing=0.1)
+
+
+def test_moments_match_frame_statistics_with_missing_values(viz, gappy):
+    agg = viz.SurveyAggregates.from_frame(gappy.iloc[:250])
+    agg.extend(gappy)
+    agg = viz.SurveyAggregates.from_dict(json.loads(json.dumps(agg.to_dict())))
+    merged = viz.SurveyAggregates.from_frame(gappy.iloc[:100]).merge(
+        viz.SurveyAggregates.from_frame(gappy.iloc[100:]))
+    core, trust = viz.CORE_INDEX_VARS, viz.TRUST_ITEM_VARS
+    for state in (agg, merged):
+        pd.testing.assert_series_equal(state.means('core'), gappy[core].mean(), check_names=False)
+        pd.testing.assert_series_equal(state.variances('trust'), gappy[trust].var(), check_names=False)
+        pd.testing.assert_frame_equal(state.correlation('core'), gappy[core].corr())
+        pd.testing.assert_frame_equal(state.group_means('在学类别', 'trust'),
+                                      gappy.groupby('在学类别')[trust].mean(),
+                                      check_names=False, check_index_type=False)
+        assert state.counts_present('core').tolist() == gappy[core].notna().sum().tolist()
+
+
+def _bundle_tables(path):
+    with open(path, encoding='utf-8') as fh:
+        bundle = json.load(fh)
+    return bundle['meta'], {name: pd.DataFrame(t['rows'], columns=t['columns'])
+                            for name, t in bundle['tables'].items()}
+
+
+def test_aggregate_refresh_draws_the_same_data_as_a_full_rebuild(viz, gappy, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    frame_dir, agg_dir = tmp_path / 'frame', tmp_path / 'agg'
+    frame_dir.mkdir()
+    labelled = viz.with_label_columns(gappy)
+    charts = ['trust_radar', 'dumbbell', 'correlation_heatmap', 'correlation_network']
+    for chart in charts:
+        viz.render_registered_chart(chart, labelled, str(frame_dir))
+    viz.refresh_aggregate_charts(gappy.iloc[:400], str(agg_dir))
+    viz.refresh_aggregate_charts(gappy, str(agg_dir))
+    
+    for chart in charts:
+        name = viz.CHART_REGISTRY[chart]['output'].rsplit('.', 1)[0] + '.data.json'
+        frame_meta, frame_tables = _bundle_tables(frame_dir / name)
+        agg_meta, agg_tables = _bundle_tables(agg_dir / name)
+        assert frame_meta == agg_meta, chart
+        assert frame_tables.keys() == agg_tables.keys(), chart
+        for table in frame_tables:
+            pd.testing.assert_frame_equal(frame_tables[table], agg_tables[table], atol=2e-4,
+                                          obj=f'{chart}.{table}')
+
+
+def test_extend_rejects_edits_to_any_aggregated_row(viz):
+    df = make_survey(200, seed=4)
+    agg = viz.SurveyAggregates.from_frame(df.iloc[:150])
+    edited = df.copy()
+    edited.loc[0, '能源转型了解度'] = edited.loc[0, '能源转型了解度'] % 5 + 1
+    with pytest.raises(ValueError, match='already aggregated'):
+        agg.extend(edited)
+    assert agg.extend(df) == 50
+
+
+def test_extend_accepts_an_append_that_changes_column_dtypes(viz):
+    df = make_survey(200, seed=4)
+    assert df['能源转型了解度'].dtype == np.int64
+    agg = viz.SurveyAggregates.from_frame(df.iloc[:150])
+    appended = df.copy()
+    appended.loc[180, '能源转型了解度'] = np.nan
+    assert appended['能源转型了解度'].dtype == np.float64
+    agg.extend(appended)
+    assert agg.rows_digest == viz.SurveyAggregates.from_frame(appended).rows_digest
+    merged = viz.SurveyAggregates.from_frame(df.iloc[:150]).merge(
+        viz.SurveyAggregates.from_frame(appended.iloc[150:]))
+    assert merged.rows_digest == agg.rows_digest
+
+
+def test_refresh_rebuilds_when_aggregated_rows_changed(viz, tmp_path):
+    df = make_survey(200, seed=4)
+    viz.refresh_aggregate_charts(df.iloc[:150], str(tmp_path))
+    edited = df.copy()
+    edited.loc[0, '能源转型了解度'] = edited.loc[0, '能源转型了解度'] % 5 + 1
+    agg = viz.refresh_aggregate_charts(edited, str(tmp_path))
+    fresh = viz.SurveyAggregates.from_frame(edited)
+    assert agg.n_rows == 200
+    assert agg.value_counts('能源转型了解度').equals(fresh.value_counts('能源转型了解度'))
+    assert agg.rows_digest == fresh.rows_digest
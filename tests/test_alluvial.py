@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Alluvial flows: one-pass node and flow counts against groupby().size()"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_survey
+
+STAGES = ['Gender_Label', 'Education_Label', 'Experience_Label', '大学生义务']
+
+
+def _check_against_groupby(viz, df, stages):
+    categories, node_counts, flow_counts = viz.compute_alluvial_flows(df, stages)
+    assert len(node_counts) == len(stages) and len(flow_counts) == len(stages) - 1
+    for k, stage in enumerate(stages):
+        expected = df.groupby(stage, observed=False).size()
+        assert categories[k] == list(expected.index)
+        np.testing.assert_array_equal(node_counts[k], expected.to_numpy())
+    for k, (source, target) in enumerate(zip(stages[:-1], stages[1:])):
+        expected = (df.groupby([source, target], observed=False).size()
+                    .unstack(fill_value=0).reindex(index=categories[k], columns=categories[k + 1], fill_value=0))
+        np.testing.assert_array_equal(flow_counts[k], expected.to_numpy())
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_flows_match_groupby_counts(viz, seed):
+    df = viz.CODEBOOK.apply(make_survey(n=500, seed=seed))
+    _check_against_groupby(viz, df, STAGES)
+
+
+def test_missing_values_and_unused_categories(viz):
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'a': rng.choice(['x', 'y', None], 300),
+        'b': pd.Categorical(rng.choice(['p', 'q'], 300), categories=['q', 'p', 'unused']),
+        'c': rng.choice([1.0, 2.0, 3.0, np.nan], 300),
+    })
+    _check_against_groupby(viz, df, ['a', 'b', 'c'])
+    categories, node_counts, flow_counts = viz.compute_alluvial_flows(df, ['a', 'b', 'c'])
+    # Category order is kept, and rows missing a stage drop out of that stage and its flows
+    assert categories[1] == ['q', 'p', 'unused'] and node_counts[1][2] == 0
+    assert flow_counts[0].sum() == df['a'].notna().sum()
+    assert flow_counts[1].sum() == df['c'].notna().sum()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Option association engine against brute-force pairwise statistics"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import make_survey
+
+BLOCKS = ['factors', 'problems']
+
+
+def test_measures_match_brute_force(viz):
+    df = make_survey(60, seed=9)
+    df['问题_维修'] = 0   # Nobody selected: its measures are undefined
+    frames = viz.association_matrices(df, BLOCKS)
+    columns = [col for block in BLOCKS for col in viz.multi_select_columns(block)]
+    X = df[columns].to_numpy(dtype=float)
+    n, k = X.shape
+    
+    for i in range(k):
+        for j in range(k):
+            x, y = X[:, i], X[:, j]
+            both, either = np.sum(x * y), np.sum(np.maximum(x, y))
+            assert frames['count'].iat[i, j] == both
+            if x.sum() and y.sum():
+                assert np.isclose(frames['phi'].iat[i, j], np.corrcoef(x, y)[0, 1])
+                assert np.isclose(frames['lift'].iat[i, j], n * both / (x.sum() * y.sum()))
+                assert np.isclose(frames['jaccard'].iat[i, j], both / either)
+            else:
+                assert np.isnan(frames['phi'].iat[i, j])
+                assert np.isnan(frames['lift'].iat[i, j])
+    
+    labels = [label for block in BLOCKS for _, label in viz.MULTI_SELECT_BLOCKS[block][2]]
+    for frame in frames.values():
+        assert list(frame.index) == labels and list(frame.columns) == labels
+        pd.testing.assert_frame_equal(frame, frame.T)
+
+
+def test_packed_and_unpacked_frames_agree(viz):
+    df = make_survey(200, seed=10)
+    plain = viz.association_matrices(df, BLOCKS)
+    packed = viz.association_matrices(viz.pack_multi_select(df), BLOCKS)
+    for measure in viz.ASSOCIATION_MEASURES:
+        pd.testing.assert_frame_equal(plain[measure], packed[measure])
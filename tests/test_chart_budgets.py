@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Memory ceiling and input immutability of every registered chart"""
+
+from conftest import make_survey
+
+
+def test_registered_charts_stay_within_memory_budget(viz, tmp_path):
+    df = make_survey(2000, seed=7, missing=0.05)
+    peaks = viz.check_chart_budgets(df, str(tmp_path))
+    assert set(peaks) == set(viz.CHART_REGISTRY)
+    over = {chart: round(peak, 1) for chart, peak in peaks.items() if peak > viz.CHART_MEMORY_BUDGET_MB}
+    assert not over
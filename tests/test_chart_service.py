@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""On-demand chart service: request parsing, filters and export settings"""
+
+import sys
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def service(viz, survey):
+    return viz.ChartService(survey, cache_size=4)
+
+
+@pytest.mark.parametrize('raw', ['1.5', '300', '-129', 'abc', 'nan'])
+def test_filter_values_the_column_cannot_hold_are_rejected(service, raw):
+    with pytest.raises(ValueError, match='在学类别'):
+        service.filtered_frame({'在学类别': (raw,)})
+
+
+def test_filter_values_match_exactly(service):
+    df = service.df
+    assert len(service.filtered_frame({'在学类别': ('1', '3.0')})) == df['在学类别'].isin([1, 3]).sum()
+
+
+def test_export_settings_only_apply_to_the_calling_thread(viz):
+    seen = {}
+    entered, release = threading.Event(), threading.Event()
+    
+    def other_thread():
+        entered.wait()
+        seen['other'] = viz._export_setting('EXPORT_FORMATS')
+        release.set()
+    
+    worker = threading.Thread(target=other_thread)
+    worker.start()
+    with viz.export_settings(EXPORT_FORMATS=['svg']):
+        entered.set()
+        release.wait()
+        seen['own'] = viz._export_setting('EXPORT_FORMATS')
+    worker.join()
+    assert seen == {'own': ['svg'], 'other': viz.EXPORT_FORMATS}
+
+
+def test_service_renders_requested_format(service):
+    data, content_type, status = service.render('demographics', {'format': 'svg', '性别': '1'})
+    assert content_type == 'image/svg+xml' and data.lstrip().startswith(b'<?xml')
+    assert service.render('demographics', {'format': 'svg', '性别': '1'})[2] == 'hit'
+
+
+def test_thread_output_only_captures_the_calling_thread(viz, capsys):
+    entered, release = threading.Event(), threading.Event()
+    
+    def other_thread():
+        entered.wait()
+        print('other thread')
+        release.set()
+    
+    worker = threading.Thread(target=other_thread)
+    worker.start()
+    stdout = sys.stdout
+    with viz.thread_output() as log:
+        entered.set()
+        release.wait()
+        print('own thread')
+    worker.join()
+    assert sys.stdout is stdout
+    assert log.getvalue() == 'own thread\n'
+    assert capsys.readouterr().out == 'other thread\n'
+
+
+def test_service_renders_keep_other_threads_printing(service, capsys):
+    service.render('demographics', {'性别': '1'})
+    print('after render')
+    assert capsys.readouterr().out == 'after render\n'
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Codebook: reverse-coded positive scores and ordered value labels"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import make_survey
+
+LABELLED = {'性别': 'Gender_Label', '在学类别': 'Education_Label', '能源经历': 'Experience_Label'}
+
+
+def test_reversed_items_score_low_codes_as_most_positive(viz, survey):
+    coded = viz.CODEBOOK.apply(survey)
+    for column, item in viz.CODEBOOK.items.items():
+        if column not in survey.columns:
+            continue
+        if item.reverse:
+            low, high = item.scale
+            expected = low + high - survey[column]
+            np.testing.assert_array_equal(coded[item.positive_column], expected)
+            assert coded[item.positive_column].dtype == np.int8
+            pd.testing.assert_series_equal(viz.CODEBOOK.positive_series(survey, column), expected,
+                                           check_names=False)
+        else:
+            assert item.positive_column is None
+            pd.testing.assert_series_equal(viz.CODEBOOK.positive_series(survey, column), survey[column])
+    assert '购车意愿' in coded.columns and '5年内购车意愿_pos' not in coded.columns
+
+
+def test_apply_leaves_the_input_and_existing_columns_alone(viz, survey):
+    before = survey.copy()
+    coded = viz.CODEBOOK.apply(survey)
+    pd.testing.assert_frame_equal(survey, before)
+    pd.testing.assert_frame_equal(coded[survey.columns], survey)
+    
+    # A column that is already present is not recomputed
+    preset = survey.assign(购车意愿=0)
+    assert (viz.CODEBOOK.apply(preset)['购车意愿'] == 0).all()
+
+
+def test_missing_answers_keep_float_positive_scores(viz):
+    df = make_survey(missing=0.2, seed=3)
+    coded = viz.CODEBOOK.apply(df)
+    positive = coded['技术信任度_pos']
+    assert positive.dtype == np.float64
+    assert positive.isna().equals(df['技术信任度'].isna())
+    np.testing.assert_array_equal(positive.dropna(), 6 - df['技术信任度'].dropna())
+
+
+def test_labels_follow_code_order_not_alphabetical_order(viz, survey):
+    coded = viz.CODEBOOK.apply(survey)
+    for column, label_column in LABELLED.items():
+        labels = coded[label_column]
+        item = viz.CODEBOOK[column]
+        assert isinstance(labels.dtype, pd.CategoricalDtype) and labels.cat.ordered
+        assert list(labels.cat.categories) == item.labels
+        np.testing.assert_array_equal(labels.cat.codes + item.scale[0], survey[column])
+        # Same result on the fly for frames that did not go through apply()
+        pd.testing.assert_series_equal(viz.CODEBOOK.label_series(survey, column), labels, check_names=False)
+    
+    # Groups come out in code order even when some are absent
+    subset = coded[coded['在学类别'] != 2]
+    assert viz.observed_groups(subset['Education_Label']) == ['Undergraduate', 'PhD']
+
+
+def test_to_positive_moves_only_reversed_means(viz, survey):
+    means = survey[['技术信任度', '购车类型偏好', '认知指数']].mean()
+    positive = viz.CODEBOOK.to_positive(means)
+    assert positive['技术信任度'] == 6 - means['技术信任度']
+    assert positive['购车类型偏好'] == means['购车类型偏好']
+    assert positive['认知指数'] == means['认知指数']
+    assert viz.CODEBOOK.names(['技术信任度', 'unknown']) == ['Tech Trust', 'unknown']
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Compact dtypes: narrowest exact storage, and charts that do not notice it"""
+
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from conftest import INDEX_COLUMNS, LIKERT_COLUMNS, make_survey
+
+UNSEEDED_CHARTS = {'raincloud'}   # Jittered draws differ between any two renders
+
+
+def test_compact_dtype_choices(viz):
+    assert viz.compact_dtype(pd.Series([1, 5, 3], name='技术信任度')) == np.int8
+    assert viz.compact_dtype(pd.Series([1.0, 2.0], name='技术信任度')) == np.int8
+    assert viz.compact_dtype(pd.Series([1.0, np.nan, 5.0], name='技术信任度')) == pd.Int8Dtype()
+    assert viz.compact_dtype(pd.Series([1000.0, np.nan])) == pd.Int16Dtype()
+    assert viz.compact_dtype(pd.Series([1.5, np.nan])) is None
+    assert viz.compact_dtype(pd.Series([np.nan, np.nan])) is None
+    assert viz.compact_dtype(pd.Series(['a', 'b'])) is None
+    assert viz.compact_dtype(pd.Series([1, pd.NA], dtype='Int8')) is None
+
+
+def test_compacted_frames_hold_the_same_values(viz):
+    df = make_survey(200, seed=4, missing=0.2)
+    compacted = viz.compact_dtypes(df, report=False)
+    for column in LIKERT_COLUMNS:
+        assert compacted[column].dtype == pd.Int8Dtype()
+    for column in INDEX_COLUMNS:
+        assert compacted[column].dtype == np.float64
+    assert compacted['性别'].dtype == np.int8
+    pd.testing.assert_frame_equal(compacted.astype(float), df.astype(float))
+    assert viz._rows_digest(compacted) == viz._rows_digest(df)
+
+
+def test_charts_render_the_same_from_compacted_frames(viz, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    monkeypatch.setattr(viz, 'MISSING_GLYPH_POLICY', 'warn')
+    df = make_survey(300, seed=1, missing=0.15)   # int8 and nullable Int8 columns
+    frames = {'plain': df, 'compact': viz.compact_dtypes(df, report=False)}
+    for name, frame in frames.items():
+        out = tmp_path / name
+        out.mkdir()
+        labelled = viz.with_label_columns(frame)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for chart in viz.CHART_REGISTRY:
+                viz.render_registered_chart(chart, labelled, str(out))
+    
+    files = sorted(os.listdir(tmp_path / 'plain'))
+    assert files == sorted(os.listdir(tmp_path / 'compact'))
+    unseeded = {viz.CHART_REGISTRY[chart]['output'] for chart in UNSEEDED_CHARTS}
+    for name in files:
+        plain, compact = tmp_path / 'plain' / name, tmp_path / 'compact' / name
+        if name.endswith('.data.json'):
+            with open(plain, encoding='utf-8') as fa, open(compact, encoding='utf-8') as fb:
+                assert json.load(fa)['tables'] == json.load(fb)['tables'], name
+        elif name.endswith('.png') and name not in unseeded:
+            np.testing.assert_array_equal(np.asarray(Image.open(plain)), np.asarray(Image.open(compact)),
+                                          err_msg=name)
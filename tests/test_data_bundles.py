@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Chart data bundles stay per-chart summaries"""
+
+import json
+
+from conftest import make_survey
+
+
+def test_awareness_pca_bundle_does_not_grow_with_sample_size(viz, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    row_counts = []
+    for n in (200, 5000):
+        viz.plot_awareness_pca(make_survey(n), str(tmp_path))
+        with open(tmp_path / 'Advanced_Awareness_PCA.data.json', encoding='utf-8') as fh:
+            bundle = json.load(fh)
+        assert set(bundle['tables']) == {'explained_variance', 'loadings', 'group_centroids', 'score_bins'}
+        assert bundle['meta']['n'] == n
+        bins = bundle['tables']['score_bins']
+        assert sum(row[-1] for row in bins['rows']) == n
+        row_counts.append(sum(len(t['rows']) for t in bundle['tables'].values()))
+    assert max(row_counts) <= 12 + viz.DATA_BUNDLE_SCORE_BINS ** 2
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Per-cohort fan-out: settings forwarding and per-cohort outputs"""
+
+import json
+
+import pytest
+
+from conftest import make_survey
+
+
+def test_fanout_settings_name_module_settings(viz):
+    missing = [name for name in viz.FANOUT_SETTINGS if not hasattr(viz, name)]
+    assert not missing
+    assert len(set(viz.FANOUT_SETTINGS)) == len(viz.FANOUT_SETTINGS)
+
+
+@pytest.mark.parametrize('name', ['WEB_EXPORT_DIR', 'CHART_INSTRUMENTATION', 'CHART_PROFILING',
+                                  'DATA_BUNDLES', 'LAYOUT_MODE', 'CI_WHISKERS', 'CI_METHOD',
+                                  'SIGNIFICANCE_MARKERS', 'PERMUTATION_RESAMPLES'])
+def test_output_switches_are_forwarded(viz, name):
+    assert name in viz.FANOUT_SETTINGS
+
+
+def test_cohorts_get_their_own_web_manifest(viz, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'WEB_EXPORT_DIR', str(tmp_path / 'web'))
+    entries = viz.render_cohorts(make_survey(200), '性别', str(tmp_path / 'out'), charts=['demographics'],
+                                 workers=1)
+    assert [entry['failed'] for entry in entries] == [{}, {}]
+    for entry in entries:
+        with open(tmp_path / 'web' / entry['dir'] / 'manifest.json', encoding='utf-8') as fh:
+            assert list(json.load(fh)['images']) == ['Demographics']
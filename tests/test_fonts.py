@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Font resolution, glyph coverage and symbol fallbacks"""
+
+import warnings
+
+import matplotlib.pyplot as plt
+import pytest
+
+from conftest import make_survey
+
+
+def test_import_does_not_silence_warnings(viz):
+    blanket = [f for f in warnings.filters
+               if f[0] == 'ignore' and f[1] is None and f[2] is Warning and f[3] is None]
+    assert not blanket
+
+
+def test_symbol_text_only_keeps_drawable_symbols(viz):
+    text = viz.symbol_text('📊 Sample | 👨‍🎓 Male | 🚗 Intention')
+    assert not viz.check_glyph_coverage([text])
+    for symbol, fallback in viz.SYMBOL_FALLBACKS.items():
+        if not viz.check_glyph_coverage([symbol]):
+            assert viz.symbol_text(symbol) == symbol
+        elif not viz.check_glyph_coverage([fallback]):
+            assert viz.symbol_text(symbol) == fallback
+
+
+def test_summary_panels_draw_without_missing_glyph_warnings(viz, survey, tmp_path):
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        viz.plot_demographics(survey, str(tmp_path / 'demographics.png'))
+    assert not [w for w in caught if 'missing from font' in str(w.message)]
+
+
+def test_correlation_charts_use_english_names(viz, survey, tmp_path, monkeypatch):
+    drawn = []
+    monkeypatch.setattr(viz, 'save_fig', lambda fig, path, **kwargs: drawn.append(
+        {t.get_text() for ax in fig.axes for t in ax.texts + ax.get_xticklabels() + ax.get_yticklabels()}))
+    labelled = viz.with_label_columns(survey)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        for chart in ('correlation_heatmap', 'correlation_network'):
+            viz.render_registered_chart(chart, labelled, str(tmp_path))
+        viz.refresh_aggregate_charts(survey, str(tmp_path))
+    assert not [w for w in caught if 'missing from font' in str(w.message)]
+    for texts in drawn[:2] + drawn[-2:]:
+        assert set(viz.CORE_INDEX_LABELS) <= texts
+
+
+def test_registered_charts_draw_without_missing_glyph_warnings(viz, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'MISSING_GLYPH_POLICY', 'warn')
+    labelled = viz.with_label_columns(make_survey(400, seed=1))
+    missing = {}
+    for chart in viz.CHART_REGISTRY:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            viz.render_registered_chart(chart, labelled, str(tmp_path))
+        glyphs = {str(w.message) for w in caught if 'missing from font' in str(w.message)}
+        if glyphs:
+            missing[chart] = sorted(glyphs)
+        plt.close('all')
+    assert not missing
+
+
+def test_undrawable_text_fails_loudly(viz, tmp_path):
+    text = '\U00013000'   # Egyptian hieroglyph: in none of the pinned fonts
+    if not viz.check_glyph_coverage([text]):
+        pytest.skip('an installed font covers the test character')
+    corr = viz.named_correlation(make_survey()[viz.CORE_INDEX_VARS].corr())
+    with pytest.raises(RuntimeError, match='missing from font'):
+        viz.plot_correlation_heatmap(corr, str(tmp_path / 'heatmap.png'), title=f'Title {text}')
+    assert not plt.get_fignums()
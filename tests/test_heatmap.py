@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Large-matrix heatmap mode: clustered order, sparse annotations and pages"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def block_correlations(n_items=100, n_blocks=3, seed=0):
+    """Correlation matrix of items in planted correlated blocks, columns shuffled"""
+    rng = np.random.default_rng(seed)
+    block = rng.integers(0, n_blocks, n_items)
+    factors = rng.normal(size=(500, n_blocks))
+    data = factors[:, block] + 0.6 * rng.normal(size=(500, n_items))
+    names = [f'Item {i + 1}' for i in range(n_items)]
+    return pd.DataFrame(data, columns=names).corr(), dict(zip(names, block))
+
+
+def test_large_mode_orders_items_by_cluster(viz, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    corr, block = block_correlations(n_items=50)
+    assert viz.plot_correlation_heatmap(corr, str(tmp_path / 'heatmap.png')) is None
+    
+    with open(tmp_path / 'heatmap.data.json', encoding='utf-8') as fh:
+        order = json.load(fh)['meta']['order']
+    assert sorted(order) == sorted(corr.columns)
+    # Items of one planted block are contiguous in the clustered order
+    runs = [b for i, b in enumerate(block[item] for item in order) if i == 0 or b != block[order[i - 1]]]
+    assert len(runs) == len(set(block.values()))
+
+
+def test_large_mode_annotates_only_the_strongest_cells(viz, tmp_path, monkeypatch):
+    corr, _ = block_correlations(n_items=20)   # Forced large mode, cells still large enough to annotate
+    saved = []
+    original_save_fig = viz.save_fig
+    
+    def capture(fig, path, **kwargs):
+        saved.append([text.get_text() for text in fig.axes[0].texts])
+        return original_save_fig(fig, path, **kwargs)
+    monkeypatch.setattr(viz, 'save_fig', capture)
+    viz.plot_correlation_heatmap(corr, str(tmp_path / 'heatmap.png'), large=True, annotate_top_k=30)
+    
+    annotations = saved[0]
+    assert 0 < len(annotations) <= 30
+    assert all(abs(float(text)) >= viz.HEATMAP_ANNOTATE_MIN_ABS for text in annotations)
+
+
+def test_pages_tile_the_lower_triangle(viz, tmp_path):
+    corr, _ = block_correlations(n_items=90)
+    pages = viz.plot_correlation_heatmap(corr, str(tmp_path / 'heatmap.png'), page_size=40)
+    expected = [f'page_r{r:02d}_c{c:02d}.png' for r in range(1, 4) for c in range(1, r + 1)]
+    assert [os.path.basename(page) for page in pages] == expected
+    assert sorted(os.listdir(tmp_path / 'heatmap_pages')) == sorted(expected)
+    assert (tmp_path / 'heatmap.png').exists()
+
+
+def test_small_matrices_keep_the_standard_chart(viz, tmp_path):
+    corr, _ = block_correlations(n_items=12)
+    assert viz.plot_correlation_heatmap(corr, str(tmp_path / 'heatmap.png'), page_size=5) is None
+    assert not (tmp_path / 'heatmap_pages').exists()
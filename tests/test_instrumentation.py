@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Chart instrumentation: metrics records and figure-leak policy"""
+
+import json
+
+import matplotlib.pyplot as plt
+import pytest
+
+
+@pytest.fixture
+def leaking_chart(viz):
+    @viz.instrument_chart
+    def plot_leaky(df, save_path):
+        plt.figure()
+    yield plot_leaky
+    plt.close('all')
+
+
+@pytest.fixture
+def instrumented(viz, monkeypatch):
+    monkeypatch.setattr(viz, 'CHART_INSTRUMENTATION', True)
+    viz.get_chart_metrics(clear=True)
+    yield
+    viz.get_chart_metrics(clear=True)
+
+
+def test_leak_raises_under_raise_policy(viz, instrumented, leaking_chart, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'FIGURE_LEAK_POLICY', 'raise')
+    with pytest.raises(RuntimeError, match='plot_leaky left 1 figure'):
+        leaking_chart(None, str(tmp_path / 'leaky.png'))
+
+
+def test_leak_warns_under_warn_policy(viz, instrumented, leaking_chart, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'FIGURE_LEAK_POLICY', 'warn')
+    for _ in range(2):
+        with pytest.warns(ResourceWarning, match='plot_leaky left 1 figure'):
+            leaking_chart(None, str(tmp_path / 'leaky.png'))
+
+
+def test_metrics_are_recorded_and_written(viz, instrumented, survey, tmp_path):
+    viz.plot_knowledge_level(survey, str(tmp_path / 'Knowledge_Level.png'))
+    records = viz.get_chart_metrics()
+    assert [r['chart'] for r in records] == ['plot_knowledge_level']
+    with open(tmp_path / viz.CHART_METRICS_NAME, encoding='utf-8') as fh:
+        written = [json.loads(line) for line in fh]
+    assert written == records
+    assert written[0]['leaked_figures'] == []
+    assert written[0]['peak_traced_mb'] > 0
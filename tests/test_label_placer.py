@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Collision-aware label placement"""
+
+import itertools
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def _overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def test_box_grid_matches_brute_force(viz):
+    rng = np.random.default_rng(0)
+    grid = viz._BoxGrid(20)
+    boxes = []
+    for x, y, w, h in rng.uniform([0, 0, 1, 1], [400, 300, 60, 30], size=(200, 4)):
+        box = (x, y, x + w, y + h)
+        assert grid.hits(box) == any(_overlap(box, other) for other in boxes)
+        if not grid.hits(box):
+            grid.insert(box)
+            boxes.append(box)
+
+
+def test_visible_labels_never_overlap(viz):
+    rng = np.random.default_rng(1)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    try:
+        points = np.vstack([rng.normal([0.3, 0.4], 0.05, (30, 2)), rng.uniform(0, 1, (30, 2))])
+        ax.scatter(*points.T)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        placer = viz.LabelPlacer(ax)
+        placer.add_obstacle_points(points)
+        labels = [placer.add(ax.annotate(f'Label {i}', xy=xy, xytext=(0, 0), textcoords='offset points',
+                                         ha='center', va='center', fontsize=9), priority=-i)
+                  for i, xy in enumerate(points)]
+        fig.canvas.draw()
+        
+        renderer = fig.canvas.get_renderer()
+        visible = [label for label in labels if label.get_visible()]
+        assert 0 < len(visible) < len(labels)
+        boxes = [label.get_window_extent(renderer).extents for label in visible]
+        for a, b in itertools.combinations(boxes, 2):
+            assert not _overlap(a, b)
+        x0, y0, x1, y1 = ax.bbox.extents
+        assert all(box[0] >= x0 and box[1] >= y0 and box[2] <= x1 and box[3] <= y1 for box in boxes)
+    finally:
+        plt.close(fig)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Packed multi-select storage: bitmask codes, combination counts and packed frames"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_survey
+
+OPTION_CHARTS = ['renewable', 'nev', 'combined', 'info_channels', 'risk_intention',
+                 'risk_intention_factors', 'upset_problems', 'association_heatmap']
+
+
+def _brute_force_codes(df, viz, block):
+    cols = viz.multi_select_columns(block)
+    return sum(df[col].to_numpy().astype(np.int64) << bit for bit, col in enumerate(cols))
+
+
+def test_pack_unpack_round_trip(viz, survey):
+    packed = viz.pack_multi_select(survey)
+    option_columns = [col for block in viz.MULTI_SELECT_BLOCKS for col in viz.multi_select_columns(block)]
+    assert not set(option_columns) & set(packed.columns)
+    for block in viz.MULTI_SELECT_BLOCKS:
+        codes = packed[viz.multi_select_mask_column(block)]
+        assert codes.dtype == np.uint8
+        np.testing.assert_array_equal(codes, _brute_force_codes(survey, viz, block))
+    restored = viz.unpack_multi_select(packed)
+    pd.testing.assert_frame_equal(restored[option_columns], survey[option_columns], check_dtype=False)
+
+
+@pytest.mark.parametrize('block', ['renewable', 'problems', 'channels'])
+def test_combination_counts_and_option_totals(viz, survey, block):
+    n_options = len(viz.multi_select_columns(block))
+    counts = viz.combination_counts(viz.multi_select_codes(survey, block), n_options)
+    expected = pd.Series(_brute_force_codes(survey, viz, block)).value_counts()
+    assert len(counts) == 1 << n_options
+    assert counts.sum() == len(survey)
+    assert counts[expected.index].tolist() == expected.tolist()
+    assert np.count_nonzero(counts) == len(expected)
+    totals = viz.option_totals(counts, n_options)
+    assert totals.tolist() == survey[viz.multi_select_columns(block)].sum().tolist()
+    packed_totals = viz.multi_select_totals(viz.pack_multi_select(survey), block)
+    assert packed_totals.tolist() == totals.tolist()
+
+
+def test_missing_answers_count_as_not_selected(viz, survey):
+    gappy = survey.astype({'问题_电池': float})
+    gappy.loc[:9, '问题_电池'] = np.nan
+    totals = viz.multi_select_totals(gappy, 'problems')
+    assert totals['问题_电池'] == gappy['问题_电池'].sum()
+    np.testing.assert_array_equal(viz.option_indicators(gappy, ['问题_电池'])[:, 0],
+                                  gappy['问题_电池'].fillna(0).to_numpy())
+
+
+def test_charts_read_packed_frames(viz, tmp_path, monkeypatch):
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    df = make_survey(300, seed=2)
+    for name, frame in (('plain', df), ('packed', viz.pack_multi_select(df))):
+        out = tmp_path / name
+        out.mkdir()
+        labelled = viz.with_label_columns(frame)
+        for chart in OPTION_CHARTS:
+            viz.render_registered_chart(chart, labelled, str(out))
+    for chart in OPTION_CHARTS:
+        name = viz.CHART_REGISTRY[chart]['output'].rsplit('.', 1)[0] + '.data.json'
+        with open(tmp_path / 'plain' / name, encoding='utf-8') as fh:
+            plain = json.load(fh)
+        with open(tmp_path / 'packed' / name, encoding='utf-8') as fh:
+            packed = json.load(fh)
+        assert plain['tables'] == packed['tables'], chart
+
+
+def test_service_keeps_blocks_packed_and_filters_on_options(viz, survey):
+    service = viz.ChartService(survey)
+    assert viz.multi_select_mask_column('problems') in service.df.columns
+    assert '问题_电池' not in service.df.columns
+    rows = service.filtered_frame(service.parse_request('nev', {'问题_电池': '1'})[2])
+    assert len(rows) == survey['问题_电池'].sum()
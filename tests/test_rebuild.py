@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Incremental rebuilds: fingerprints cover data, settings and every written file"""
+
+import os
+
+import pytest
+
+CHARTS = ['renewable', 'knowledge', 'trust_radar']
+
+
+@pytest.fixture
+def built(viz, survey, tmp_path):
+    assert viz.rebuild_charts(survey, str(tmp_path), CHARTS) == CHARTS
+    return str(tmp_path)
+
+
+def test_unchanged_inputs_are_not_redrawn(viz, survey, built):
+    assert viz.rebuild_charts(survey, built, CHARTS) == []
+
+
+def test_only_charts_reading_a_changed_column_are_redrawn(viz, survey, built):
+    edited = survey.copy()
+    edited.loc[0, '可再生_风能'] = 1 - edited.loc[0, '可再生_风能']
+    assert viz.rebuild_charts(edited, built, CHARTS) == ['renewable']
+
+
+@pytest.mark.parametrize('setting, value', [
+    ('DATA_BUNDLES', True), ('CI_WHISKERS', True), ('EXPORT_FORMATS', ['svg']),
+    ('SIGNIFICANCE_MARKERS', True), ('LAYOUT_MODE', 'cached'), ('FIGURE_DPI', 150),
+])
+def test_output_affecting_settings_invalidate_every_chart(viz, survey, built, monkeypatch, setting, value):
+    monkeypatch.setattr(viz, setting, value)
+    assert viz.rebuild_charts(survey, built, CHARTS, dry_run=True) == CHARTS
+
+
+def test_every_written_file_is_checked(viz, survey, built, monkeypatch):
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    monkeypatch.setattr(viz, 'EXPORT_FORMATS', ['svg'])
+    assert viz.rebuild_charts(survey, built, CHARTS) == CHARTS
+    assert os.path.exists(os.path.join(built, 'Renewable_Recognition.data.json'))
+    assert os.path.exists(os.path.join(built, 'Knowledge_Level.svg'))
+    assert viz.rebuild_charts(survey, built, CHARTS) == []
+    
+    os.remove(os.path.join(built, 'Renewable_Recognition.data.json'))
+    os.remove(os.path.join(built, 'Knowledge_Level.svg'))
+    assert viz.rebuild_charts(survey, built, CHARTS) == ['renewable', 'knowledge']
+    assert os.path.exists(os.path.join(built, 'Renewable_Recognition.data.json'))
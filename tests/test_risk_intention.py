@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""The risk-intention chart keeps its share denominator and item order"""
+
+import numpy as np
+
+from conftest import make_survey
+
+
+def test_shares_use_all_respondents_and_order_by_share(viz, tmp_path, monkeypatch):
+    df = make_survey(300, seed=5)
+    items = dict(viz.RISK_INTENTION_ITEMS)
+    for column in items:
+        df[column] = np.random.default_rng(len(column)).integers(0, 2, len(df))
+    df['问题_电池'] = df['问题_续航']  # a tie
+    df.loc[df.index[:40], '5年内购车意愿'] = np.nan
+    
+    drawn = {}
+    def capture(fig, path, **kwargs):
+        drawn['labels'] = [t.get_text() for t in fig.axes[0].get_yticklabels()]
+    monkeypatch.setattr(viz, 'save_fig', capture)
+    monkeypatch.setattr(viz, 'DATA_BUNDLES', True)
+    monkeypatch.setattr(viz, 'emit_data_bundle', lambda path, chart, tables, **meta:
+                        drawn.setdefault('tables', tables))
+    viz.plot_risk_intention_chart(df, str(tmp_path))
+    
+    shares = df[list(items)].sum() / len(df) * 100
+    expected = [items[k] for k in np.array(list(items))[np.argsort(shares.to_numpy())[::-1]]]
+    assert drawn['labels'] == expected
+    concerns = drawn['tables']['concerns'].set_index('Concern')
+    np.testing.assert_allclose(concerns.loc[list(items.values()), 'Worry%'], shares.to_numpy())
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""save_fig rendering at arbitrary resolutions and with cached layouts"""
+
+import matplotlib.figure
+import numpy as np
+import pytest
+from PIL import Image
+
+
+@pytest.mark.parametrize('dpi', [100, 150, 200, 300])
+@pytest.mark.parametrize('chart', ['create_combined_figure', 'create_info_channel_figure'])
+def test_combined_figures_render_at_any_dpi(viz, survey, tmp_path, monkeypatch, dpi, chart):
+    monkeypatch.setattr(viz, 'FIGURE_DPI', dpi)
+    path = tmp_path / f'{chart}.png'
+    getattr(viz, chart)(survey, str(path))
+    viz.flush_encoders()
+    with Image.open(path) as image:
+        width, height = image.size
+        assert image.info['dpi'][0] == pytest.approx(dpi, abs=1)
+    assert width > 4 * dpi and height > 2 * dpi
+
+
+def test_extra_raster_resolutions_come_from_one_render(viz, tmp_path, monkeypatch):
+    import matplotlib.pyplot as plt
+    monkeypatch.setattr(viz, 'FIGURE_DPI', 150)
+    fig, ax = plt.subplots(figsize=(6.57, 3.91))
+    ax.plot([0, 1], [0, 1])
+    written = viz.save_fig(fig, str(tmp_path / 'line.png'), formats=[('png', 600), 'svg'])
+    viz.flush_encoders()
+    assert [p.rsplit('/', 1)[-1] for p in written] == ['line.png', 'line_600dpi.png', 'line.svg']
+    with Image.open(tmp_path / 'line.png') as low, Image.open(tmp_path / 'line_600dpi.png') as high:
+        assert abs(high.size[0] - 4 * low.size[0]) <= 4
+
+
+def test_background_encoding_is_scoped_and_flushed(viz, tmp_path):
+    import matplotlib.pyplot as plt
+    assert viz.BACKGROUND_ENCODING is False
+    with viz.background_encoding():
+        for i in range(12):
+            fig, ax = plt.subplots(figsize=(2, 2))
+            ax.plot([0, i], [0, 1])
+            viz.save_fig(fig, str(tmp_path / f'fig{i}.png'))
+    assert viz.BACKGROUND_ENCODING is False
+    assert all((tmp_path / f'fig{i}.png').exists() for i in range(12))
+    assert not viz._pending_writes
+
+
+@pytest.mark.parametrize('chart', ['knowledge', 'trust_radar', 'info_channels'])
+def test_cached_layout_renders_like_tight_layout(viz, survey, tmp_path, monkeypatch, chart):
+    labelled = viz.with_label_columns(survey)
+    output = viz.CHART_REGISTRY[chart]['output']
+    for run in ('tight', 'first', 'second'):
+        (tmp_path / run).mkdir()
+    viz.render_registered_chart(chart, labelled, str(tmp_path / 'tight'))
+    
+    monkeypatch.setattr(viz, 'LAYOUT_MODE', 'cached')
+    viz.clear_layout_cache()
+    for run in ('first', 'second'):
+        viz.render_registered_chart(chart, labelled, str(tmp_path / run))
+        if run == 'first':
+            layouts = dict(viz._layout_cache)
+            assert layouts
+            # The second render takes every layout from the cache
+            monkeypatch.setattr(matplotlib.figure.Figure, 'tight_layout',
+                                lambda fig, *args, **kwargs: pytest.fail('tight_layout ran'))
+    assert viz._layout_cache == layouts
+    viz.clear_layout_cache()
+    
+    with Image.open(tmp_path / 'tight' / output) as tight, Image.open(tmp_path / 'second' / output) as cached:
+        assert tight.size == cached.size
+        assert np.array_equal(np.asarray(tight), np.asarray(cached))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Latent class segmentation: EM recovery, mini-batch refinement and outputs"""
+
+import numpy as np
+import pytest
+
+from conftest import make_survey
+
+
+def planted_survey(viz, n, seed=0):
+    """Survey with two planted segments: high scores and frequent selections (1/3
+    of respondents) and low scores and rare selections; returns (df, segment)"""
+    rng = np.random.default_rng(seed)
+    df = make_survey(n, seed=seed)
+    segment = (rng.random(n) < 1 / 3).astype(int)
+    for item in viz.SEGMENT_ITEMS:
+        high, low = rng.integers(4, 6, n), rng.integers(1, 3, n)
+        scores = np.where(segment == 1, high, low)
+        # Stored on the item's own scale, so the positive scale carries the split
+        positive = viz.CODEBOOK.positive_series(df.assign(**{item: scores}), item).to_numpy()
+        df[item] = np.where(positive == scores, scores, 6 - scores)
+    for block in viz.SEGMENT_BLOCKS:
+        for col in viz.multi_select_columns(block):
+            df[col] = (rng.random(n) < np.where(segment == 1, 0.8, 0.15)).astype(int)
+    return df, segment
+
+
+def recovered_share(members, segment):
+    agreement = np.mean(members['Segment'].to_numpy() - 1 == segment)
+    return max(agreement, 1 - agreement)
+
+
+def test_em_recovers_planted_segments(viz):
+    df, segment = planted_survey(viz, 1500)
+    model = viz.LatentClassModel(n_classes=2).fit(df)
+    assert recovered_share(model.memberships(df), segment) > 0.97
+    np.testing.assert_allclose(model.weights, [2 / 3, 1 / 3], atol=0.05)
+
+
+def test_minibatch_refinement_recovers_planted_segments(viz, monkeypatch):
+    monkeypatch.setattr(viz, 'SEGMENT_BATCH_SIZE', 1000)
+    df, segment = planted_survey(viz, 6000, seed=1)
+    model = viz.LatentClassModel(n_classes=2).fit(df)
+    assert recovered_share(model.memberships(df), segment) > 0.97
+    np.testing.assert_allclose(model.weights, [2 / 3, 1 / 3], atol=0.05)
+
+
+def test_memberships_reject_other_variables(viz):
+    df, _ = planted_survey(viz, 300)
+    model = viz.LatentClassModel(n_classes=2).fit(df)
+    with pytest.raises(ValueError, match='variables the model was fitted on'):
+        model.memberships(df.drop(columns=viz.SEGMENT_ITEMS[0]))
+    with pytest.raises(ValueError, match='variables the model was fitted on'):
+        model.memberships(df.drop(columns=viz.multi_select_columns(viz.SEGMENT_BLOCKS[-1])))
+
+
+def test_bic_and_profile_shapes(viz, tmp_path):
+    df, _ = planted_survey(viz, 800, seed=2)
+    models = {k: viz.LatentClassModel(n_classes=k).fit(df) for k in (1, 2, 3)}
+    assert models[2].bic < models[1].bic
+    assert models[2].bic < models[3].bic
+    
+    model = models[3]
+    n_options = sum(len(viz.multi_select_columns(block)) for block in viz.SEGMENT_BLOCKS)
+    profiles = model.profiles()
+    assert profiles.shape == (len(viz.SEGMENT_ITEMS) + n_options, 2 + 3)
+    assert list(profiles.columns[2:]) == model.segment_names()
+    likert = profiles[profiles['Kind'] == 'likert'][model.segment_names()]
+    assert ((likert >= 1) & (likert <= 5)).all().all()
+    
+    members = model.memberships(df)
+    assert list(members.columns) == ['Segment', 'Segment Probability', 'P(Segment 1)', 'P(Segment 2)',
+                                     'P(Segment 3)']
+    np.testing.assert_allclose(members.iloc[:, 2:].sum(axis=1), 1)
+    assert np.all(np.diff(model.weights) <= 0)
+    
+    viz.plot_segment_profiles(df, str(tmp_path), model=model, memberships=members)
+    assert (tmp_path / 'Advanced_Segment_Profiles.png').exists()
@@ -14,19 +14,232 @@ import matplotlib.gridspec as gridspec
 import seaborn as sns
 from matplotlib.font_manager import FontProperties
 from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.artist import Artist
+from matplotlib.lines import Line2D
+from matplotlib.transforms import IdentityTransform
+import threading
+import contextlib
 import warnings
-warnings.filterwarnings('ignore')
+import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 
-# Global Matplotlib Configuration
-# Set default font for all text (titles, labels, legends, etc.)
-plt.rcParams['font.sans-serif'] = ['Arial', 'Helvetica', 'DejaVu Sans'] 
+# ============================================================================
+# Font Resolution
+# ============================================================================
+
+# Pinned font stack: the first installed family of each role is used, in role order,
+# so Latin text, Chinese labels and summary symbols each resolve to a fixed font and
+# matplotlib falls back per glyph. Font files in FONT_DIR (default: fonts/ next to
+# this module) are registered first, so shipping them there pins the same faces on
+# every host. The resolution is computed once per process and persisted in the
+# matplotlib cache dir, keyed by the installed font set, so worker processes skip it.
+FONT_DIR = None
+FONT_STACK = [
+    ('latin', ['Arial', 'Helvetica', 'Liberation Sans', 'DejaVu Sans']),
+    ('cjk', ['Noto Sans CJK SC', 'Source Han Sans SC', 'Microsoft YaHei', 'PingFang SC',
+             'SimHei', 'WenQuanYi Zen Hei', 'WenQuanYi Micro Hei', 'Arial Unicode MS']),
+    ('symbol', ['Noto Emoji', 'Segoe UI Emoji', 'Segoe UI Symbol', 'Symbola',
+                'Noto Sans Symbols 2', 'DejaVu Sans']),
+]
+FONT_CACHE_NAME = 'ev_font_resolution.json'
+FONT_CACHE_VERSION = 1
+# Joiners and variation selectors shape emoji sequences but need no glyph of their own
+GLYPH_CHECK_IGNORE = {'\u200d', '\ufe0e', '\ufe0f'}
+# Symbols drawn by the summary panels and legends, checked along with column names
+CHART_SYMBOLS = '📊👨‍🎓🎓🔬👥📈🚗💡✗●─═'
+# Stand-ins (in DejaVu Sans, which matplotlib always ships) for summary panel emoji,
+# used by symbol_text when no resolved font has the emoji. Without a stand-in, or
+# when the stand-in is missing too, the symbol is left out. To draw the emoji
+# themselves, put an emoji font (e.g. NotoEmoji-Regular.ttf) in FONT_DIR.
+SYMBOL_FALLBACKS = {'📊': '■', '👨‍🎓': '♂', '🎓': '▲', '🔬': '◆', '👥': '●', '📈': '▲',
+                    '🚗': '▶', '💡': '★'}
+# A chart drawing a character no resolved font has: 'raise' (RuntimeError naming the
+# unresolved FONT_STACK roles) so output never silently depends on host fonts, or
+# 'warn' (matplotlib's missing-glyph warning, the glyph draws as a box)
+MISSING_GLYPH_POLICY = 'raise'
+
+_font_resolution = None
+_font_charmaps = {}
+
+
+def _font_dir():
+    import os
+    return FONT_DIR or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+
+
+def _register_bundled_fonts():
+    """Add the font files shipped in FONT_DIR to matplotlib's font manager"""
+    import os
+    font_dir = _font_dir()
+    if not os.path.isdir(font_dir):
+        return []
+    known = {f.fname for f in fm.fontManager.ttflist}
+    added = []
+    for name in sorted(os.listdir(font_dir)):
+        path = os.path.join(font_dir, name)
+        if name.lower().endswith(('.ttf', '.otf', '.ttc')) and path not in known:
+            fm.fontManager.addfont(path)
+            added.append(path)
+    return added
+
+
+def _font_inventory_key():
+    """Hash of the installed font files and the pinned stack"""
+    import hashlib
+    files = sorted({f.fname for f in fm.fontManager.ttflist})
+    return hashlib.sha1(repr((FONT_CACHE_VERSION, FONT_STACK, files)).encode()).hexdigest()
+
+
+def _regular_face(family):
+    """File of the regular (or closest) face of an installed family, or None"""
+    faces = [f for f in fm.fontManager.ttflist if f.name == family]
+    if not faces:
+        return None
+    
+    def distance(face):
+        weight = face.weight if isinstance(face.weight, int) else fm.weight_dict.get(face.weight, 400)
+        return (face.style != 'normal', abs(weight - 400))
+    return min(faces, key=distance).fname
+
+
+def resolve_fonts(refresh=False):
+    """
+    Resolve the pinned font stack once and apply it to rcParams
+    
+    Returns:
+        {'key', 'families': [family, ...], 'roles': {role: family or None},
+         'files': {family: path}}
+    """
+    import os
+    import json
+    global _font_resolution
+    if _font_resolution is not None and not refresh:
+        apply_fonts()
+        return _font_resolution
+    
+    _register_bundled_fonts()
+    key = _font_inventory_key()
+    cache_path = os.path.join(matplotlib.get_cachedir(), FONT_CACHE_NAME)
+    resolution = None
+    if not refresh and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding='utf-8') as fh:
+                cached = json.load(fh)
+            if cached.get('key') == key and all(map(os.path.exists, cached['files'].values())):
+                resolution = cached
+        except (OSError, ValueError, KeyError):
+            resolution = None
+    
+    if resolution is None:
+        roles, files = {}, {}
+        for role, candidates in FONT_STACK:
+            roles[role] = None
+            for family in candidates:
+                path = _regular_face(family)
+                if path is not None:
+                    roles[role] = family
+                    files.setdefault(family, path)
+                    break
+        families = list(dict.fromkeys(f for f in roles.values() if f is not None))
+        resolution = {'key': key, 'families': families or ['DejaVu Sans'],
+                      'roles': roles, 'files': files}
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as fh:
+                json.dump(resolution, fh, ensure_ascii=False, indent=2)
+        except OSError:
+            pass    # read-only cache dir: resolve again next time
+    
+    _font_resolution = resolution
+    _font_charmaps.clear()
+    apply_fonts()
+    return resolution
+
+
+def apply_fonts():
+    """Point rcParams at the resolved families (cheap; seaborn themes reset them)"""
+    families = _font_resolution['families'] if _font_resolution else resolve_fonts()['families']
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = list(families)
+    # Solve the issue where minus sign '-' is displayed as a square when saving images
+    plt.rcParams['axes.unicode_minus'] = False
+
+
+def check_glyph_coverage(texts):
+    """
+    Characters in texts that none of the resolved fonts can draw
+    
+    Args:
+        texts: Iterable of strings (labels, titles, column names, ...)
+    
+    Returns:
+        Sorted list of missing characters
+    """
+    from matplotlib.ft2font import FT2Font
+    resolution = resolve_fonts()
+    for family, path in resolution['files'].items():
+        if family not in _font_charmaps:
+            _font_charmaps[family] = set(FT2Font(path).get_charmap())
+    covered = set().union(*_font_charmaps.values()) if _font_charmaps else set()
+    
+    chars = set(''.join(str(text) for text in texts))
+    return sorted(c for c in chars if c.isprintable() and not c.isspace()
+                  and c not in GLYPH_CHECK_IGNORE and ord(c) not in covered)
 
-# Solve the issue where minus sign '-' is displayed as a square when saving images
-plt.rcParams['axes.unicode_minus'] = False
 
-print(f"Success: Matplotlib font set to Arial/Helvetica")
+def symbol_text(text):
+    """text with every symbol the resolved fonts cannot draw replaced by its
+    SYMBOL_FALLBACKS stand-in, or removed"""
+    for symbol in sorted(SYMBOL_FALLBACKS, key=len, reverse=True):
+        if symbol in text and check_glyph_coverage([symbol]):
+            fallback = SYMBOL_FALLBACKS[symbol]
+            if check_glyph_coverage([fallback]):
+                text = text.replace(f'{symbol} ', '').replace(symbol, '')
+            else:
+                text = text.replace(symbol, fallback)
+    return text
+
+
+@contextlib.contextmanager
+def missing_glyph_guard(context):
+    """Apply MISSING_GLYPH_POLICY to the text drawn inside the block"""
+    if MISSING_GLYPH_POLICY != 'raise':
+        yield
+        return
+    figures_before = set(plt.get_fignums())
+    try:
+        with warnings.catch_warnings():
+            warnings.filterwarnings('error', message='Glyph .* missing from font', category=UserWarning)
+            yield
+    except UserWarning as exc:
+        if 'missing from font' not in str(exc):
+            raise
+        for num in set(plt.get_fignums()) - figures_before:
+            plt.close(num)
+        roles = resolve_fonts()['roles']
+        unresolved = [role for role, family in roles.items() if family is None] or ['none']
+        raise RuntimeError(
+            f"{context}: {exc} Unresolved FONT_STACK role(s): {', '.join(unresolved)}; install one "
+            f"of their fonts or put its file in {_font_dir()} (or set MISSING_GLYPH_POLICY = 'warn')"
+        ) from None
+
+
+def report_glyph_coverage(texts, context='charts'):
+    """Print one log line for characters the resolved fonts cannot draw"""
+    missing = check_glyph_coverage(texts)
+    if missing:
+        sample = ''.join(missing[:20]) + ('…' if len(missing) > 20 else '')
+        print(f"  ! Fonts {', '.join(resolve_fonts()['families'])} lack {len(missing)} "
+              f"character(s) used in {context}: {sample}")
+    return missing
+
+
+resolve_fonts()
+print(f"Success: Matplotlib fonts resolved to {', '.join(_font_resolution['families'])}")
+_unresolved_roles = [role for role, family in _font_resolution['roles'].items() if family is None]
+if _unresolved_roles:
+    print(f"  ! No installed font for the {', '.join(_unresolved_roles)} role(s) of FONT_STACK: "
+          f"charts drawing such text fail (MISSING_GLYPH_POLICY = {MISSING_GLYPH_POLICY!r})")
 
 from .config import COLORS, FIGURE_DPI
 
@@ -102,9 +315,8 @@ def setup_style():
     # Use Seaborn white style
     sns.set_theme(style="white", context="talk", font_scale=1.0)
     
-    # Configure Fonts
-    plt.rcParams['font.sans-serif'] = ['Arial', 'Helvetica', 'DejaVu Sans']
-    plt.rcParams['axes.unicode_minus'] = False
+    # Configure Fonts (resolved once per process, see resolve_fonts)
+    apply_fonts()
     
     # High Resolution Output
     plt.rcParams['figure.dpi'] = 150
@@ -159,25 +371,509 @@ def get_unified_palette(n_colors, palette_type='categorical'):
     else:
         return sns.color_palette(UNIFIED_COLORS['categorical'], n_colors)
 
-def save_fig(fig, path):
-    """Unified save function, ensuring margins and background"""
-    fig.tight_layout()
-    fig.savefig(path, bbox_inches='tight', facecolor='white', dpi=FIGURE_DPI, 
-                edgecolor='none', pad_inches=0.2)
-    plt.close(fig)
+# Extra output formats written by save_fig when no formats are passed explicitly.
+# Entries are a format name ('svg', 'pdf', 'png', ...) or a (format, dpi) tuple,
+# e.g. ['svg', 'pdf', ('png', 72)] for vector copies plus a low-resolution preview.
+EXPORT_FORMATS = []
+
+RASTER_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'webp': 'WEBP',
+                  'tif': 'TIFF', 'tiff': 'TIFF', 'bmp': 'BMP'}
+
+# Output settings export_settings() can override for the calling thread only
+EXPORT_SETTINGS = ('EXPORT_FORMATS', 'BACKGROUND_ENCODING', 'WEB_EXPORT_DIR', 'DATA_BUNDLES')
+
+_export_overrides = threading.local()
+
+
+@contextlib.contextmanager
+def export_settings(**settings):
+    """
+    Override output settings for save_fig and emit_data_bundle calls made by this
+    thread, e.g. export_settings(EXPORT_FORMATS=['svg'], DATA_BUNDLES=False);
+    other threads keep the module settings
+    """
+    unknown = set(settings) - set(EXPORT_SETTINGS)
+    if unknown:
+        raise ValueError(f"not an export setting: {', '.join(sorted(unknown))}")
+    previous = getattr(_export_overrides, 'settings', {})
+    _export_overrides.settings = {**previous, **settings}
+    try:
+        yield
+    finally:
+        _export_overrides.settings = previous
+
+
+def _export_setting(name):
+    """Current value of an EXPORT_SETTINGS entry for this thread"""
+    return getattr(_export_overrides, 'settings', {}).get(name, globals()[name])
+
+
+class _ThreadStdout:
+    """sys.stdout stand-in: threads inside thread_output() write to their own
+    buffer, every other thread to the wrapped stream"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def _target(self):
+        buffer = getattr(_thread_buffers, 'buffer', None)
+        return self.stream if buffer is None else buffer
+    
+    def write(self, text):
+        return self._target().write(text)
+    
+    def flush(self):
+        self._target().flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_thread_buffers = threading.local()
+_thread_stdout_lock = threading.Lock()
+_thread_stdout_users = 0
+
+
+@contextlib.contextmanager
+def thread_output(buffer=None):
+    """
+    Collect what this thread prints (the [Data Log] lines) in buffer, a new
+    StringIO by default, which is yielded; other threads keep printing to
+    sys.stdout. Unlike contextlib.redirect_stdout, which swaps sys.stdout for the
+    whole process, concurrent callers each get their own log.
+    """
+    import io
+    import sys
+    global _thread_stdout_users
+    buffer = io.StringIO() if buffer is None else buffer
+    with _thread_stdout_lock:
+        if not isinstance(sys.stdout, _ThreadStdout):
+            sys.stdout = _ThreadStdout(sys.stdout)
+        _thread_stdout_users += 1
+    previous = getattr(_thread_buffers, 'buffer', None)
+    _thread_buffers.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        _thread_buffers.buffer = previous
+        with _thread_stdout_lock:
+            _thread_stdout_users -= 1
+            if _thread_stdout_users == 0 and isinstance(sys.stdout, _ThreadStdout):
+                sys.stdout = sys.stdout.stream
+
+
+def get_export_paths(path, formats=None):
+    """Resolve (format, dpi, path) for the primary output and every extra format
+    
+    Extra entries of the same format as path, or raster entries at a non-default
+    dpi, are written next to path with a '_{dpi}dpi' suffix.
+    """
+    import os
+    formats = _export_setting('EXPORT_FORMATS') if formats is None else formats
+    base, ext = os.path.splitext(path)
+    primary_fmt = ext.lstrip('.').lower() or 'png'
+    
+    outputs = [(primary_fmt, FIGURE_DPI, path)]
+    seen = {path}
+    for entry in formats:
+        fmt, dpi = (entry, FIGURE_DPI) if isinstance(entry, str) else entry
+        fmt = fmt.lower().lstrip('.')
+        if fmt in RASTER_FORMATS and dpi != FIGURE_DPI:
+            out_path = f'{base}_{dpi}dpi.{fmt}'
+        else:
+            out_path = f'{base}.{fmt}'
+        if out_path not in seen:
+            outputs.append((fmt, dpi, out_path))
+            seen.add(out_path)
+    return outputs
+
+
+# Background raster encoding: save_fig hands rendered buffers to a bounded thread
+# pool and returns; call flush_encoders() to wait for pending writes and surface errors.
+# Off by default so a plain plot_* call returns with its files written; the batch entry
+# points turn it on for their duration with background_encoding(), which flushes.
+BACKGROUND_ENCODING = False
+ENCODER_WORKERS = 4
+ENCODER_MAX_PENDING = 8  # Rendered buffers allowed in flight before save_fig blocks
+PNG_COMPRESS_LEVEL = 6   # zlib level 0-9: lower is faster, larger files
+
+_encoder_pool = None
+_encoder_slots = None
+_pending_writes = {}     # {future: output paths} of queued writes and failed ones
+_pending_lock = threading.Lock()
+_writes_queued = 0
+
+# Responsive web export: when WEB_EXPORT_DIR is set, save_fig also writes 1x/2x
+# variants with content-hashed filenames there and lists them in the web manifest
+WEB_EXPORT_DIR = None
+WEB_BASE_WIDTH = 960            # Pixel width of the 1x variant
+WEB_SCALES = (1, 2)
+WEB_FORMATS = ('webp', 'png')   # Preferred first; the last one is the <img> fallback
+WEB_QUALITY = 80                # Lossy quality for webp/avif
+WEB_MANIFEST_NAME = 'manifest.json'
+WEB_MANIFEST_VERSION = 1
+
+WEB_ENCODERS = {'avif': ('AVIF', 'image/avif'), 'webp': ('WEBP', 'image/webp'),
+                'png': ('PNG', 'image/png'), 'jpg': ('JPEG', 'image/jpeg')}
+
+_web_manifest_entries = {}      # {out_dir: {chart name: manifest entry}}
+_web_manifest_lock = threading.Lock()
+
+
+def _get_encoder_pool():
+    """Lazily create the shared encoder pool and its in-flight limit"""
+    global _encoder_pool, _encoder_slots
+    if _encoder_pool is None:
+        import atexit
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        _encoder_pool = ThreadPoolExecutor(max_workers=ENCODER_WORKERS,
+                                           thread_name_prefix='fig-encoder')
+        _encoder_slots = threading.BoundedSemaphore(ENCODER_MAX_PENDING)
+        atexit.register(_flush_encoders_at_exit)
+    return _encoder_pool, _encoder_slots
+
+
+def _queue_write(pool, slots, job, paths):
+    """Submit one encode job; successful writes drop out of _pending_writes when done"""
+    global _writes_queued
+    
+    def done(future):
+        slots.release()
+        if not future.cancelled() and future.exception() is None:
+            with _pending_lock:
+                _pending_writes.pop(future, None)
+    
+    slots.acquire()
+    future = pool.submit(_encode_raster_outputs, *job)
+    with _pending_lock:
+        _pending_writes[future] = paths
+        _writes_queued += 1
+    future.add_done_callback(done)
+
+
+def export_web_variants(image, name, out_dir, base_width=None, formats=None):
+    """
+    Write a responsive image set for one chart
+    
+    Every format in formats is written at each of WEB_SCALES x base_width (never
+    upscaled beyond the source), named '{name}.{content hash}.{width}w.{ext}'.
+    
+    Args:
+        image: PIL image or path to a rendered chart
+        name: Chart name used as manifest key and filename stem
+        out_dir: Output directory
+    
+    Returns:
+        Manifest entry: {'width', 'height', 'sources': {fmt: [{'file', 'width'}]}, 'fallback'}
+    """
+    import io
+    import os
+    import hashlib
+    from PIL import Image
+    
+    base_width = base_width or WEB_BASE_WIDTH
+    formats = formats or WEB_FORMATS
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    image = image.convert('RGB')  # Charts are saved on white, alpha is not needed
+    os.makedirs(out_dir, exist_ok=True)
+    
+    widths = sorted({min(image.width, int(base_width * scale)) for scale in WEB_SCALES})
+    variants = {w: image.resize((w, max(1, round(image.height * w / image.width))), Image.LANCZOS)
+                if w != image.width else image for w in widths}
+    
+    sources = {}
+    for fmt in formats:
+        encoder, _ = WEB_ENCODERS[fmt]
+        options = {'optimize': True} if encoder == 'PNG' else {'quality': WEB_QUALITY}
+        sources[fmt] = []
+        for w in widths:
+            buf = io.BytesIO()
+            variants[w].save(buf, format=encoder, **options)
+            digest = hashlib.sha1(buf.getvalue()).hexdigest()[:8]
+            file_name = f'{name}.{digest}.{w}w.{fmt}'
+            with open(os.path.join(out_dir, file_name), 'wb') as fh:
+                fh.write(buf.getvalue())
+            sources[fmt].append({'file': file_name, 'width': w})
+    
+    return {
+        'width': widths[0],
+        'height': variants[widths[0]].height,
+        'sources': sources,
+        'fallback': sources[formats[-1]][0]['file'],
+    }
+
+
+def _remove_stale_variants(out_dir, old_entry, new_entry):
+    """Delete variant files of old_entry that new_entry no longer references"""
+    import os
+    new_files = {s['file'] for srcs in new_entry['sources'].values() for s in srcs}
+    for srcs in old_entry.get('sources', {}).values():
+        for s in srcs:
+            stale_path = os.path.join(out_dir, s['file'])
+            if s['file'] not in new_files and os.path.exists(stale_path):
+                os.remove(stale_path)
+
+
+def write_web_manifest(out_dir, entries):
+    """Merge chart entries into out_dir's web manifest and delete replaced variant files"""
+    import os
+    import json
+    manifest_path = os.path.join(out_dir, WEB_MANIFEST_NAME)
+    manifest = {'version': WEB_MANIFEST_VERSION, 'images': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as fh:
+            manifest['images'].update(json.load(fh).get('images', {}))
+    
+    for name, entry in entries.items():
+        _remove_stale_variants(out_dir, manifest['images'].get(name, {}), entry)
+        manifest['images'][name] = entry
+    
+    manifest['images'] = dict(sorted(manifest['images'].items()))
+    with open(manifest_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+        fh.write('\n')
+    return manifest_path
+
+
+def export_web_assets(image_paths, out_dir, base_width=None, formats=None):
+    """Build web variants and the manifest for already rendered chart images"""
+    import os
+    entries = {}
+    for path in image_paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        entries[name] = export_web_variants(path, name, out_dir, base_width, formats)
+    return write_web_manifest(out_dir, entries)
+
+
+def _record_web_variants(image, name, out_dir):
+    """Export web variants for a rendered chart; the manifest is written by flush_encoders"""
+    entry = export_web_variants(image, name, out_dir)
+    with _web_manifest_lock:
+        pending = _web_manifest_entries.setdefault(out_dir, {})
+        if name in pending:
+            _remove_stale_variants(out_dir, pending[name], entry)
+        pending[name] = entry
+
+
+def _encode_raster_outputs(image, bbox_size, render_dpi, raster_outputs, compress_level,
+                           web_export=None):
+    """Resample and encode every raster variant from one rendered RGBA image"""
+    from PIL import Image
+    width_in, height_in = bbox_size
+    for fmt, dpi, out_path in raster_outputs:
+        variant = image
+        if dpi != render_dpi:
+            size = (max(1, int(width_in * dpi)), max(1, int(height_in * dpi)))
+            variant = image.resize(size, Image.LANCZOS)
+        encoder = RASTER_FORMATS[fmt]
+        if encoder in ('JPEG', 'BMP'):
+            variant = variant.convert('RGB')
+        options = {'compress_level': compress_level} if encoder == 'PNG' else {}
+        variant.save(out_path, format=encoder, dpi=(dpi, dpi), **options)
+    if web_export is not None:
+        _record_web_variants(image, *web_export)
+
+
+def flush_encoders():
+    """Wait for all background image writes and write pending web manifests;
+    raise if any of them failed
+    
+    Returns:
+        Number of writes queued since the last flush
+    """
+    global _writes_queued
+    with _pending_lock:
+        pending = list(_pending_writes.items())
+    errors = []
+    for future, paths in pending:
+        exc = future.exception()
+        if exc is not None:
+            errors.append(f'{paths[0]}: {type(exc).__name__}: {exc}')
+    with _pending_lock:
+        for future, _ in pending:
+            _pending_writes.pop(future, None)
+        n_queued, _writes_queued = _writes_queued, 0
+    
+    with _web_manifest_lock:
+        manifests = dict(_web_manifest_entries)
+        _web_manifest_entries.clear()
+    for out_dir, entries in manifests.items():
+        try:
+            write_web_manifest(out_dir, entries)
+        except OSError as exc:
+            errors.append(f'{out_dir}: {type(exc).__name__}: {exc}')
+    if errors:
+        raise RuntimeError(f'{len(errors)} figure write(s) failed:\n' + '\n'.join(errors))
+    return n_queued
+
+
+def _flush_encoders_at_exit():
+    """atexit hook: finish pending writes and report failures without raising"""
+    try:
+        flush_encoders()
+    except RuntimeError as exc:
+        print(f"  ! {exc}")
+
+
+@contextlib.contextmanager
+def background_encoding(enabled=True):
+    """
+    Encode images on the background pool for the duration of a batch of charts
+    
+    Pending writes are flushed on exit, so every file exists afterwards and a
+    failed write raises here rather than at the next flush.
+    """
+    global BACKGROUND_ENCODING
+    previous, BACKGROUND_ENCODING = BACKGROUND_ENCODING, enabled
+    try:
+        yield
+    except BaseException:
+        BACKGROUND_ENCODING = previous
+        _flush_encoders_at_exit()
+        raise
+    BACKGROUND_ENCODING = previous
+    flush_encoders()
+
+
+# Layout strategy for save_fig. 'tight' lays out and measures every figure. 'cached'
+# keeps the axes positions and tight bounding box of the first render of each figure
+# template (output name, figure size and axes count) and reuses them, so later renders
+# of that template cost a single draw. Margins come from the first render: text that
+# grows in a later render is not re-measured, so clear_layout_cache() when labels change.
+LAYOUT_MODE = 'tight'
+
+_layout_cache = {}
+
+
+def clear_layout_cache():
+    """Forget the layouts cached by LAYOUT_MODE = 'cached'"""
+    _layout_cache.clear()
+
+
+def _layout_cache_key(fig, path, layout_key=None):
+    """Figure template key for the layout cache"""
+    import os
+    width, height = fig.get_size_inches()
+    name = layout_key or os.path.splitext(os.path.basename(path))[0]
+    return (name, round(float(width), 3), round(float(height), 3), len(fig.axes))
+
+
+def _apply_cached_layout(fig, positions):
+    """Put every axes back where the cached layout had it"""
+    for ax, position in zip(fig.axes, positions):
+        in_layout = ax.get_in_layout()
+        ax.set_position(position)
+        ax.set_in_layout(in_layout)   # set_position takes the axes out of layout
+
+
+def save_fig(fig, path, formats=None, compress_level=None, close=True, relayout=True,
+             layout_key=None, background=None, web_export_dir=None):
+    """Unified save function, ensuring margins and background
+    
+    The figure is laid out and its tight bounding box measured once (or taken
+    from the layout cache, see LAYOUT_MODE), then drawn once with Agg at the
+    highest requested raster dpi. Lower-resolution raster
+    variants are resampled from that buffer, so extra raster formats only cost
+    encode time; vector formats (svg, pdf, ...) reuse the measured bounding box.
+    With BACKGROUND_ENCODING, raster encoding runs on the encoder pool and this
+    function returns once the figure is drawn (see flush_encoders), except while
+    a chart is being profiled. With
+    WEB_EXPORT_DIR set, the same render also feeds export_web_variants.
+    
+    Args:
+        fig: Figure to save
+        path: Primary output path, saved at FIGURE_DPI
+        formats: Extra outputs, see EXPORT_FORMATS (defaults to EXPORT_FORMATS)
+        compress_level: PNG zlib level (defaults to PNG_COMPRESS_LEVEL)
+        close: Close the figure afterwards (templates keep it open for reuse)
+        relayout: Run tight_layout first; templates reuse their first layout
+        layout_key: Template name for the LAYOUT_MODE = 'cached' lookup (defaults
+            to the output file name)
+        background: Encode on the background pool (defaults to BACKGROUND_ENCODING)
+        web_export_dir: Web variant directory (defaults to WEB_EXPORT_DIR)
+    
+    Settings left at None come from export_settings() overrides of the calling
+    thread, then from the module settings.
+    
+    Returns:
+        List of file paths written (or queued for writing)
+    """
+    import io
+    import os
+    from PIL import Image
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    outputs = get_export_paths(path, formats)
+    compress_level = PNG_COMPRESS_LEVEL if compress_level is None else compress_level
+    background = _export_setting('BACKGROUND_ENCODING') if background is None else background
+    web_export_dir = _export_setting('WEB_EXPORT_DIR') if web_export_dir is None else web_export_dir
+    
+    if not isinstance(fig.canvas, FigureCanvasAgg):
+        FigureCanvasAgg(fig)
+    key = _layout_cache_key(fig, path, layout_key) if LAYOUT_MODE == 'cached' else None
+    cached = _layout_cache.get(key) if key is not None else None
+    if cached is not None:
+        positions, bbox = cached
+        _apply_cached_layout(fig, positions)
+    else:
+        with profile_phase('layout'):
+            if relayout:
+                with warnings.catch_warnings():
+                    # Colorbar and inset axes are left in place; the bbox below still fits them
+                    warnings.filterwarnings('ignore', message='.*not compatible with tight_layout')
+                    fig.tight_layout()
+            bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.2)
+        if key is not None:
+            _layout_cache[key] = ([ax.get_position(original=True).frozen() for ax in fig.axes],
+                                  bbox.frozen())
+    save_kwargs = dict(bbox_inches=bbox, facecolor='white', edgecolor='none')
+    
+    raster_outputs = [o for o in outputs if o[0] in RASTER_FORMATS]
+    if raster_outputs:
+        render_dpi = max(dpi for _, dpi, _ in raster_outputs)
+        with profile_phase('rasterize'):
+            buf = io.BytesIO()
+            fig.savefig(buf, format='rgba', dpi=render_dpi, **save_kwargs)
+            # The canvas size Agg rendered at, which can be a pixel off bbox * dpi
+            width, height = (int(n) for n in fig.canvas.renderer.get_canvas_width_height())
+            rgba = np.frombuffer(buf.getvalue(), dtype=np.uint8).reshape(height, width, 4)
+            image = Image.fromarray(rgba, 'RGBA')
+        web_export = None
+        if web_export_dir is not None:
+            web_export = (os.path.splitext(os.path.basename(path))[0], web_export_dir)
+        job = (image, (bbox.width, bbox.height), render_dpi, raster_outputs, compress_level,
+               web_export)
+        
+        if background and _profile_frame() is None:
+            _queue_write(*_get_encoder_pool(), job, [p for _, _, p in raster_outputs])
+        else:
+            with profile_phase('encode'):
+                _encode_raster_outputs(*job)
+    
+    for fmt, dpi, out_path in outputs:
+        if fmt not in RASTER_FORMATS:
+            with profile_phase('rasterize'):
+                fig.savefig(out_path, format=fmt, dpi=dpi, **save_kwargs)
+    
+    if close:
+        plt.close(fig)
+    return [out_path for _, _, out_path in outputs]
 
 
-def save_subplot_as_figure(draw_func, save_path, figsize=(8, 6), title=None):
+def save_subplot_as_figure(draw_func, save_path, figsize=(8, 6), title=None, formats=None):
     """
     Save the result of a plotting function as an independent image
     draw_func: Plotting function that accepts an ax parameter
+    formats: Extra output formats, passed through to save_fig
     """
     setup_style()
     fig, ax = plt.subplots(figsize=figsize, facecolor='white')
     draw_func(ax)
     if title:
         ax.set_title(title, fontsize=14, fontweight='bold', pad=15)
-    save_fig(fig, save_path)
+    return save_fig(fig, save_path, formats)
 
 
 def get_subplots_dir(save_path):
@@ -196,109 +892,1234 @@ def add_panel_label(ax, label, x=-0.08, y=1.05, fontsize=16):
             fontweight='bold', va='top', ha='right', color='#333333')
 
 # ============================================================================
-# Plotting Functions
+# Chart Instrumentation
 # ============================================================================
 
-def plot_demographics(df, save_path):
-    """Plot demographic characteristics (using modern donut charts + statistical info cards)"""
-    # Log data
-    print(f"\n[Data Log] Data for Demographics:")
-    print("Gender Counts:")
-    print(df['性别'].value_counts().sort_index())
-    print("Education Counts:")
-    print(df['在学类别'].value_counts().sort_index())
-    print("Major Counts:")
-    print(f"STEM: {df['专业_理工类'].sum()}, Econ & Mgmt: {df['专业_经管类'].sum()}, Humanities: {df['专业_人文社科类'].sum()}")
-    print("Energy Experience Counts:")
-    print(df['能源经历'].value_counts().sort_index())
+# When CHART_INSTRUMENTATION is on, every public plot_*/create_* call records its peak
+# traced allocation, retained allocation, RSS delta and figures left open. Records
+# are kept in memory (get_chart_metrics) and appended to CHART_METRICS_NAME in the
+# chart's output directory.
+CHART_INSTRUMENTATION = False
+FIGURE_LEAK_POLICY = 'warn'     # 'warn' (FigureLeakWarning), 'raise' (RuntimeError) or 'ignore'
+CHART_METRICS_NAME = 'chart_metrics.jsonl'
 
-    setup_style()
-    fig = plt.figure(figsize=(18, 8), facecolor='white')
-    
-    # Use GridSpec for fine layout
-    gs = fig.add_gridspec(2, 4, height_ratios=[3, 1], hspace=0.3, wspace=0.25)
-    
-    # Use unified color scheme
-    colors_gender = [UNIFIED_COLORS['male'], UNIFIED_COLORS['female']]
-    colors_edu = UNIFIED_COLORS['education']
-    colors_major = [UNIFIED_COLORS['primary'], UNIFIED_COLORS['secondary'], UNIFIED_COLORS['tertiary']]
+
+class FigureLeakWarning(ResourceWarning):
+    """A chart entry point returned with figures it opened still open"""
+
+
+# Python ignores ResourceWarning by default; leak warnings go to stderr (which the
+# fan-out render.log redirect and the service leave alone) for every leaking call
+warnings.filterwarnings('always', category=FigureLeakWarning)
+
+_chart_metrics = []
+_instrument_stack = threading.local()
+
+
+def _current_rss_mb():
+    """Resident set size of this process in MB, or None when it cannot be read"""
+    import os
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _chart_output_dir(func, args, kwargs):
+    """Directory a plot_*/create_* call writes to, from its save_path/save_dir argument"""
+    import os
+    import inspect
+    try:
+        bound = inspect.signature(func).bind_partial(*args, **kwargs).arguments
+    except TypeError:
+        return None
+    if bound.get('save_dir'):
+        return bound['save_dir']
+    if bound.get('save_path'):
+        return os.path.dirname(bound['save_path']) or '.'
+    return None
+
+
+def get_chart_metrics(clear=False):
+    """Instrumentation records collected so far (oldest first)"""
+    records = list(_chart_metrics)
+    if clear:
+        _chart_metrics.clear()
+    return records
+
+
+def instrument_chart(func):
+    """
+    Record memory use, figure leaks and phase timings of a chart entry point
     
-    def draw_modern_donut(ax, data, labels, colors, title):
-        """Draw modern style donut chart"""
-        # Calculate percentages
-        total = sum(data)
-        explode = [0.02] * len(data)
-        
-        wedges, texts, autotexts = ax.pie(
-            data, labels=None, autopct='',
-            colors=colors, startangle=90, pctdistance=0.75,
-            wedgeprops=dict(width=0.5, edgecolor='white', linewidth=3),
-            explode=explode, shadow=False
-        )
-        
-        # Add total and title in center
-        ax.text(0, 0.1, f'{total}', ha='center', va='center', fontsize=28, 
-                fontweight='bold', color='#333333')
-        ax.text(0, -0.15, 'Sample', ha='center', va='center', fontsize=12, 
-                color='#666666')
-        ax.set_title(title, fontsize=14, fontweight='bold', pad=15, color='#333333')
-        
-        # Add external labels
-        for i, (wedge, label, value) in enumerate(zip(wedges, labels, data)):
-            ang = (wedge.theta2 - wedge.theta1) / 2. + wedge.theta1
-            x = np.cos(np.deg2rad(ang))
-            y = np.sin(np.deg2rad(ang))
-            
-            # Label position
-            label_x = x * 1.3
-            label_y = y * 1.3
-            
-            pct = value / total * 100
-            ax.annotate(f'{label}\n{value} ({pct:.1f}%)',
-                       xy=(x * 0.75, y * 0.75), xytext=(label_x, label_y),
-                       ha='center', va='center', fontsize=10,
-                       arrowprops=dict(arrowstyle='-', color='#CCCCCC', lw=1),
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', 
-                                edgecolor='#DDDDDD', alpha=0.9))
+    Inactive unless CHART_INSTRUMENTATION or CHART_PROFILING is set. Nested entry
+    points (e.g. the suite calling plot_*) each get their own record; an outer
+    peak includes the peaks of the calls it made, while phase timings only count
+    the outer call's own work. MISSING_GLYPH_POLICY applies to every call.
+    """
+    import functools
+    import contextlib
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not (CHART_INSTRUMENTATION or CHART_PROFILING):
+            with missing_glyph_guard(func.__name__):
+                return func(*args, **kwargs)
+        with contextlib.ExitStack() as scopes:
+            scopes.enter_context(missing_glyph_guard(func.__name__))
+            if CHART_INSTRUMENTATION:
+                scopes.enter_context(_measure_memory(func, args, kwargs))
+            if CHART_PROFILING:
+                scopes.enter_context(profile_chart(func.__name__,
+                                                   _chart_output_dir(func, args, kwargs)))
+            return func(*args, **kwargs)
+    
+    return wrapper
+
+
+@contextlib.contextmanager
+def _measure_memory(func, args, kwargs):
+    """Memory and figure-leak record for one instrumented call"""
+    import time
+    import tracemalloc
+    
+    stack = _instrument_stack.__dict__.setdefault('frames', [])
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if stack:
+        # Keep the caller's peak so far before resetting it for this call
+        stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    frame = {'peak': 0}
+    stack.append(frame)
+    
+    figures_before = set(plt.get_fignums())
+    traced_before = tracemalloc.get_traced_memory()[0]
+    rss_before = _current_rss_mb()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        traced_after, peak = tracemalloc.get_traced_memory()
+        peak = max(frame['peak'], peak)
+        stack.pop()
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        if started_tracing:
+            tracemalloc.stop()
+        rss_after = _current_rss_mb()
+        leaked = sorted(set(plt.get_fignums()) - figures_before)
         
-        return wedges
+        record = {
+            'chart': func.__name__,
+            'seconds': round(elapsed, 4),
+            'peak_traced_mb': round((peak - traced_before) / 2**20, 3),
+            'retained_traced_mb': round((traced_after - traced_before) / 2**20, 3),
+            'rss_delta_mb': None if rss_before is None else round(rss_after - rss_before, 3),
+            'open_figures': len(plt.get_fignums()),
+            'leaked_figures': leaked,
+        }
+        _chart_metrics.append(record)
+        _write_chart_metrics(_chart_output_dir(func, args, kwargs), record)
+        if leaked and FIGURE_LEAK_POLICY != 'ignore':
+            message = f"{func.__name__} left {len(leaked)} figure(s) open: {leaked}"
+            if FIGURE_LEAK_POLICY == 'raise':
+                raise RuntimeError(message)
+            warnings.warn(message, FigureLeakWarning)
 
-    # 1. Gender Distribution
-    ax1 = fig.add_subplot(gs[0, 0])
-    gender_counts = df['性别'].value_counts().sort_index()
-    draw_modern_donut(ax1, gender_counts.values, ['Male', 'Female'], colors_gender, 'Gender Distribution')
-    add_panel_label(ax1, 'A')
-    
-    # 2. Education Distribution
-    ax2 = fig.add_subplot(gs[0, 1])
-    edu_counts = df['在学类别'].value_counts().sort_index()
-    edu_labels = ['Undergraduate', 'Master', 'PhD']
-    draw_modern_donut(ax2, edu_counts.values, edu_labels, colors_edu, 'Education Distribution')
-    add_panel_label(ax2, 'B')
+
+def _write_chart_metrics(out_dir, record, file_name=None):
+    """Append one record to the metrics file next to the chart"""
+    import os
+    import json
+    if not out_dir or not os.path.isdir(out_dir):
+        return
+    file_name = file_name or CHART_METRICS_NAME
+    with open(os.path.join(out_dir, file_name), 'a', encoding='utf-8') as fh:
+        fh.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+# With CHART_PROFILING on, each entry point's own time is split into phases:
+#   prep       data preparation before the first figure is created
+#   draw       artist creation (entered with mark_phase('draw'))
+#   layout     tight_layout and the tight bounding-box measurement in save_fig
+#   rasterize  rendering the figure (Agg buffer, vector backends)
+#   encode     PNG/JPEG/WebP encoding and data bundle writes
+# Time spent in nested entry points is recorded against them, not the caller.
+# Raster encoding runs in the foreground while profiling so it can be attributed.
+CHART_PROFILING = False
+PROFILE_PHASES = ('prep', 'draw', 'layout', 'rasterize', 'encode')
+CHART_PROFILE_NAME = 'chart_profile.jsonl'
+
+_chart_profiles = []
+
+
+def _profile_frame():
+    """Innermost chart being profiled on this thread, or None"""
+    frames = _instrument_stack.__dict__.get('profile')
+    return frames[-1] if frames else None
+
+
+def _switch_phase(frame, phase):
+    """Book the time since the last switch to the frame's current phase"""
+    import time
+    now = time.perf_counter()
+    frame['phases'][frame['phase']] += now - frame['since']
+    frame['phase'], frame['since'] = phase, now
+
+
+def mark_phase(phase):
+    """Attribute the current chart's time from here on to phase (no-op unless profiling)"""
+    frame = _profile_frame()
+    if frame is not None:
+        _switch_phase(frame, phase)
+
+
+@contextlib.contextmanager
+def profile_phase(phase):
+    """Attribute the time spent in the block to phase, then resume the previous phase"""
+    frame = _profile_frame()
+    if frame is None:
+        yield
+        return
+    previous = frame['phase']
+    _switch_phase(frame, phase)
+    try:
+        yield
+    finally:
+        _switch_phase(frame, previous)
+
+
+@contextlib.contextmanager
+def profile_chart(name, out_dir=None):
+    """
+    Phase-timing record for one chart call
     
-    # 3. Major Distribution
-    ax3 = fig.add_subplot(gs[0, 2])
-    major_counts = [df['专业_理工类'].sum(), df['专业_经管类'].sum(), df['专业_人文社科类'].sum()]
-    major_labels = ['STEM', 'Econ & Mgmt', 'Humanities']
-    draw_modern_donut(ax3, major_counts, major_labels, colors_major, 'Major Distribution')
-    add_panel_label(ax3, 'C')
+    Used by instrument_chart for every entry point; callers can also wrap work
+    that happens outside an entry point (e.g. a registry wrapper's data prep).
+    Records go to get_chart_profiles() and CHART_PROFILE_NAME in out_dir.
+    """
+    import time
+    frames = _instrument_stack.__dict__.setdefault('profile', [])
+    parent = frames[-1] if frames else None
+    if parent is not None:
+        _switch_phase(parent, parent['phase'])
+    frame = {'chart': name, 'phase': 'prep', 'since': time.perf_counter(),
+             'phases': dict.fromkeys(PROFILE_PHASES, 0.0)}
+    frames.append(frame)
+    start = frame['since']
+    try:
+        yield frame
+    finally:
+        _switch_phase(frame, frame['phase'])
+        frames.pop()
+        end = time.perf_counter()
+        if parent is not None:
+            parent['since'] = end   # the nested call is not the caller's own time
+        
+        record = {
+            'chart': name,
+            'parent': parent['chart'] if parent else None,
+            'root': frames[0]['chart'] if frames else name,
+            'seconds': round(end - start, 4),
+            'self_seconds': round(sum(frame['phases'].values()), 4),
+            'phases': {phase: round(t, 4) for phase, t in frame['phases'].items()},
+        }
+        _chart_profiles.append(record)
+        _write_chart_metrics(out_dir, record, CHART_PROFILE_NAME)
+
+
+def get_chart_profiles(clear=False):
+    """Phase-timing records collected so far (oldest first)"""
+    records = list(_chart_profiles)
+    if clear:
+        _chart_profiles.clear()
+    return records
+
+
+def summarize_chart_profiles(records=None, top=5):
+    """
+    Rank charts and phases from phase-timing records
     
-    # 4. Energy Experience Statistics (Using beautified bar chart)
-    ax4 = fig.add_subplot(gs[0, 3])
-    exp_counts = df['能源经历'].value_counts().sort_index()
-    exp_labels = ['With Exp', 'No Exp']
-    exp_colors = [UNIFIED_COLORS['primary'], UNIFIED_COLORS['border']]
+    Args:
+        records: Records from get_chart_profiles (defaults to all collected)
+        top: Number of (chart, phase) hotspots to list
     
-    bars = ax4.barh(exp_labels, exp_counts.values, color=exp_colors, 
-                    edgecolor='white', linewidth=2, height=0.6)
+    Returns:
+        {'total_seconds', 'charts': [{'chart', 'seconds', 'phases'}] slowest first,
+         'phases': [{'phase', 'seconds', 'share'}] slowest first, 'hotspots': [...]}
+        Charts are the top-level calls; their phases include nested entry points.
+    """
+    records = get_chart_profiles() if records is None else records
+    charts = {}
+    for record in records:
+        entry = charts.setdefault(record['root'], {'chart': record['root'], 'seconds': 0.0,
+                                                   'phases': dict.fromkeys(PROFILE_PHASES, 0.0)})
+        if record['parent'] is None:
+            entry['seconds'] += record['seconds']
+        for phase, seconds in record['phases'].items():
+            entry['phases'][phase] += seconds
+    
+    total = sum(entry['seconds'] for entry in charts.values())
+    phase_totals = {phase: sum(entry['phases'][phase] for entry in charts.values())
+                    for phase in PROFILE_PHASES}
+    hotspots = sorted(((entry['chart'], phase, seconds) for entry in charts.values()
+                       for phase, seconds in entry['phases'].items()),
+                      key=lambda item: -item[2])[:top]
+    return {
+        'total_seconds': round(total, 4),
+        'charts': [{'chart': e['chart'], 'seconds': round(e['seconds'], 4),
+                    'phases': {p: round(t, 4) for p, t in e['phases'].items()}}
+                   for e in sorted(charts.values(), key=lambda e: -e['seconds'])],
+        'phases': [{'phase': p, 'seconds': round(t, 4),
+                    'share': round(t / total, 4) if total else 0.0}
+                   for p, t in sorted(phase_totals.items(), key=lambda item: -item[1])],
+        'hotspots': [{'chart': c, 'phase': p, 'seconds': round(t, 4)} for c, p, t in hotspots],
+    }
+
+
+def print_profile_summary(summary):
+    """Print a summarize_chart_profiles result as a ranked table"""
+    print(f"\n[Data Log] Chart profile: {len(summary['charts'])} charts, "
+          f"{summary['total_seconds']:.2f}s")
+    print(f"  {'chart':<36}{'total':>8}" + ''.join(f'{p:>11}' for p in PROFILE_PHASES))
+    for entry in summary['charts']:
+        print(f"  {entry['chart']:<36}{entry['seconds']:>8.2f}"
+              + ''.join(f"{entry['phases'][p]:>11.2f}" for p in PROFILE_PHASES))
+    print('  phases: ' + ', '.join(f"{e['phase']} {e['seconds']:.2f}s ({e['share']:.0%})"
+                                   for e in summary['phases']))
+    print('  hotspots: ' + ', '.join(f"{e['chart']}/{e['phase']} {e['seconds']:.2f}s"
+                                     for e in summary['hotspots']))
+
+
+# ============================================================================
+# Chart Data Bundles
+# ============================================================================
+
+# When DATA_BUNDLES is on, every chart writes the tidy tables behind it to
+# '{image name}.data.json' next to the image, for interactive web rendering
+DATA_BUNDLES = False
+DATA_BUNDLE_VERSION = 1
+DATA_BUNDLE_PRECISION = 4
+DATA_BUNDLE_SCORE_BINS = 20   # Grid per axis for binned respondent scores, so bundles stay small
+
+
+def counts_table(counts, labels, n_total):
+    """Tidy (Category, Count, Percent) table; labels map positionally as in the charts"""
+    counts = list(counts)
+    return pd.DataFrame({
+        'Category': list(labels)[:len(counts)],
+        'Count': counts[:len(labels)],
+        'Percent': [c / n_total * 100 for c in counts[:len(labels)]],
+    })
+
+
+def correlation_pairs(corr_matrix, threshold=0.0):
+    """Lower-triangle correlations as a (Var1, Var2, r) table, keeping |r| >= threshold"""
+    lower = np.tril(np.ones(corr_matrix.shape, dtype=bool), k=-1)
+    pairs = corr_matrix.where(lower).stack().rename_axis(['Var1', 'Var2']).reset_index(name='r')
+    return pairs[pairs['r'].abs() >= threshold].reset_index(drop=True)
+
+
+def binned_scores(scores, x, y, bins=None):
+    """Counts of respondents on a bins x bins grid over two score columns, non-empty
+    cells only, as an (x lo, x hi, y lo, y hi, n) table"""
+    bins = DATA_BUNDLE_SCORE_BINS if bins is None else bins
+    counts, x_edges, y_edges = np.histogram2d(scores[x], scores[y], bins=bins)
+    i, j = np.nonzero(counts)
+    return pd.DataFrame({f'{x} lo': x_edges[i], f'{x} hi': x_edges[i + 1],
+                         f'{y} lo': y_edges[j], f'{y} hi': y_edges[j + 1],
+                         'n': counts[i, j].astype(int)})
+
+
+def emit_data_bundle(save_path, chart, tables, **meta):
+    """
+    Write the data behind a chart as a compact, versioned JSON bundle
     
-    # Add value labels
-    for bar, val in zip(bars, exp_counts.values):
-        ax4.text(val + 1, bar.get_y() + bar.get_height()/2, 
-                f'{val} ({val/len(df)*100:.1f}%)', 
+    Args:
+        save_path: Image path of the chart; the bundle goes to '{base}.data.json'
+        chart: Chart identifier
+        tables: {name: DataFrame or Series}, stored as column list + row arrays
+        meta: Extra scalar fields (sample size, thresholds, ...)
+    
+    Returns:
+        Bundle path, or None when DATA_BUNDLES is off
+    """
+    if not _export_setting('DATA_BUNDLES'):
+        return None
+    import os
+    import json
+    
+    bundle = {'version': DATA_BUNDLE_VERSION, 'chart': chart, 'meta': meta, 'tables': {}}
+    bundle_path = os.path.splitext(save_path)[0] + '.data.json'
+    with profile_phase('encode'):
+        for name, table in tables.items():
+            if isinstance(table, pd.Series):
+                table = table.reset_index()
+            split = json.loads(table.to_json(orient='split', index=False,
+                                             double_precision=DATA_BUNDLE_PRECISION))
+            bundle['tables'][name] = {'columns': split['columns'], 'rows': split['data']}
+        with open(bundle_path, 'w', encoding='utf-8') as fh:
+            json.dump(bundle, fh, ensure_ascii=False, separators=(',', ':'), default=str)
+    return bundle_path
+
+
+# ============================================================================
+# Label Placement
+# ============================================================================
+
+# Candidate offsets (points) tried around a label's anchor when the anchor itself
+# is taken: rings of growing distance, vertical and horizontal moves first
+LABEL_OFFSET_RINGS = (12, 22, 34)
+LABEL_OFFSET_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+LABEL_LEADER_STYLE = dict(color='#999999', linewidth=0.8)
+LABEL_LEADER_MIN_GAP = 6    # points; labels this close to their anchor get no leader
+
+
+def ring_offsets(rings=LABEL_OFFSET_RINGS, directions=LABEL_OFFSET_DIRECTIONS):
+    """Offsets (points) around an anchor, nearest ring first"""
+    offsets = []
+    for distance in rings:
+        for dx, dy in directions:
+            norm = np.hypot(dx, dy)
+            offsets.append((distance * dx / norm, distance * dy / norm))
+    return offsets
+
+
+def radial_offsets(angle, rings=LABEL_OFFSET_RINGS):
+    """Offsets (points) pointing away from a centre at screen angle (radians), then the ring"""
+    outward = [(d * np.cos(angle), d * np.sin(angle)) for d in rings]
+    return outward + ring_offsets(rings)
+
+
+class _BoxGrid:
+    """Uniform grid over display boxes; overlap queries only visit nearby cells"""
+    
+    def __init__(self, cell):
+        self.cell = max(float(cell), 1.0)
+        self.cells = {}
+        self.boxes = []
+    
+    def _span(self, box):
+        x0, y0, x1, y1 = (int(np.floor(v / self.cell)) for v in box)
+        return ((i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1))
+    
+    def hits(self, box):
+        x0, y0, x1, y1 = box
+        for key in self._span(box):
+            for index in self.cells.get(key, ()):
+                bx0, by0, bx1, by1 = self.boxes[index]
+                if x0 < bx1 and bx0 < x1 and y0 < by1 and by0 < y1:
+                    return True
+        return False
+    
+    def insert(self, box):
+        self.boxes.append(box)
+        for key in self._span(box):
+            self.cells.setdefault(key, []).append(len(self.boxes) - 1)
+
+
+class LabelPlacer(Artist):
+    """
+    Collision-aware placement of annotation labels on one axes
+    
+    Placement runs when the axes is drawn, so it uses the final layout and is
+    redone for reused figures (templates) on every render. Each label's extent is
+    measured once per draw; its candidates (the anchor, alternative anchors, then
+    offsets around the anchor with a leader line) are tried in order against the
+    labels already placed and the obstacles, looked up in a uniform grid so a test
+    only touches nearby boxes. Labels are placed by descending priority; a label
+    with no free candidate is hidden unless it is required.
+    
+    Labels must be annotations with textcoords='offset points' and data xy.
+    """
+    
+    def __init__(self, ax, pad=2, leader_style=None):
+        super().__init__()
+        self.ax = ax
+        self.pad = pad
+        self.leader_style = LABEL_LEADER_STYLE if leader_style is None else leader_style
+        self.labels = []
+        self.obstacles = []
+        self.result = {}
+        self.set_zorder(-np.inf)    # place before any label draws
+        self.set_in_layout(False)
+        ax.add_artist(self)
+    
+    def add(self, annotation, priority=0, anchors=(), offsets=None, required=False):
+        """
+        Register a label
+        
+        Args:
+            annotation: Annotation placed at its xy with textcoords='offset points'
+            priority: Higher priorities claim space first
+            anchors: Alternative data positions tried after xy, without a leader
+            offsets: Offsets (points) around xy tried last, with a leader line
+                (defaults to ring_offsets())
+            required: Keep the label at xy when nothing fits instead of hiding it
+        """
+        leader = Line2D([], [], transform=IdentityTransform(),
+                                         zorder=annotation.get_zorder() - 0.01, visible=False,
+                                         clip_on=False, **self.leader_style)
+        self.ax.add_artist(leader)
+        self.labels.append({
+            'artist': annotation, 'priority': priority, 'anchors': list(anchors),
+            'offsets': ring_offsets() if offsets is None else list(offsets),
+            'required': required, 'leader': leader,
+            'home': (tuple(annotation.xy), tuple(annotation.xyann)),
+        })
+        return annotation
+    
+    def set_home(self, annotation, xy, anchors=None):
+        """Move a registered label's anchor (templates call this on update)"""
+        for label in self.labels:
+            if label['artist'] is annotation:
+                label['home'] = (tuple(xy), label['home'][1])
+                if anchors is not None:
+                    label['anchors'] = list(anchors)
+                annotation.xy = xy
+                return
+        raise KeyError('annotation is not registered with this placer')
+    
+    def add_obstacle(self, artist):
+        """Keep labels off an artist's window extent"""
+        self.obstacles.append(lambda renderer: artist.get_window_extent(renderer).extents)
+    
+    def add_obstacle_points(self, points, radius=6):
+        """Keep labels off markers at data points (radius in points); pass a Line2D
+        to follow its data as it is updated"""
+        if not isinstance(points, Line2D):
+            points = np.asarray(points, dtype=float).reshape(-1, 2)
+        
+        def boxes(renderer):
+            r = renderer.points_to_pixels(radius)
+            xy = points.get_xydata() if isinstance(points, Line2D) else points
+            return [(x - r, y - r, x + r, y + r) for x, y in self.ax.transData.transform(xy)]
+        self.obstacles.append(boxes)
+    
+    def add_obstacle_rect(self, x0, y0, x1, y1):
+        """Keep labels off a data-space rectangle"""
+        def box(renderer):
+            (ax0, ay0), (ax1, ay1) = self.ax.transData.transform([(x0, y0), (x1, y1)])
+            return (min(ax0, ax1), min(ay0, ay1), max(ax0, ax1), max(ay0, ay1))
+        self.obstacles.append(box)
+    
+    def _measure(self, annotation, renderer):
+        """Display box of the annotation text plus its bbox patch padding"""
+        x0, y0, x1, y1 = annotation.get_window_extent(renderer).extents
+        pad = renderer.points_to_pixels(self.pad)
+        patch = annotation.get_bbox_patch()
+        if patch is not None:
+            pad += patch.get_boxstyle().pad * renderer.points_to_pixels(annotation.get_fontsize())
+        return np.array([x0 - pad, y0 - pad, x1 + pad, y1 + pad])
+    
+    def _reset(self):
+        for label in self.labels:
+            annotation = label['artist']
+            annotation.xy, annotation.xyann = label['home']
+            annotation.set_visible(True)
+            label['leader'].set_visible(False)
+    
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        self._reset()
+        self.ax.apply_aspect()
+        to_px = renderer.points_to_pixels(1)
+        
+        measured = [(label, self._measure(label['artist'], renderer)) for label in self.labels
+                    if label['artist'].get_text()]
+        sizes = [max(box[2] - box[0], box[3] - box[1]) for _, box in measured]
+        grid = _BoxGrid(np.median(sizes) if sizes else 32)
+        for obstacle in self.obstacles:
+            boxes = obstacle(renderer)
+            for box in (boxes if isinstance(boxes, list) else [boxes]):
+                grid.insert(tuple(box))
+        bx0, by0, bx1, by1 = self.ax.bbox.extents
+        
+        counts = dict.fromkeys(['kept', 'moved', 'leader', 'hidden'], 0)
+        measured.sort(key=lambda item: -item[0]['priority'])
+        for label, box in measured:
+            annotation = label['artist']
+            home_xy, home_offset = label['home']
+            origin = self.ax.transData.transform(home_xy)
+            candidates = [(xy, home_offset, False) for xy in [home_xy] + label['anchors']]
+            candidates += [(home_xy, offset, True) for offset in label['offsets']]
+            
+            for xy, offset, leader in candidates:
+                shift = (self.ax.transData.transform(xy) - origin
+                         + (np.asarray(offset) - home_offset) * to_px)
+                cand = box + np.tile(shift, 2)
+                if cand[0] < bx0 or cand[1] < by0 or cand[2] > bx1 or cand[3] > by1:
+                    continue
+                if grid.hits(cand):
+                    continue
+                grid.insert(tuple(cand))
+                annotation.xy, annotation.xyann = xy, offset
+                anchor = self.ax.transData.transform(xy)
+                end = np.clip(anchor, cand[:2], cand[2:])
+                if leader and np.hypot(*(end - anchor)) > LABEL_LEADER_MIN_GAP * to_px:
+                    label['leader'].set_data([anchor[0], end[0]], [anchor[1], end[1]])
+                    label['leader'].set_visible(True)
+                    counts['leader'] += 1
+                elif leader:
+                    counts['moved'] += 1
+                else:
+                    counts['kept' if xy == home_xy else 'moved'] += 1
+                break
+            else:
+                if label['required']:
+                    grid.insert(tuple(box))
+                    counts['kept'] += 1
+                else:
+                    annotation.set_visible(False)
+                    counts['hidden'] += 1
+        self.result = counts
+
+
+# ============================================================================
+# Codebook
+# ============================================================================
+
+# Likert items are coded 1-5 with 1 = the most positive answer (very familiar,
+# very likely, fully trust); charts show them on the positive scale, higher = better.
+CODEBOOK_POSITIVE_SUFFIX = '_pos'
+
+
+class CodebookItem:
+    """
+    One survey column: English name, code scale, direction and value labels
+    
+    Args:
+        scale: (low, high) code range, or None for continuous columns (indices)
+        reverse: True when code `low` is the most positive answer; positive() then
+            maps code x to low + high - x
+        labels: Value labels in code order (low, low + 1, ...)
+        label_column: Categorical display-label column added by Codebook.apply
+        positive_column: Positive-direction column added by Codebook.apply for
+            reversed items (default '{column}_pos')
+    """
+    def __init__(self, column, name, scale=(1, 5), reverse=False, labels=None,
+                 label_column=None, positive_column=None):
+        self.column = column
+        self.name = name
+        self.scale = scale
+        self.reverse = reverse
+        self.labels = list(labels) if labels is not None else None
+        self.label_column = label_column
+        self.positive_column = (positive_column or column + CODEBOOK_POSITIVE_SUFFIX) if reverse else None
+    
+    def positive(self, values):
+        """Scores (scalars, arrays or Series of codes or code means) on the positive scale"""
+        if not self.reverse:
+            return values
+        low, high = self.scale
+        return low + high - values
+    
+    def label_map(self):
+        return dict(zip(range(self.scale[0], self.scale[1] + 1), self.labels or []))
+
+
+class Codebook:
+    """
+    Survey columns by name; the single place where items are reverse-coded and labelled
+    
+    apply() precomputes the derived columns once (int8 positive scores, categorical
+    labels); charts read them through positive_series() and label_series(), which
+    fall back to recoding on the fly for frames that did not go through apply().
+    Columns the codebook does not know pass through unchanged.
+    """
+    def __init__(self, items):
+        self.items = {item.column: item for item in items}
+    
+    def __contains__(self, column):
+        return column in self.items
+    
+    def __getitem__(self, column):
+        return self.items[column]
+    
+    def name(self, column):
+        return self.items[column].name if column in self.items else column
+    
+    def names(self, columns):
+        return [self.name(column) for column in columns]
+    
+    def labels(self, column):
+        return list(self.items[column].labels)
+    
+    def label_map(self, column):
+        return self.items[column].label_map() if column in self.items else {}
+    
+    def positive(self, column, values):
+        return self.items[column].positive(values) if column in self.items else values
+    
+    def to_positive(self, values):
+        """Means or scores indexed (Series) or columned (DataFrame) by survey column,
+        with reversed items moved to the positive scale"""
+        if isinstance(values, pd.Series):
+            return pd.Series({col: self.positive(col, v) for col, v in values.items()}, name=values.name)
+        return values.apply(lambda column: self.positive(column.name, column))
+    
+    def positive_series(self, df, column):
+        item = self.items.get(column)
+        if item is not None and item.positive_column in df.columns:
+            return df[item.positive_column]
+        return self.positive(column, df[column])
+    
+    def label_series(self, df, column):
+        item = self.items[column]
+        if item.label_column in df.columns:
+            return df[item.label_column]
+        return pd.Series(pd.Categorical(df[column].map(item.label_map()), categories=item.labels,
+                                        ordered=True), index=df.index, name=item.label_column)
+    
+    def apply(self, df):
+        """
+        df with the derived columns added, as a new frame (df is not modified)
+        
+        Reversed items get '{column}_pos' (int8 when every code is present and
+        integral) and labelled items with a label_column get an ordered categorical.
+        Columns already in df are kept as they are.
+        """
+        derived = {}
+        for item in self.items.values():
+            if item.column not in df.columns:
+                continue
+            if item.label_column and item.label_column not in df.columns:
+                derived[item.label_column] = self.label_series(df, item.column)
+            if item.reverse and item.positive_column not in df.columns:
+                values = item.positive(df[item.column])
+                if values.notna().all() and (values % 1 == 0).all():
+                    values = values.astype(np.int8)
+                derived[item.positive_column] = values
+        return df.assign(**derived) if derived else df
+
+
+def observed_groups(values):
+    """Distinct values of a grouping column: in category order for categoricals
+    (e.g. codebook labels), else sorted"""
+    present = values.dropna().unique()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        present = set(present)
+        return [c for c in values.cat.categories if c in present]
+    return sorted(present)
+
+
+FAMILIARITY_LABELS = ['Very Familiar', 'Familiar', 'Neutral', 'Unfamiliar', 'Very Unfamiliar']
+
+CODEBOOK = Codebook([
+    CodebookItem('性别', 'Gender', (1, 2), labels=['Male', 'Female'], label_column='Gender_Label'),
+    CodebookItem('在学类别', 'Education', (1, 3), labels=['Undergraduate', 'Master', 'PhD'],
+                 label_column='Education_Label'),
+    CodebookItem('能源经历', 'Energy Experience', (1, 2), labels=['Experienced', 'No Experience'],
+                 label_column='Experience_Label'),
+    CodebookItem('能源转型了解度', 'Energy Transition Familiarity', reverse=True, labels=FAMILIARITY_LABELS),
+    CodebookItem('双碳了解度', 'Dual Carbon Familiarity', reverse=True, labels=FAMILIARITY_LABELS),
+    CodebookItem('5年内购车意愿', 'Purchase Intention (5 yrs)', reverse=True, positive_column='购车意愿',
+                 labels=['Very Likely', 'Likely', 'Uncertain', 'Unlikely', 'Very Unlikely']),
+    CodebookItem('购车类型偏好', 'Vehicle Type Preference', labels=['BEV', 'PHEV', 'ICEV', 'FCEV', 'No Plan']),
+    CodebookItem('新能源汽车印象', 'NEV Impression', reverse=True,
+                 labels=['Very Positive', 'Positive', 'Neutral', 'Negative', 'Very Negative']),
+    CodebookItem('大学生义务', 'Student Responsibility', (1, 3), labels=['Yes', 'No', 'Uncertain']),
+    CodebookItem('技术信任度', 'Tech Trust', reverse=True),
+    CodebookItem('新能源汽车技术信任度', 'NEV Tech Trust', reverse=True),
+    CodebookItem('政策执行信任度', 'Policy Exec Trust', reverse=True),
+    CodebookItem('激励政策认同度', 'Incentive Approval', reverse=True),
+    CodebookItem('限油推新支持度', 'Fuel Limit Support', reverse=True),
+    CodebookItem('转型支持度', 'Transition Support', reverse=True),
+    CodebookItem('碳中和支持度', 'Carbon Neutral Support', reverse=True),
+    CodebookItem('新能源汽车态度', 'NEV Attitude', reverse=True),
+    CodebookItem('认知指数', 'Knowledge Index', None),
+    CodebookItem('责任感指数', 'Responsibility Index', None),
+    CodebookItem('信任指数', 'Trust Index', None),
+    CodebookItem('政策认同指数', 'Policy Support Index', None),
+    CodebookItem('态度', 'Attitude Score', None),
+])
+
+
+def _narrowest_int(low, high):
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def compact_dtype(series):
+    """
+    Narrowest dtype that holds series exactly, or None to keep its dtype
+    
+    Integral columns (integer, or float without fractions) become the smallest
+    signed integer covering their CODEBOOK scale, or the observed range when the
+    column is not coded or holds values outside its scale. Integral columns with
+    missing values become the matching nullable integer (Int8, ...); fractional
+    columns stay float: float32 would change the statistics the charts print.
+    """
+    if not pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+        return None
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        return None   # Already nullable (or otherwise custom): keep it
+    values = series.to_numpy()
+    present = values[~np.isnan(values.astype(float, copy=False))]
+    if len(present) == 0:
+        return None
+    if values.dtype.kind == 'f' and not (present % 1 == 0).all():
+        return None
+    low, high = present.min(), present.max()
+    item = CODEBOOK.items.get(series.name)
+    if item is not None and item.scale is not None and item.scale[0] <= low and high <= item.scale[1]:
+        low, high = item.scale
+    dtype = _narrowest_int(low, high)
+    if len(present) < len(values):
+        return pd.api.types.pandas_dtype(dtype.name.capitalize())   # int8 -> Int8
+    return dtype if dtype.itemsize < values.dtype.itemsize or values.dtype.kind == 'f' else None
+
+
+def compact_dtypes(df, report=True):
+    """
+    df with every column stored in its compact_dtype, as a new frame
+    
+    Meant to run once where survey data enters (the chart suite, cohort fan-out,
+    the chart service): Likert items, demographics and one-hot blocks all fit in
+    int8. Prints a before/after memory table of the converted columns.
+    """
+    dtypes = {col: dtype for col in df.columns if (dtype := compact_dtype(df[col])) is not None}
+    if not dtypes:
+        return df
+    compacted = df.astype(dtypes)
+    if report:
+        before = df.memory_usage(index=False, deep=True)
+        after = compacted.memory_usage(index=False, deep=True)
+        table = pd.DataFrame({'Before': df.dtypes[list(dtypes)].astype(str),
+                              'After': compacted.dtypes[list(dtypes)].astype(str),
+                              'KB Before': (before[list(dtypes)] / 1024).round(1),
+                              'KB After': (after[list(dtypes)] / 1024).round(1)})
+        print(f"\n[Data Log] Compacted {len(dtypes)} of {df.shape[1]} columns:")
+        print(table.to_string())
+        print(f"Frame: {before.sum() / 1024:.1f} KB -> {after.sum() / 1024:.1f} KB")
+    return compacted
+
+
+# ============================================================================
+# Confidence Intervals
+# ============================================================================
+
+# Count and percentage charts can show CI whiskers for their option shares
+CI_WHISKERS = False
+CI_LEVEL = 0.95
+CI_METHOD = 'bootstrap'     # 'bootstrap' (multinomial resampling) or 'exact' (Clopper-Pearson per share)
+CI_RESAMPLES = 10000
+CI_SEED = 0                 # Fixed, so redrawing a chart keeps its whiskers
+CI_WHISKER_STYLE = dict(color='#333333', linewidth=1.2, alpha=0.8, zorder=4)
+
+
+def bootstrap_counts(counts, resamples=None, seed=None):
+    """
+    Bootstrap redraws of a table of counts, as a resamples x len(counts) array
+    
+    Resampling the n respondents with replacement only changes how many land in
+    each cell, so every resample is one multinomial draw over the cells: a
+    single vectorized draw whose cost does not depend on n.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    resamples = resamples or CI_RESAMPLES
+    n = int(counts.sum())
+    if n == 0:
+        return np.zeros((resamples, len(counts)), dtype=np.int64)
+    rng = np.random.default_rng(CI_SEED if seed is None else seed)
+    return rng.multinomial(n, counts / n, size=resamples)
+
+
+def _percentile_interval(draws, level):
+    tail = (1 - level) / 2 * 100
+    return np.percentile(draws, [tail, 100 - tail], axis=0)
+
+
+def _exact_interval(counts, n_total, level):
+    """Clopper-Pearson bounds (as shares) of binomial counts out of n_total"""
+    from scipy import stats
+    counts = np.asarray(counts, dtype=float)
+    alpha = 1 - level
+    with np.errstate(invalid='ignore'):
+        low = np.where(counts > 0, stats.beta.ppf(alpha / 2, counts, n_total - counts + 1), 0.0)
+        high = np.where(counts < n_total, stats.beta.ppf(1 - alpha / 2, counts + 1, n_total - counts), 1.0)
+    return low, high
+
+
+def share_ci(counts, n_total=None, level=None, method=None, resamples=None):
+    """
+    Confidence intervals of the category shares of a single-choice question
+    
+    Args:
+        counts: Respondents per category; respondents counted in n_total but in
+            no category (missing answers) stay in the resampled sample
+    
+    Returns:
+        (low, high): Arrays of percentages, aligned with counts
+    """
+    level = CI_LEVEL if level is None else level
+    counts = np.asarray(counts, dtype=np.int64)
+    n_total = int(counts.sum()) if n_total is None else int(n_total)
+    if n_total == 0:
+        return np.zeros(len(counts)), np.zeros(len(counts))
+    if (method or CI_METHOD) == 'exact':
+        low, high = _exact_interval(counts, n_total, level)
+        return low * 100, high * 100
+    cells = np.append(counts, n_total - counts.sum())
+    draws = bootstrap_counts(cells, resamples)[:, :-1]
+    low, high = _percentile_interval(draws / n_total * 100, level)
+    return low, high
+
+
+def option_share_ci(codes, n_options, level=None, method=None, resamples=None):
+    """
+    Confidence intervals of the selection shares of a multi-select block's options
+    
+    The bootstrap redraws respondents through their option combinations
+    (multi_select_codes), so co-selected options stay co-selected in every
+    resample; the exact method treats each option as its own binomial.
+    
+    Returns:
+        (low, high): Arrays of percentages, one per option in bit order
+    """
+    level = CI_LEVEL if level is None else level
+    counts = combination_counts(codes, n_options)
+    n_total = len(codes)
+    if n_total == 0:
+        return np.zeros(n_options), np.zeros(n_options)
+    if (method or CI_METHOD) == 'exact':
+        low, high = _exact_interval(option_totals(counts, n_options), n_total, level)
+        return low * 100, high * 100
+    present = np.flatnonzero(counts)
+    bits = (present[:, None] >> np.arange(n_options)) & 1
+    draws = bootstrap_counts(counts[present], resamples) @ bits
+    low, high = _percentile_interval(draws / n_total * 100, level)
+    return low, high
+
+
+def combination_mean_ci(codes, n_options, values, level=None, resamples=None):
+    """
+    Bootstrap interval of the respondent mean of a per-combination value
+    
+    Args:
+        values: Value of every option combination (length 2**n_options), e.g. the
+            share of a quiz block answered correctly
+    """
+    level = CI_LEVEL if level is None else level
+    counts = combination_counts(codes, n_options)
+    if len(codes) == 0:
+        return 0.0, 0.0
+    present = np.flatnonzero(counts)
+    draws = bootstrap_counts(counts[present], resamples) @ np.asarray(values, dtype=float)[present]
+    low, high = _percentile_interval(draws / len(codes), level)
+    return low, high
+
+
+def ci_whisker_segments(positions, low, high, horizontal=True, cap=0.12):
+    """Line segments of capped whiskers spanning low..high at each position"""
+    segments = []
+    for pos, lo, hi in zip(positions, low, high):
+        if horizontal:
+            segments += [[(lo, pos), (hi, pos)], [(lo, pos - cap), (lo, pos + cap)],
+                         [(hi, pos - cap), (hi, pos + cap)]]
+        else:
+            segments += [[(pos, lo), (pos, hi)], [(pos - cap, lo), (pos + cap, lo)],
+                         [(pos - cap, hi), (pos + cap, hi)]]
+    return segments
+
+
+def draw_ci_whiskers(ax, positions, low, high, horizontal=True, cap=0.12):
+    """Add CI whiskers (in data units) to ax as one LineCollection, which templates
+    update with set_segments(ci_whisker_segments(...))"""
+    from matplotlib.collections import LineCollection
+    whiskers = LineCollection(ci_whisker_segments(positions, low, high, horizontal, cap), **CI_WHISKER_STYLE)
+    ax.add_collection(whiskers, autolim=False)
+    return whiskers
+
+
+def with_ci_columns(table, low, high):
+    """table with 'CI Low' / 'CI High' percentage columns"""
+    return table.assign(**{'CI Low': np.asarray(low), 'CI High': np.asarray(high)})
+
+
+# ============================================================================
+# Permutation Tests
+# ============================================================================
+
+# Group comparison charts (dumbbell, group radar, trust by education) can mark
+# the differences that hold up under a label permutation test
+SIGNIFICANCE_MARKERS = False
+SIGNIFICANCE_LEVELS = [(0.001, '***'), (0.01, '**'), (0.05, '*')]
+PERMUTATION_RESAMPLES = 10000
+PERMUTATION_SEED = 0
+PERMUTATION_SHARD = 2500                    # Permutations per shard (own seed; the unit handed to a worker)
+PERMUTATION_BATCH_CELLS = 2 ** 22           # Label matrix cells (permutations x respondents) per step
+PERMUTATION_WORKERS = None                  # Worker processes (default: CPU count; 1 runs in this process)
+PERMUTATION_PARALLEL_MIN_CELLS = 2 ** 27    # Smaller tests (permutations x respondents) run in this process
+OMNIBUS_CONTRAST = 'between groups'
+
+
+def _group_statistics(values, labels, sizes, pairs):
+    """
+    Contrast statistics of a batch of group labelings
+    
+    Args:
+        values: Respondents x variables
+        labels: Labelings x respondents group codes (0 .. len(sizes) - 1)
+        sizes: Respondents per group, which permutation does not change
+        pairs: (a, b) group code pairs
+    
+    Returns:
+        Labelings x (len(pairs) + 1) x variables: the mean difference of every
+        pair, then the between-group variance of the means (omnibus)
+    """
+    sums = [(labels == g).astype(values.dtype) @ values for g in range(len(sizes) - 1)]
+    sums = np.stack(sums + [values.sum(axis=0) - sum(sums)], axis=1)   # The last group is the rest
+    means = sums / sizes[:, None]
+    grand = values.mean(axis=0)
+    omnibus = (sizes[:, None] * (means - grand) ** 2).sum(axis=1) / sizes.sum()
+    a, b = np.asarray(pairs, dtype=int).reshape(-1, 2).T
+    return np.concatenate([means[:, a] - means[:, b], omnibus[:, None]], axis=1)
+
+
+def _permutation_shard(values, codes, sizes, pairs, observed, resamples, seed, batch_cells):
+    """Permutations (out of resamples) whose |statistic| reaches the observed one"""
+    rng = np.random.default_rng(seed)
+    batch = max(1, batch_cells // max(len(codes), 1))
+    threshold = np.abs(observed) * (1 - 1e-9)   # Ties (e.g. the identity labeling) count as reaching it
+    exceed = np.zeros(observed.shape, dtype=np.int64)
+    for start in range(0, resamples, batch):
+        labels = rng.permuted(np.tile(codes, (min(batch, resamples - start), 1)), axis=1)
+        exceed += (np.abs(_group_statistics(values, labels, sizes, pairs)) >= threshold).sum(axis=0)
+    return exceed
+
+
+def significance_marker(p_value):
+    """'***' / '**' / '*' (SIGNIFICANCE_LEVELS) or ''"""
+    for level, marker in SIGNIFICANCE_LEVELS:
+        if p_value <= level:
+            return marker
+    return ''
+
+
+def significance_note(resamples=None, test=None):
+    """Legend line for the markers, e.g. '* p≤.05  ** p≤.01  *** p≤.001 (permutation test, 10,000 shuffles)'"""
+    levels = '  '.join(f'{marker} p≤{str(level)[1:]}' for level, marker in reversed(SIGNIFICANCE_LEVELS))
+    return f'{levels} ({test or f"permutation test, {resamples or PERMUTATION_RESAMPLES:,} shuffles"})'
+
+
+def permutation_test(values, groups, resamples=None, seed=None, workers=None):
+    """
+    Label permutation test of the group differences of several variables at once
+    
+    Each step shuffles the group labels of a whole batch of permutations (a
+    permutations x respondents label matrix) and gets every variable x contrast
+    statistic of the batch from one matrix product per group. Permutations are
+    split into fixed shards of PERMUTATION_SHARD with their own seeds, so the
+    p-values do not depend on how many worker processes run the shards.
+    
+    Args:
+        values: DataFrame of the variables; rows with a missing value or group are dropped
+        groups: Group labels aligned with values
+        resamples: Permutations (default: PERMUTATION_RESAMPLES)
+        workers: Worker processes for large tests (default: PERMUTATION_WORKERS)
+    
+    Returns:
+        DataFrame with a row per variable and contrast: 'Variable', 'Contrast'
+        ('<a> - <b>' for each pair of observed_groups, then OMNIBUS_CONTRAST),
+        'Group A' / 'Group B' (None for the omnibus row), 'Statistic' (mean
+        difference; between-group variance of the means), 'p-value' (two-sided,
+        (1 + exceedances) / (1 + resamples)) and 'Marker'
+    """
+    import os
+    from itertools import combinations
+    
+    columns = ['Variable', 'Contrast', 'Group A', 'Group B', 'Statistic', 'p-value', 'Marker']
+    resamples = resamples or PERMUTATION_RESAMPLES
+    seed = PERMUTATION_SEED if seed is None else seed
+    complete = values.notna().all(axis=1) & groups.notna()
+    groups = groups[complete]
+    levels = observed_groups(groups)
+    if len(levels) < 2:
+        return pd.DataFrame(columns=columns)
+    data = values[complete].to_numpy(dtype=np.float64)
+    codes = pd.Categorical(groups, categories=levels).codes.astype(np.int8)
+    sizes = np.bincount(codes, minlength=len(levels)).astype(np.float64)
+    pairs = list(combinations(range(len(levels)), 2))
+    observed = _group_statistics(data, codes[None, :], sizes, pairs)[0]
+    
+    shards = [min(PERMUTATION_SHARD, resamples - start) for start in range(0, resamples, PERMUTATION_SHARD)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    jobs = [(data, codes, sizes, pairs, observed, size, shard_seed, PERMUTATION_BATCH_CELLS)
+            for size, shard_seed in zip(shards, seeds)]
+    workers = workers or PERMUTATION_WORKERS or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1 or resamples * len(codes) < PERMUTATION_PARALLEL_MIN_CELLS:
+        exceed = sum(_permutation_shard(*job) for job in jobs)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            exceed = sum(pool.map(_permutation_shard, *zip(*jobs)))
+    p_values = (1 + exceed) / (1 + resamples)
+    
+    contrasts = [(f'{levels[a]} - {levels[b]}', levels[a], levels[b]) for a, b in pairs]
+    contrasts.append((OMNIBUS_CONTRAST, None, None))
+    rows = [(var, *contrast, observed[k, j], p_values[k, j], significance_marker(p_values[k, j]))
+            for j, var in enumerate(values.columns) for k, contrast in enumerate(contrasts)]
+    # Object columns keep the group values as they are (no float upcast next to None)
+    return pd.DataFrame({name: pd.Series(column, dtype=object if name.startswith('Group') else None)
+                         for name, column in zip(columns, zip(*rows))})
+
+
+def labelled_tests(tests, var_labels, group_labels=None):
+    """tests with display names for the variables and, in the contrasts, the groups"""
+    group_labels = group_labels or {}
+    a = tests['Group A'].map(lambda group: group_labels.get(group, group))
+    b = tests['Group B'].map(lambda group: group_labels.get(group, group))
+    contrast = [OMNIBUS_CONTRAST if pd.isna(first) else f'{first} - {second}' for first, second in zip(a, b)]
+    return tests.assign(Variable=tests['Variable'].map(lambda var: var_labels.get(var, var)),
+                        Contrast=contrast, **{'Group A': a, 'Group B': b})
+
+
+def omnibus_markers(tests):
+    """Variable -> marker of the between-groups test"""
+    omnibus = tests[tests['Contrast'] == OMNIBUS_CONTRAST]
+    return dict(zip(omnibus['Variable'], omnibus['Marker']))
+
+
+# ============================================================================
+# Plotting Functions
+# ============================================================================
+
+@instrument_chart
+def plot_demographics(df, save_path, counts=None, n_total=None):
+    """Plot demographic characteristics (using modern donut charts + statistical info cards)
+    
+    counts: Optional precomputed {column: category counts} for 性别, 在学类别, 能源经历
+            and the 专业_* flags (e.g. from SurveyAggregates); df is then not read
+    n_total: Sample size when counts are given
+    """
+    if counts is None:
+        counts = {col: df[col].value_counts().sort_index()
+                  for col in ['性别', '在学类别', '能源经历', '专业_理工类', '专业_经管类', '专业_人文社科类']}
+        n_total = len(df)
+    n_total = n_total or int(counts['性别'].sum())
+    
+    # Log data
+    print(f"\n[Data Log] Data for Demographics:")
+    print("Gender Counts:")
+    print(counts['性别'])
+    print("Education Counts:")
+    print(counts['在学类别'])
+    print("Major Counts:")
+    print(f"STEM: {counts['专业_理工类'].get(1, 0)}, Econ & Mgmt: {counts['专业_经管类'].get(1, 0)}, "
+          f"Humanities: {counts['专业_人文社科类'].get(1, 0)}")
+    print("Energy Experience Counts:")
+    print(counts['能源经历'])
+
+    setup_style()
+    mark_phase('draw')
+    fig = plt.figure(figsize=(18, 8), facecolor='white')
+    
+    # Use GridSpec for fine layout
+    gs = fig.add_gridspec(2, 4, height_ratios=[3, 1], hspace=0.3, wspace=0.25)
+    
+    # Use unified color scheme
+    colors_gender = [UNIFIED_COLORS['male'], UNIFIED_COLORS['female']]
+    colors_edu = UNIFIED_COLORS['education']
+    colors_major = [UNIFIED_COLORS['primary'], UNIFIED_COLORS['secondary'], UNIFIED_COLORS['tertiary']]
+    
+    def draw_modern_donut(ax, data, labels, colors, title):
+        """Draw modern style donut chart"""
+        # Calculate percentages
+        total = sum(data)
+        explode = [0.02] * len(data)
+        
+        wedges, texts, autotexts = ax.pie(
+            data, labels=None, autopct='',
+            colors=colors, startangle=90, pctdistance=0.75,
+            wedgeprops=dict(width=0.5, edgecolor='white', linewidth=3),
+            explode=explode, shadow=False
+        )
+        
+        # Add total and title in center
+        ax.text(0, 0.1, f'{total}', ha='center', va='center', fontsize=28, 
+                fontweight='bold', color='#333333')
+        ax.text(0, -0.15, 'Sample', ha='center', va='center', fontsize=12, 
+                color='#666666')
+        ax.set_title(title, fontsize=14, fontweight='bold', pad=15, color='#333333')
+        
+        # Add external labels
+        for i, (wedge, label, value) in enumerate(zip(wedges, labels, data)):
+            ang = (wedge.theta2 - wedge.theta1) / 2. + wedge.theta1
+            x = np.cos(np.deg2rad(ang))
+            y = np.sin(np.deg2rad(ang))
+            
+            # Label position
+            label_x = x * 1.3
+            label_y = y * 1.3
+            
+            pct = value / total * 100
+            ax.annotate(f'{label}\n{value} ({pct:.1f}%)',
+                       xy=(x * 0.75, y * 0.75), xytext=(label_x, label_y),
+                       ha='center', va='center', fontsize=10,
+                       arrowprops=dict(arrowstyle='-', color='#CCCCCC', lw=1),
+                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', 
+                                edgecolor='#DDDDDD', alpha=0.9))
+        
+        return wedges
+
+    # 1. Gender Distribution
+    ax1 = fig.add_subplot(gs[0, 0])
+    gender_counts = counts['性别']
+    draw_modern_donut(ax1, gender_counts.values, CODEBOOK.labels('性别'), colors_gender, 'Gender Distribution')
+    add_panel_label(ax1, 'A')
+    
+    # 2. Education Distribution
+    ax2 = fig.add_subplot(gs[0, 1])
+    edu_counts = counts['在学类别']
+    edu_labels = CODEBOOK.labels('在学类别')
+    draw_modern_donut(ax2, edu_counts.values, edu_labels, colors_edu, 'Education Distribution')
+    add_panel_label(ax2, 'B')
+    
+    # 3. Major Distribution
+    ax3 = fig.add_subplot(gs[0, 2])
+    major_counts = [counts[col].get(1, 0) for col in ['专业_理工类', '专业_经管类', '专业_人文社科类']]
+    major_labels = ['STEM', 'Econ & Mgmt', 'Humanities']
+    draw_modern_donut(ax3, major_counts, major_labels, colors_major, 'Major Distribution')
+    add_panel_label(ax3, 'C')
+    
+    # 4. Energy Experience Statistics (Using beautified bar chart)
+    ax4 = fig.add_subplot(gs[0, 3])
+    exp_counts = counts['能源经历']
+    exp_labels = ['With Exp', 'No Exp']
+    exp_colors = [UNIFIED_COLORS['primary'], UNIFIED_COLORS['border']]
+    
+    bars = ax4.barh(exp_labels, exp_counts.values, color=exp_colors, 
+                    edgecolor='white', linewidth=2, height=0.6)
+    
+    # Add value labels (after the CI whiskers, when shown)
+    label_ends = exp_counts.values
+    if CI_WHISKERS:
+        exp_low, exp_high = share_ci(exp_counts.values, n_total)
+        draw_ci_whiskers(ax4, [bar.get_y() + bar.get_height()/2 for bar in bars],
+                         exp_low * n_total / 100, exp_high * n_total / 100)
+        label_ends = exp_high * n_total / 100
+    for bar, val, end in zip(bars, exp_counts.values, label_ends):
+        ax4.text(end + 1, bar.get_y() + bar.get_height()/2, 
+                f'{val} ({val/n_total*100:.1f}%)', 
                 va='center', fontsize=11, fontweight='bold', color='#333333')
     
-    ax4.set_xlim(0, max(exp_counts.values) * 1.3)
+    ax4.set_xlim(0, max(label_ends) * 1.3)
     ax4.set_title('Energy Related Experience', fontsize=14, fontweight='bold', color='#333333')
     ax4.spines['top'].set_visible(False)
     ax4.spines['right'].set_visible(False)
@@ -311,12 +2132,11 @@ def plot_demographics(df, save_path):
     ax_summary.axis('off')
     
     # Create summary text
-    n_total = len(df)
-    male_pct = df['性别'].value_counts().get(1, 0) / n_total * 100
+    male_pct = gender_counts.get(1, 0) / n_total * 100
     grad_pct = (edu_counts.get(2, 0) + edu_counts.get(3, 0)) / n_total * 100
-    stem_pct = df['专业_理工类'].sum() / n_total * 100
+    stem_pct = major_counts[0] / n_total * 100
     
-    summary_text = (
+    summary_text = symbol_text(
         f"📊 Sample Overview: Total {n_total} Respondents | "
         f"👨‍🎓 Male {male_pct:.1f}% | "
         f"🎓 Graduate {grad_pct:.1f}% | "
@@ -330,9 +2150,18 @@ def plot_demographics(df, save_path):
     
     plt.suptitle('Figure 1: Sample Demographics Overview', fontsize=20, fontweight='bold', 
                 y=0.98, color='#1A1A1A')
+    emit_data_bundle(save_path, 'demographics', {
+        'gender': counts_table(gender_counts.values, ['Male', 'Female'], n_total),
+        'education': counts_table(edu_counts.values, edu_labels, n_total),
+        'major': counts_table(major_counts, major_labels, n_total),
+        'energy_experience': (with_ci_columns(counts_table(exp_counts.values, exp_labels, n_total),
+                                              exp_low, exp_high)
+                              if CI_WHISKERS else counts_table(exp_counts.values, exp_labels, n_total)),
+    }, n=n_total)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_knowledge_level(df, save_path):
     """Energy Knowledge Level Comparison (Using gradient bar chart + distribution violin plot)"""
     # Log data
@@ -344,11 +2173,12 @@ def plot_knowledge_level(df, save_path):
 
     setup_style()
     
+    mark_phase('draw')
     fig = plt.figure(figsize=(16, 11), facecolor='white')
     gs = fig.add_gridspec(2, 2, height_ratios=[1.3, 1], hspace=0.30, wspace=0.25)
     
     # Data Preparation
-    levels = ['Very Familiar', 'Familiar', 'Neutral', 'Unfamiliar', 'Very Unfamiliar']
+    levels = CODEBOOK.labels('能源转型了解度')
     
     # Convert to long format
     data_energy = df['能源转型了解度'].value_counts().reindex(range(1, 6), fill_value=0).reset_index()
@@ -418,15 +2248,16 @@ def plot_knowledge_level(df, save_path):
     # Prepare grouped data
     violin_data = pd.DataFrame({
         'Familiarity': df['能源转型了解度'],
-        'Education': df['在学类别'].map({1: 'Undergraduate', 2: 'Master', 3: 'PhD'})
+        'Education': CODEBOOK.label_series(df, '在学类别').astype(object)
     })
     
     # Use same color family gradient - cool colors
     violin_colors = UNIFIED_COLORS['gradient_cool']
     
-    vp1 = sns.violinplot(data=violin_data, x='Education', y='Familiarity', 
-                        palette=violin_colors, ax=ax2, inner='box', 
-                        linewidth=1.5, order=['Undergraduate', 'Master', 'PhD'],
+    vp1 = sns.violinplot(data=violin_data, x='Education', y='Familiarity', hue='Education',
+                        dodge=False, legend=False, palette=dict(zip(CODEBOOK.labels('在学类别'), violin_colors)),
+                        ax=ax2, inner='box', 
+                        linewidth=1.5, order=CODEBOOK.labels('在学类别'),
                         saturation=0.9)
     
     # Beautify violin plot internal box lines
@@ -449,15 +2280,16 @@ def plot_knowledge_level(df, save_path):
     
     violin_data2 = pd.DataFrame({
         'Familiarity': df['双碳了解度'],
-        'Education': df['在学类别'].map({1: 'Undergraduate', 2: 'Master', 3: 'PhD'})
+        'Education': CODEBOOK.label_series(df, '在学类别').astype(object)
     })
     
     # Use warm color gradient
     violin_colors2 = UNIFIED_COLORS['gradient_warm']
     
-    vp2 = sns.violinplot(data=violin_data2, x='Education', y='Familiarity',
-                        palette=violin_colors2, ax=ax3, inner='box', 
-                        linewidth=1.5, order=['Undergraduate', 'Master', 'PhD'],
+    vp2 = sns.violinplot(data=violin_data2, x='Education', y='Familiarity', hue='Education',
+                        dodge=False, legend=False, palette=dict(zip(CODEBOOK.labels('在学类别'), violin_colors2)),
+                        ax=ax3, inner='box', 
+                        linewidth=1.5, order=CODEBOOK.labels('在学类别'),
                         saturation=0.9)
     
     for collection in ax3.collections:
@@ -476,20 +2308,30 @@ def plot_knowledge_level(df, save_path):
     
     plt.suptitle('Figure 2: Comprehensive Analysis of Energy Knowledge Levels', fontsize=20, fontweight='bold', 
                 y=0.98, color='#1A1A1A')
+    by_education = pd.DataFrame({
+        'Education': violin_data['Education'],
+        'Energy Transition': violin_data['Familiarity'],
+        'Dual Carbon Goals': violin_data2['Familiarity'],
+    }).groupby('Education').mean().reindex(CODEBOOK.labels('在学类别')).reset_index()
+    emit_data_bundle(save_path, 'knowledge_level', {
+        'counts': plot_data[['Type', 'Level', 'Level_Label', 'Count']],
+        'mean_by_education': by_education,
+    }, n=len(df))
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_renewable_recognition(df, save_path):
     """Renewable Energy Recognition Analysis (Lollipop Chart + Accuracy Donut Chart)"""
     # Log data
     print(f"\n[Data Log] Data for Renewable Recognition:")
-    cols = ['可再生_太阳能', '可再生_风能', '可再生_水能', '可再生_生物质能', '可再生_石油', '可再生_煤炭', '可再生_天然气', '可再生_核能']
+    totals = multi_select_totals(df, 'renewable')
     print("Counts for each energy type:")
-    for col in cols:
-        if col in df.columns:
-            print(f"{col}: {df[col].sum()}")
+    for col, count in totals.items():
+        print(f"{col}: {count}")
 
     setup_style()
+    mark_phase('draw')
     fig = plt.figure(figsize=(16, 9), facecolor='white')
     gs = fig.add_gridspec(1, 2, width_ratios=[1.5, 1], wspace=0.25)
     
@@ -508,20 +2350,23 @@ def plot_renewable_recognition(df, save_path):
     
     for label, col in correct_items.items():
         items.append(label)
-        counts.append(df[col].sum())
+        counts.append(totals[col])
         categories.append('✓ Correct (Renewable)')
         
     for label, col in wrong_items.items():
         items.append(label)
-        counts.append(df[col].sum())
+        counts.append(totals[col])
         categories.append('✗ Incorrect (Non-Renewable)')
         
     items.append('Nuclear')
-    counts.append(df['可再生_核能'].sum())
+    counts.append(totals['可再生_核能'])
     categories.append('? Controversial Option')
     
     # Create DataFrame and sort
     plot_df = pd.DataFrame({'Item': items, 'Count': counts, 'Category': categories})
+    if CI_WHISKERS:
+        # Items are listed in the renewable block's option order
+        plot_df = with_ci_columns(plot_df, *option_share_ci(multi_select_codes(df, 'renewable'), len(items)))
     plot_df = plot_df.sort_values('Count', ascending=True)
     
     # Color mapping - use unified color scheme
@@ -547,15 +2392,20 @@ def plot_renewable_recognition(df, save_path):
     ax1.set_yticks(y_pos)
     ax1.set_yticklabels(plot_df['Item'], fontsize=12)
     
-    # Add value labels
-    for i, (count, cat) in enumerate(zip(plot_df['Count'], plot_df['Category'])):
+    # Add value labels (after the CI whiskers, when shown)
+    label_ends = plot_df['Count'].to_numpy()
+    if CI_WHISKERS:
+        ci_counts = plot_df[['CI Low', 'CI High']].to_numpy() * len(df) / 100
+        draw_ci_whiskers(ax1, y_pos, ci_counts[:, 0], ci_counts[:, 1])
+        label_ends = ci_counts[:, 1]
+    for i, (count, end) in enumerate(zip(plot_df['Count'], label_ends)):
         pct = count / len(df) * 100
-        ax1.text(count + 2, i, f'{count} ({pct:.1f}%)', 
+        ax1.text(end + 2, i, f'{count} ({pct:.1f}%)', 
                 va='center', fontsize=11, fontweight='bold', color='#333333')
     
     ax1.set_xlabel('Count', fontsize=13, fontweight='bold')
     ax1.set_title('Recognition of Energy Types', fontsize=14, fontweight='bold', pad=15)
-    ax1.set_xlim(0, max(counts) * 1.25)
+    ax1.set_xlim(0, max(label_ends) * 1.25)
     
     # Custom legend - use unified color scheme
     legend_elements = [
@@ -577,12 +2427,12 @@ def plot_renewable_recognition(df, save_path):
     # Calculate recognition accuracy
     n_total = len(df)
     # Proportion of correctly identified renewable energy
-    correct_renewable = (df['可再生_太阳能'].sum() + df['可再生_风能'].sum() + 
-                        df['可再生_水能'].sum() + df['可再生_生物质能'].sum()) / (4 * n_total) * 100
+    correct_renewable = (totals['可再生_太阳能'] + totals['可再生_风能'] + 
+                        totals['可再生_水能'] + totals['可再生_生物质能']) / (4 * n_total) * 100
     # Proportion of correctly identified non-renewable (i.e., not selected)
-    correct_nonrenewable = ((n_total - df['可再生_石油'].sum()) + 
-                           (n_total - df['可再生_煤炭'].sum()) + 
-                           (n_total - df['可再生_天然气'].sum())) / (3 * n_total) * 100
+    correct_nonrenewable = ((n_total - totals['可再生_石油']) + 
+                           (n_total - totals['可再生_煤炭']) + 
+                           (n_total - totals['可再生_天然气'])) / (3 * n_total) * 100
     
     # Double donut chart
     sizes_outer = [correct_renewable, 100 - correct_renewable]
@@ -605,6 +2455,13 @@ def plot_renewable_recognition(df, save_path):
     ax2.text(0, 0.05, f'{(correct_renewable + correct_nonrenewable)/2:.1f}%', 
             ha='center', va='center', fontsize=24, fontweight='bold', color='#333333')
     ax2.text(0, -0.12, 'Overall Accuracy', ha='center', va='center', fontsize=11, color='#666666')
+    if CI_WHISKERS:
+        # Per respondent: share of the 4 renewables selected and 3 fossil fuels left out
+        bits = (np.arange(1 << len(items))[:, None] >> np.arange(len(items))) & 1
+        accuracy = (bits[:, :4].sum(axis=1) / 4 + (3 - bits[:, 4:7].sum(axis=1)) / 3) / 2 * 100
+        accuracy_ci = combination_mean_ci(multi_select_codes(df, 'renewable'), len(items), accuracy)
+        ax2.text(0, -0.26, f'{CI_LEVEL:.0%} CI {accuracy_ci[0]:.1f}-{accuracy_ci[1]:.1f}%',
+                 ha='center', va='center', fontsize=9, color='#666666')
     
     ax2.set_title('Recognition Accuracy Statistics', fontsize=14, fontweight='bold', pad=15)
     
@@ -619,361 +2476,686 @@ def plot_renewable_recognition(df, save_path):
     
     plt.suptitle('Figure 3: Renewable Energy Recognition Accuracy Analysis', fontsize=20, fontweight='bold', 
                 y=0.98, color='#1A1A1A')
+    emit_data_bundle(save_path, 'renewable_recognition', {
+        'recognition': plot_df.assign(Percent=plot_df['Count'] / n_total * 100),
+        'accuracy': pd.DataFrame({
+            'Measure': ['Renewable', 'Non-Renewable', 'Overall'],
+            'Percent': [correct_renewable, correct_nonrenewable,
+                        (correct_renewable + correct_nonrenewable) / 2],
+            **({'CI Low': [np.nan, np.nan, accuracy_ci[0]], 'CI High': [np.nan, np.nan, accuracy_ci[1]]}
+               if CI_WHISKERS else {}),
+        }),
+    }, n=n_total)
     save_fig(fig, save_path)
 
 
-def plot_trust_radar(df, save_path):
-    """Trust Radar Chart (Modern Style + Comparative Analysis)"""
-    # Log data
-    print(f"\n[Data Log] Data for Trust Radar:")
-    cols = ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '激励政策认同度', '限油推新支持度']
-    print("Raw Means:")
-    print(df[cols].mean())
-    print("Transformed Means (6 - mean):")
-    print(6 - df[cols].mean())
-
-    setup_style()
-    
-    fig = plt.figure(figsize=(16, 8), facecolor='white')
-    gs = fig.add_gridspec(1, 2, width_ratios=[1.2, 1], wspace=0.3)
-    
-    # ===== Left: Radar Chart =====
-    ax1 = fig.add_subplot(gs[0], projection='polar')
+class TrustRadarTemplate:
+    """
+    Reusable Trust Radar figure (see plot_trust_radar)
     
-    # Data Preparation
-    categories = ['Tech Maturity\nTrust', 'NEV Tech\nTrust', 'Policy Exec\nTrust', 'Incentive Policy\nAgreement', 'Limit Oil/Promote New\nSupport']
+    Gridspec, axes, ticks, background rings, legend and titles are built once;
+    render() only updates the data-bearing artists (radar polygon, bar heights,
+    value labels) before saving, so drawing the chart per campus or per month
+    does not rebuild the figure. The layout is measured on the first render.
+    Call close() when done.
+    """
     cols = ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '激励政策认同度', '限油推新支持度']
+    measures = {'Tech Trust': cols[:3], 'Policy Agreement': cols[3:]}   # Bar composites
+    categories = ['Tech Maturity\nTrust', 'NEV Tech\nTrust', 'Policy Exec\nTrust', 'Incentive Policy\nAgreement', 'Limit Oil/Promote New\nSupport']
+    edu_labels = CODEBOOK.labels('在学类别')
     
-    # Convert to positive score (6-x)
-    values = [6 - df[col].mean() for col in cols]
-    values += values[:1]  # Close the loop
-    
-    angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False).tolist()
-    angles += angles[:1]
-    
-    # Set radar chart direction
-    ax1.set_theta_offset(np.pi / 2)
-    ax1.set_theta_direction(-1)
-    
-    # Draw grid background (gradient effect)
-    for i, alpha in zip([5, 4, 3, 2, 1], [0.1, 0.15, 0.2, 0.25, 0.3]):
-        circle = plt.Circle((0, 0), i, transform=ax1.transData._b, 
-                           color=UNIFIED_COLORS['primary'], alpha=alpha * 0.3, zorder=0)
-        ax1.add_artist(circle)
-    
-    # Set category labels
-    ax1.set_xticks(angles[:-1])
-    ax1.set_xticklabels(categories, fontsize=11, fontweight='bold', color='#333333')
-    
-    # Set Y-axis
-    ax1.set_rlabel_position(30)
-    ax1.set_yticks([1, 2, 3, 4, 5])
-    ax1.set_yticklabels(['1', '2', '3', '4', '5'], color='#666666', size=9)
-    ax1.set_ylim(0, 5.5)
-    
-    # Draw data area (gradient fill)
-    ax1.plot(angles, values, linewidth=3, linestyle='solid', color=UNIFIED_COLORS['primary'], 
-             marker='o', markersize=10, markerfacecolor='white', markeredgewidth=2)
-    ax1.fill(angles, values, color=UNIFIED_COLORS['primary'], alpha=0.25)
-    
-    # Add value labels
-    for angle, val, cat in zip(angles[:-1], values[:-1], categories):
-        label_angle = angle
-        x = (val + 0.6) * np.cos(np.pi/2 - label_angle)
-        y = (val + 0.6) * np.sin(np.pi/2 - label_angle)
-        ax1.annotate(f'{val:.2f}', xy=(label_angle, val), 
-                    fontsize=11, fontweight='bold', color=UNIFIED_COLORS['primary'],
-                    ha='center', va='center',
-                    bbox=dict(boxstyle='round,pad=0.2', facecolor='white', 
-                             edgecolor=UNIFIED_COLORS['primary'], alpha=0.9))
-    
-    ax1.set_title('Public Trust and Policy Agreement Dimensions', fontsize=14, fontweight='bold', pad=20)
-    
-    # ===== Right: Grouped Comparison Bar Chart =====
-    ax2 = fig.add_subplot(gs[1])
-    
-    # Calculate average trust by education
-    trust_by_edu = []
-    edu_labels = ['Undergraduate', 'Master', 'PhD']
-    
-    for edu_code, edu_label in zip([1, 2, 3], edu_labels):
-        edu_df = df[df['在学类别'] == edu_code]
-        avg_trust = np.mean([6 - edu_df[col].mean() for col in cols[:3]])  # First three are trust related
-        avg_policy = np.mean([6 - edu_df[col].mean() for col in cols[3:]])  # Last two are policy related
-        trust_by_edu.append({
-            'Education': edu_label,
-            'Tech Trust Mean': avg_trust,
-            'Policy Agreement Mean': avg_policy
-        })
-    
-    trust_df = pd.DataFrame(trust_by_edu)
-    
-    x = np.arange(len(edu_labels))
-    width = 0.35
-    
-    bars1 = ax2.bar(x - width/2, trust_df['Tech Trust Mean'], width, 
-                   label='Tech Trust', color=UNIFIED_COLORS['primary'], edgecolor='white', linewidth=2)
-    bars2 = ax2.bar(x + width/2, trust_df['Policy Agreement Mean'], width,
-                   label='Policy Agreement', color=UNIFIED_COLORS['secondary'], edgecolor='white', linewidth=2)
+    def __init__(self):
+        setup_style()
+        
+        self.fig = fig = plt.figure(figsize=(16, 8), facecolor='white')
+        gs = fig.add_gridspec(1, 2, width_ratios=[1.2, 1], wspace=0.3)
+        self._laid_out = False
+        
+        # ===== Left: Radar Chart =====
+        ax1 = fig.add_subplot(gs[0], projection='polar')
+        
+        self.angles = angles = np.linspace(0, 2 * np.pi, len(self.categories), endpoint=False).tolist()
+        angles += angles[:1]
+        placeholder = [0.0] * len(angles)
+        
+        # Set radar chart direction
+        ax1.set_theta_offset(np.pi / 2)
+        ax1.set_theta_direction(-1)
+        
+        # Draw grid background (gradient effect)
+        for i, alpha in zip([5, 4, 3, 2, 1], [0.1, 0.15, 0.2, 0.25, 0.3]):
+            circle = plt.Circle((0, 0), i, transform=ax1.transData._b, 
+                               color=UNIFIED_COLORS['primary'], alpha=alpha * 0.3, zorder=0)
+            ax1.add_artist(circle)
+        
+        # Set category labels
+        ax1.set_xticks(angles[:-1])
+        ax1.set_xticklabels(self.categories, fontsize=11, fontweight='bold', color='#333333')
+        
+        # Set Y-axis
+        ax1.set_rlabel_position(30)
+        ax1.set_yticks([1, 2, 3, 4, 5])
+        ax1.set_yticklabels(['1', '2', '3', '4', '5'], color='#666666', size=9)
+        ax1.set_ylim(0, 5.5)
+        
+        # Data area (gradient fill); values are set by update()
+        self.radar_line, = ax1.plot(angles, placeholder, linewidth=3, linestyle='solid', color=UNIFIED_COLORS['primary'], 
+                                    marker='o', markersize=10, markerfacecolor='white', markeredgewidth=2)
+        self.radar_fill, = ax1.fill(angles, placeholder, color=UNIFIED_COLORS['primary'], alpha=0.25)
+        
+        # Value labels, moved off the vertex markers outward (placed on every draw)
+        self.placer = LabelPlacer(ax1)
+        self.placer.add_obstacle_points(self.radar_line, radius=6)
+        self.radar_labels = [
+            ax1.annotate('', xy=(angle, 0), xytext=(0, 0), textcoords='offset points',
+                        fontsize=11, fontweight='bold', color=UNIFIED_COLORS['primary'],
+                        ha='center', va='center',
+                        bbox=dict(boxstyle='round,pad=0.2', facecolor='white', 
+                                 edgecolor=UNIFIED_COLORS['primary'], alpha=0.9))
+            for angle in angles[:-1]
+        ]
+        for label, angle in zip(self.radar_labels, angles[:-1]):
+            self.placer.add(label, offsets=radial_offsets(np.pi / 2 - angle), required=True)
+        
+        ax1.set_title('Public Trust and Policy Agreement Dimensions', fontsize=14, fontweight='bold', pad=20)
+        
+        # ===== Right: Grouped Comparison Bar Chart =====
+        ax2 = fig.add_subplot(gs[1])
+        
+        x = np.arange(len(self.edu_labels))
+        width = 0.35
+        zeros = np.zeros(len(x))
+        
+        self.bars = (
+            ax2.bar(x - width/2, zeros, width, 
+                    label='Tech Trust', color=UNIFIED_COLORS['primary'], edgecolor='white', linewidth=2),
+            ax2.bar(x + width/2, zeros, width,
+                    label='Policy Agreement', color=UNIFIED_COLORS['secondary'], edgecolor='white', linewidth=2),
+        )
+        self.bar_labels = [
+            [ax2.annotate('', xy=(bar.get_x() + bar.get_width() / 2, 0),
+                          ha='center', va='bottom', fontsize=10, fontweight='bold') for bar in bars]
+            for bars in self.bars
+        ]
+        
+        ax2.set_ylabel('Trust/Agreement Level (1-5)', fontsize=12, fontweight='bold')
+        ax2.set_xlabel('Education Level', fontsize=12, fontweight='bold')
+        ax2.set_title('Trust Level Comparison by Education', fontsize=14, fontweight='bold', pad=15)
+        ax2.set_xticks(x)
+        ax2.set_xticklabels(self.edu_labels)
+        ax2.set_ylim(0, 5)
+        self.legend = ax2.legend(loc='upper right', framealpha=0.95)
+        self.significance_text = None
+        if SIGNIFICANCE_MARKERS:
+            self.significance_text = ax2.annotate(significance_note(), xy=(0.5, 0), xycoords='axes fraction',
+                                                  xytext=(0, -48), textcoords='offset points', ha='center',
+                                                  va='top', fontsize=10, color='#666666', style='italic')
+        
+        sns.despine(ax=ax2)
+        ax2.grid(axis='y', alpha=0.3, linestyle='--')
+        add_panel_label(ax2, 'B', x=0.02)
+        
+        plt.suptitle('Figure 4: Analysis of Public Trust and Policy Agreement Dimensions', fontsize=20, fontweight='bold', 
+                    y=0.98, color='#1A1A1A')
     
-    # Add value labels
-    for bar in bars1:
-        height = bar.get_height()
-        ax2.annotate(f'{height:.2f}', xy=(bar.get_x() + bar.get_width() / 2, height),
-                    ha='center', va='bottom', fontsize=10, fontweight='bold')
-    
-    for bar in bars2:
-        height = bar.get_height()
-        ax2.annotate(f'{height:.2f}', xy=(bar.get_x() + bar.get_width() / 2, height),
-                    ha='center', va='bottom', fontsize=10, fontweight='bold')
-    
-    ax2.set_ylabel('Trust/Agreement Level (1-5)', fontsize=12, fontweight='bold')
-    ax2.set_xlabel('Education Level', fontsize=12, fontweight='bold')
-    ax2.set_title('Trust Level Comparison by Education', fontsize=14, fontweight='bold', pad=15)
-    ax2.set_xticks(x)
-    ax2.set_xticklabels(edu_labels)
-    ax2.set_ylim(0, 5)
-    ax2.legend(loc='upper right', framealpha=0.95)
+    def update(self, means, means_by_education, markers=None):
+        """
+        Set the data-bearing artists from raw item means
+        
+        markers: Optional significance marker of the education effect per measure
+        
+        Returns:
+            (radar values, per-education trust table)
+        """
+        mark_phase('draw')
+        cols = self.cols
+        
+        # Positive scores (higher = more trust)
+        values = list(CODEBOOK.to_positive(means[cols]))
+        values += values[:1]  # Close the loop
+        self.radar_line.set_data(self.angles, values)
+        self.radar_fill.set_xy(np.column_stack([self.angles, values]))
+        for label, angle, val in zip(self.radar_labels, self.angles[:-1], values[:-1]):
+            self.placer.set_home(label, (angle, val))
+            label.set_text(f'{val:.2f}')
+        
+        # Calculate average trust by education
+        trust_by_edu = []
+        positive_by_education = CODEBOOK.to_positive(means_by_education[cols])
+        for edu_code, edu_label in zip([1, 2, 3], self.edu_labels):
+            edu_means = positive_by_education.loc[edu_code]
+            avg_trust = np.mean([edu_means[col] for col in self.measures['Tech Trust']])
+            avg_policy = np.mean([edu_means[col] for col in self.measures['Policy Agreement']])
+            trust_by_edu.append({
+                'Education': edu_label,
+                'Tech Trust Mean': avg_trust,
+                'Policy Agreement Mean': avg_policy
+            })
+        trust_df = pd.DataFrame(trust_by_edu)
+        
+        for bars, labels, column in zip(self.bars, self.bar_labels, ['Tech Trust Mean', 'Policy Agreement Mean']):
+            for bar, label, height in zip(bars, labels, trust_df[column]):
+                bar.set_height(height)
+                label.xy = label.xyann = (bar.get_x() + bar.get_width() / 2, height)
+                label.set_text(f'{height:.2f}')
+        if self.significance_text is not None:
+            # Precomputed means cannot be tested: no markers then
+            for text, measure in zip(self.legend.get_texts(), self.measures):
+                text.set_text(f'{measure} {(markers or {}).get(measure, "")}'.strip())
+            self.significance_text.set_visible(markers is not None)
+        return values, trust_df
+    
+    def render(self, df, save_path, means=None, means_by_education=None, n_total=None):
+        """Draw the chart for df (or precomputed means) and save it; arguments as plot_trust_radar"""
+        mark_phase('prep')
+        cols = self.cols
+        tests = None
+        if means is None:
+            means = df[cols].mean()
+            means_by_education = df.groupby('在学类别')[cols].mean().reindex([1, 2, 3])
+            n_total = len(df)
+            if self.significance_text is not None:
+                # Respondent-level composites of the positive item scores, tested across education
+                positive = pd.DataFrame({col: CODEBOOK.positive_series(df, col) for col in cols})
+                composites = pd.DataFrame({measure: positive[items].mean(axis=1, skipna=False)
+                                           for measure, items in self.measures.items()})
+                tests = permutation_test(composites, df['在学类别'])
+        
+        # Log data
+        print(f"\n[Data Log] Data for Trust Radar:")
+        print("Raw Means:")
+        print(means)
+        print("Positive-scale Means:")
+        print(CODEBOOK.to_positive(means))
+        if tests is not None:
+            print("Permutation Tests by Education:")
+            print(tests)
+        
+        values, trust_df = self.update(means, means_by_education,
+                                       omnibus_markers(tests) if tests is not None else None)
+        tables = {
+            'dimensions': pd.DataFrame({'Dimension': [c.replace('\n', ' ') for c in self.categories],
+                                        'Score': values[:-1]}),
+            'by_education': trust_df,
+        }
+        if tests is not None:
+            tables['tests'] = labelled_tests(tests, {}, dict(zip([1, 2, 3], self.edu_labels)))
+        emit_data_bundle(save_path, 'trust_radar', tables, n=n_total, scale='1-5, higher = more trust')
+        paths = save_fig(self.fig, save_path, close=False, relayout=not self._laid_out,
+                         layout_key=type(self).__name__)
+        self._laid_out = True
+        return paths
+    
+    def close(self):
+        plt.close(self.fig)
+
+
+@instrument_chart
+def plot_trust_radar(df, save_path, means=None, means_by_education=None, n_total=None):
+    """Trust Radar Chart (Modern Style + Comparative Analysis)
     
-    sns.despine(ax=ax2)
-    ax2.grid(axis='y', alpha=0.3, linestyle='--')
-    add_panel_label(ax2, 'B', x=0.02)
+    means, means_by_education: Optional precomputed raw item means (Series over the
+        five trust items; DataFrame indexed by 在学类别 code 1-3), e.g. from
+        SurveyAggregates; df is then not read
+    n_total: Sample size when means are given
     
-    plt.suptitle('Figure 4: Analysis of Public Trust and Policy Agreement Dimensions', fontsize=20, fontweight='bold', 
-                y=0.98, color='#1A1A1A')
-    save_fig(fig, save_path)
+    For many subsets, reuse one TrustRadarTemplate instead.
+    """
+    mark_phase('draw')
+    template = TrustRadarTemplate()
+    try:
+        return template.render(df, save_path, means, means_by_education, n_total)
+    finally:
+        template.close()
 
 
-def plot_nev_analysis(df, save_path):
-    """Comprehensive Analysis of New Energy Vehicles (Multi-chart Composition)"""
-    # Log data
-    print(f"\n[Data Log] Data for NEV Analysis:")
-    print("Purchase Intention Counts:")
-    print(df['5年内购车意愿'].value_counts().sort_index())
-    print("Car Type Preference Counts:")
-    print(df['购车类型偏好'].value_counts().sort_index())
-    print("NEV Impression Counts:")
-    print(df['新能源汽车印象'].value_counts().sort_index())
-    
+class NevAnalysisTemplate:
+    """
+    Reusable NEV analysis figure (see plot_nev_analysis)
+    
+    As TrustRadarTemplate: the five panels are built once and render() only
+    updates wedge angles, bar lengths, lollipop positions, sorted tick labels and
+    value texts. Categorical answers are counted over the full code range (1-5),
+    so every variant has the same artists even when a subset lacks a category.
+    With CI_WHISKERS (read when the template is built) the car type, factor and
+    pain point panels also get CI whiskers.
+    """
+    intention_labels = CODEBOOK.labels('5年内购车意愿')
+    car_labels = CODEBOOK.labels('购车类型偏好')
+    imp_labels = CODEBOOK.labels('新能源汽车印象')
     factor_cols = ['因素_成本', '因素_环保', '因素_技术', '因素_续航', 
                    '因素_充电', '因素_性能', '因素_政策', '因素_品牌']
-    print("Influencing Factors Counts:")
-    for col in factor_cols:
-        if col in df.columns:
-            print(f"{col}: {df[col].sum()}")
-            
+    factor_names = ['Cost', 'Environmental', 'Tech Reliability', 'Range', 
+                    'Charging Convenience', 'Performance', 'Policy Support', 'Brand Reputation']
     problem_cols = ['问题_续航', '问题_充电设施', '问题_电池', '问题_价格', 
-                   '问题_安全', '问题_维修']
-    print("Pain Points Counts:")
-    for col in problem_cols:
-        if col in df.columns:
-            print(f"{col}: {df[col].sum()}")
-
-    setup_style()
-    fig = plt.figure(figsize=(18, 12), facecolor='white')
-    
-    # Use complex GridSpec layout
-    gs = fig.add_gridspec(2, 3, height_ratios=[1, 1.2], hspace=0.35, wspace=0.3)
-    
-    # ===== Top Left: Purchase Intention Donut Chart =====
-    ax1 = fig.add_subplot(gs[0, 0])
-    
-    intention_counts = df['5年内购车意愿'].value_counts().sort_index()
-    labels = ['Very Likely', 'Likely', 'Uncertain', 'Unlikely', 'Very Unlikely']
-    
-    # Use gradient colors (Green to Red)
-    colors = [UNIFIED_COLORS['positive'], UNIFIED_COLORS['quaternary'], 
-              UNIFIED_COLORS['neutral'], UNIFIED_COLORS['secondary'], UNIFIED_COLORS['negative']]
-    
-    # Calculate positive intention ratio
-    positive_ratio = (intention_counts.get(1, 0) + intention_counts.get(2, 0)) / len(df) * 100
-    
-    wedges, texts, autotexts = ax1.pie(
-        intention_counts.values, labels=None, autopct='%1.1f%%',
-        colors=colors, startangle=90, pctdistance=0.75,
-        wedgeprops=dict(width=0.45, edgecolor='white', linewidth=2.5),
-        textprops={'fontsize': 9, 'fontweight': 'bold', 'color': 'white'}
-    )
-    
-    # Center text
-    ax1.text(0, 0.08, f'{positive_ratio:.0f}%', ha='center', va='center', 
-            fontsize=22, fontweight='bold', color=UNIFIED_COLORS['positive'])
-    ax1.text(0, -0.12, 'Intend to Buy', ha='center', va='center', fontsize=10, color='#666666')
-    
-    ax1.set_title('Purchase Intention in 5 Years', fontsize=13, fontweight='bold', pad=10)
-    
-    # Add legend
-    ax1.legend(wedges, labels, loc='center left', bbox_to_anchor=(0.9, 0.5),
-              fontsize=9, frameon=True, framealpha=0.95)
-    add_panel_label(ax1, 'A')
-    
-    # ===== Top Middle: Car Type Preference =====
-    ax2 = fig.add_subplot(gs[0, 1])
-    
-    car_pref = df['购车类型偏好'].value_counts().sort_index()
-    car_labels = ['BEV', 'PHEV', 'ICEV', 'FCEV', 'No Plan']
-    car_colors = get_unified_palette(5)
-    
-    # Draw beautified bar chart
-    bars = ax2.barh(range(len(car_pref)), car_pref.values, color=car_colors[:len(car_pref)],
-                   edgecolor='white', linewidth=2, height=0.65)
-    
-    ax2.set_yticks(range(len(car_pref)))
-    ax2.set_yticklabels(car_labels[:len(car_pref)], fontsize=10)
-    
-    # Add values
-    for i, (bar, val) in enumerate(zip(bars, car_pref.values)):
-        pct = val / len(df) * 100
-        ax2.text(val + 1, i, f'{val} ({pct:.1f}%)', va='center', fontsize=10, fontweight='bold')
-    
-    ax2.set_xlim(0, max(car_pref.values) * 1.35)
-    ax2.set_title('Car Type Preference Distribution', fontsize=13, fontweight='bold', pad=10)
-    sns.despine(ax=ax2, left=True)
-    ax2.tick_params(left=False)
-    ax2.grid(axis='x', alpha=0.3, linestyle='--')
-    add_panel_label(ax2, 'B')
-    
-    # ===== Top Right: Overall Impression of NEVs =====
-    ax3 = fig.add_subplot(gs[0, 2])
+                    '问题_安全', '问题_维修']
+    problem_names = ['Insufficient Range', 'Charging Facilities', 'Battery Issues', 'High Price', 
+                     'Safety Concerns', 'Maintenance Cost']
     
-    impression = df['新能源汽车印象'].value_counts().sort_index()
-    imp_labels = ['Very Positive', 'Positive', 'Neutral', 'Negative', 'Very Negative']
-    imp_colors = [UNIFIED_COLORS['positive'], UNIFIED_COLORS['quaternary'], 
+    def __init__(self):
+        setup_style()
+        self.fig = fig = plt.figure(figsize=(18, 12), facecolor='white')
+        self._laid_out = False
+        
+        # Use complex GridSpec layout
+        gs = fig.add_gridspec(2, 3, height_ratios=[1, 1.2], hspace=0.35, wspace=0.3)
+        
+        # ===== Top Left: Purchase Intention Donut Chart =====
+        ax1 = fig.add_subplot(gs[0, 0])
+        
+        # Use gradient colors (Green to Red)
+        colors = [UNIFIED_COLORS['positive'], UNIFIED_COLORS['quaternary'], 
                   UNIFIED_COLORS['neutral'], UNIFIED_COLORS['secondary'], UNIFIED_COLORS['negative']]
+        
+        self.wedges, _, self.wedge_texts = ax1.pie(
+            np.ones(len(self.intention_labels)), labels=None, autopct='%1.1f%%',
+            colors=colors, startangle=90, pctdistance=0.75,
+            wedgeprops=dict(width=0.45, edgecolor='white', linewidth=2.5),
+            textprops={'fontsize': 9, 'fontweight': 'bold', 'color': 'white'}
+        )
+        
+        # Center text
+        self.positive_text = ax1.text(0, 0.08, '', ha='center', va='center', 
+                                      fontsize=22, fontweight='bold', color=UNIFIED_COLORS['positive'])
+        ax1.text(0, -0.12, 'Intend to Buy', ha='center', va='center', fontsize=10, color='#666666')
+        
+        ax1.set_title('Purchase Intention in 5 Years', fontsize=13, fontweight='bold', pad=10)
+        
+        # Add legend
+        ax1.legend(self.wedges, self.intention_labels, loc='center left', bbox_to_anchor=(0.9, 0.5),
+                  fontsize=9, frameon=True, framealpha=0.95)
+        add_panel_label(ax1, 'A')
+        
+        # ===== Top Middle: Car Type Preference =====
+        self.ax2 = ax2 = fig.add_subplot(gs[0, 1])
+        car_colors = get_unified_palette(5)
+        n_cars = len(self.car_labels)
+        
+        # Draw beautified bar chart
+        self.car_bars = ax2.barh(range(n_cars), np.zeros(n_cars), color=car_colors[:n_cars],
+                                 edgecolor='white', linewidth=2, height=0.65)
+        
+        ax2.set_yticks(range(n_cars))
+        ax2.set_yticklabels(self.car_labels, fontsize=10)
+        
+        # Value labels
+        self.car_texts = [ax2.text(0, i, '', va='center', fontsize=10, fontweight='bold')
+                          for i in range(n_cars)]
+        self.car_whiskers = draw_ci_whiskers(ax2, [], [], []) if CI_WHISKERS else None
+        
+        ax2.set_title('Car Type Preference Distribution', fontsize=13, fontweight='bold', pad=10)
+        sns.despine(ax=ax2, left=True)
+        ax2.tick_params(left=False)
+        ax2.grid(axis='x', alpha=0.3, linestyle='--')
+        add_panel_label(ax2, 'B')
+        
+        # ===== Top Right: Overall Impression of NEVs =====
+        ax3 = fig.add_subplot(gs[0, 2])
+        imp_colors = [UNIFIED_COLORS['positive'], UNIFIED_COLORS['quaternary'], 
+                      UNIFIED_COLORS['neutral'], UNIFIED_COLORS['secondary'], UNIFIED_COLORS['negative']]
+        
+        # Use horizontal stacked bar chart
+        self.imp_bars = []
+        self.imp_texts = []
+        for label, color in zip(self.imp_labels, imp_colors):
+            bar, = ax3.barh(['Overall Impression'], [0], left=0, color=color, 
+                            edgecolor='white', linewidth=1, height=0.5, label=f'{label}')
+            self.imp_bars.append(bar)
+            self.imp_texts.append(ax3.text(0, 0, '', ha='center', va='center',
+                                           fontsize=10, fontweight='bold', color='white'))
+        
+        ax3.set_xlim(0, 100)
+        ax3.set_xlabel('Percentage (%)', fontsize=11)
+        ax3.set_title('Overall Impression of NEVs', fontsize=13, fontweight='bold', pad=10)
+        ax3.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=3, fontsize=9)
+        sns.despine(ax=ax3, left=True)
+        ax3.tick_params(left=False)
+        add_panel_label(ax3, 'C')
+        
+        # ===== Bottom Left: Influencing Factors (Lollipop Chart) =====
+        self.ax4 = ax4 = fig.add_subplot(gs[1, 0])
+        
+        # Color gradient by rank
+        factor_colors = get_unified_palette(len(self.factor_cols), 'sequential')
+        
+        y_pos = range(len(self.factor_cols))
+        self.stems = [ax4.hlines(y=i, xmin=0, xmax=0, color=factor_colors[i], linewidth=3, alpha=0.8)
+                      for i in y_pos]
+        self.heads = [ax4.scatter([0], [i], c=[factor_colors[i]], s=150, edgecolors='white', linewidths=2, zorder=5)
+                      for i in y_pos]
+        ax4.set_yticks(y_pos)
+        self.factor_texts = [ax4.text(0, i, '', va='center', fontsize=10, fontweight='bold') for i in y_pos]
+        self.factor_whiskers = draw_ci_whiskers(ax4, [], [], []) if CI_WHISKERS else None
+        
+        ax4.set_xlabel('Count', fontsize=11, fontweight='bold')
+        ax4.set_title('Key Factors Influencing Purchase Decision', fontsize=13, fontweight='bold', pad=10)
+        sns.despine(ax=ax4, left=True)
+        ax4.tick_params(left=False)
+        ax4.grid(axis='x', alpha=0.3, linestyle='--')
+        add_panel_label(ax4, 'D')
+        
+        # ===== Bottom Middle+Right: Major Pain Points (Treemap Effect) =====
+        self.ax5 = ax5 = fig.add_subplot(gs[1, 1:])
+        
+        # Use faceted bar chart to simulate importance
+        n_problems = len(self.problem_cols)
+        problem_colors = get_unified_palette(n_problems, 'warm')
+        
+        self.problem_bars = ax5.bar(range(n_problems), np.zeros(n_problems), 
+                                    color=problem_colors, edgecolor='white', linewidth=2, width=0.7)
+        ax5.set_xticks(range(n_problems))
+        
+        # Values and ranking
+        self.problem_texts = []
+        self.rank_texts = []
+        for i, bar in enumerate(self.problem_bars):
+            center = bar.get_x() + bar.get_width()/2
+            self.problem_texts.append(ax5.annotate('', xy=(center, 0),
+                                                   ha='center', va='bottom', fontsize=11, fontweight='bold',
+                                                   xytext=(0, 3), textcoords='offset points'))
+            # Ranking inside the bar
+            self.rank_texts.append(ax5.text(center, 0, f'#{i+1}',
+                                            ha='center', va='center', fontsize=14, fontweight='bold', 
+                                            color='white', alpha=0.9))
+        self.problem_whiskers = draw_ci_whiskers(ax5, [], [], [], horizontal=False) if CI_WHISKERS else None
+        
+        ax5.set_ylabel('Count', fontsize=11, fontweight='bold')
+        ax5.set_title('Analysis of Major NEV Pain Points (Sorted by Severity)', fontsize=13, fontweight='bold', pad=10)
+        sns.despine(ax=ax5)
+        ax5.grid(axis='y', alpha=0.3, linestyle='--')
+        add_panel_label(ax5, 'E')
+        
+        plt.suptitle('Figure 5: Comprehensive Analysis of NEV Market Potential and Consumer Insights', fontsize=22, fontweight='bold', 
+                    y=0.98, color='#1A1A1A')
     
-    # Use horizontal stacked bar chart
-    bottom = 0
-    for i, (val, label, color) in enumerate(zip(impression.values, imp_labels[:len(impression)], imp_colors)):
-        pct = val / len(df) * 100
-        ax3.barh(['Overall Impression'], [pct], left=bottom, color=color, 
-                edgecolor='white', linewidth=1, height=0.5, label=f'{label}')
-        if pct > 8:
-            ax3.text(bottom + pct/2, 0, f'{pct:.0f}%', ha='center', va='center',
-                    fontsize=10, fontweight='bold', color='white')
-        bottom += pct
-    
-    ax3.set_xlim(0, 100)
-    ax3.set_xlabel('Percentage (%)', fontsize=11)
-    ax3.set_title('Overall Impression of NEVs', fontsize=13, fontweight='bold', pad=10)
-    ax3.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=3, fontsize=9)
-    sns.despine(ax=ax3, left=True)
-    ax3.tick_params(left=False)
-    add_panel_label(ax3, 'C')
-    
-    # ===== Bottom Left: Influencing Factors (Lollipop Chart) =====
-    ax4 = fig.add_subplot(gs[1, 0])
-    
-    factor_cols = ['因素_成本', '因素_环保', '因素_技术', '因素_续航', 
-                   '因素_充电', '因素_性能', '因素_政策', '因素_品牌']
-    factor_names = ['Cost', 'Environmental', 'Tech Reliability', 'Range', 
-                   'Charging Convenience', 'Performance', 'Policy Support', 'Brand Reputation']
-    factor_vals = [df[col].sum() for col in factor_cols]
-    
-    df_factors = pd.DataFrame({'Factor': factor_names, 'Count': factor_vals})
-    df_factors = df_factors.sort_values('Count', ascending=True)
-    
-    # Color gradient
-    factor_colors = get_unified_palette(len(df_factors), 'sequential')
-    
-    y_pos = range(len(df_factors))
-    for i, (factor, count) in enumerate(zip(df_factors['Factor'], df_factors['Count'])):
-        ax4.hlines(y=i, xmin=0, xmax=count, color=factor_colors[i], linewidth=3, alpha=0.8)
-        ax4.scatter([count], [i], c=[factor_colors[i]], s=150, edgecolors='white', linewidths=2, zorder=5)
-    
-    ax4.set_yticks(y_pos)
-    ax4.set_yticklabels(df_factors['Factor'], fontsize=10)
-    
-    for i, count in enumerate(df_factors['Count']):
-        pct = count / len(df) * 100
-        ax4.text(count + 1, i, f'{count} ({pct:.0f}%)', va='center', fontsize=10, fontweight='bold')
-    
-    ax4.set_xlim(0, max(factor_vals) * 1.25)
-    ax4.set_xlabel('Count', fontsize=11, fontweight='bold')
-    ax4.set_title('Key Factors Influencing Purchase Decision', fontsize=13, fontweight='bold', pad=10)
-    sns.despine(ax=ax4, left=True)
-    ax4.tick_params(left=False)
-    ax4.grid(axis='x', alpha=0.3, linestyle='--')
-    add_panel_label(ax4, 'D')
-    
-    # ===== Bottom Middle+Right: Major Pain Points (Treemap Effect) =====
-    ax5 = fig.add_subplot(gs[1, 1:])
+    def update(self, intention_counts, car_pref, impression, df_factors, df_problems, n_total, car_ci=None):
+        """Set the data-bearing artists from category counts and sorted factor/problem tables
+        
+        With whiskers, df_factors and df_problems carry 'CI Low' / 'CI High' columns
+        and car_ci holds the (low, high) car type intervals, all in percent.
+        """
+        mark_phase('draw')
+        # Donut wedges, as laid out by Axes.pie (counter-clockwise from 90 degrees)
+        theta1 = 90 / 360
+        fracs = intention_counts.values / max(intention_counts.sum(), 1)
+        for wedge, text, frac in zip(self.wedges, self.wedge_texts, fracs):
+            theta2 = theta1 + frac
+            wedge.set_theta1(360 * theta1)
+            wedge.set_theta2(360 * theta2)
+            thetam = np.pi * (theta1 + theta2)
+            text.set_position((0.75 * np.cos(thetam), 0.75 * np.sin(thetam)))
+            text.set_text('%1.1f%%' % (frac * 100))
+            text.set_visible(frac > 0)
+            theta1 = theta2
+        positive_ratio = (intention_counts.get(1, 0) + intention_counts.get(2, 0)) / n_total * 100
+        self.positive_text.set_text(f'{positive_ratio:.0f}%')
+        
+        # Value labels sit past the whiskers, when shown
+        car_ends = car_pref.values
+        if self.car_whiskers is not None:
+            car_low, car_high = (np.asarray(bound) * n_total / 100 for bound in car_ci)
+            self.car_whiskers.set_segments(ci_whisker_segments(range(len(car_ends)), car_low, car_high))
+            car_ends = car_high
+        for i, (bar, text, val, end) in enumerate(zip(self.car_bars, self.car_texts, car_pref.values, car_ends)):
+            bar.set_width(val)
+            pct = val / n_total * 100
+            text.set_position((end + 1, i))
+            text.set_text(f'{val} ({pct:.1f}%)')
+        self.ax2.set_xlim(0, max(max(car_ends) * 1.35, 1))
+        
+        bottom = 0
+        for bar, text, val in zip(self.imp_bars, self.imp_texts, impression.values):
+            pct = val / n_total * 100
+            bar.set_x(bottom)
+            bar.set_width(pct)
+            text.set_position((bottom + pct/2, 0))
+            text.set_text(f'{pct:.0f}%')
+            text.set_visible(pct > 8)
+            bottom += pct
+        
+        factor_ends = df_factors['Count'].to_numpy()
+        if self.factor_whiskers is not None:
+            factor_ci = df_factors[['CI Low', 'CI High']].to_numpy() * n_total / 100
+            self.factor_whiskers.set_segments(
+                ci_whisker_segments(range(len(factor_ends)), factor_ci[:, 0], factor_ci[:, 1]))
+            factor_ends = factor_ci[:, 1]
+        for i, (stem, head, text, count, end) in enumerate(zip(self.stems, self.heads, self.factor_texts,
+                                                                 df_factors['Count'], factor_ends)):
+            stem.set_segments([[(0, i), (count, i)]])
+            head.set_offsets([[count, i]])
+            pct = count / n_total * 100
+            text.set_position((end + 1, i))
+            text.set_text(f'{count} ({pct:.0f}%)')
+        self.ax4.set_yticklabels(df_factors['Factor'], fontsize=10)
+        self.ax4.set_xlim(0, max(max(factor_ends) * 1.25, 1))
+        
+        problem_ends = df_problems['Count'].to_numpy()
+        if self.problem_whiskers is not None:
+            problem_ci = df_problems[['CI Low', 'CI High']].to_numpy() * n_total / 100
+            self.problem_whiskers.set_segments(ci_whisker_segments(
+                [bar.get_x() + bar.get_width()/2 for bar in self.problem_bars],
+                problem_ci[:, 0], problem_ci[:, 1], horizontal=False))
+            problem_ends = problem_ci[:, 1]
+        for bar, text, rank_text, val, end in zip(self.problem_bars, self.problem_texts, self.rank_texts,
+                                                  df_problems['Count'], problem_ends):
+            height = val
+            center = bar.get_x() + bar.get_width()/2
+            bar.set_height(height)
+            pct = val / n_total * 100
+            text.xy = (center, end)
+            text.set_text(f'{val}\n({pct:.0f}%)')
+            rank_text.set_position((center, height/2))
+        self.ax5.set_xticklabels(df_problems['Problem'], fontsize=11, rotation=0)
+        self.ax5.relim()
+        self.ax5.autoscale_view()
+        if self.problem_whiskers is not None:
+            self.ax5.set_ylim(0, max(max(problem_ends) * 1.18, 1))
+    
+    def render(self, df, save_path):
+        """Draw the chart for df and save it"""
+        mark_phase('prep')
+        # Log data
+        print(f"\n[Data Log] Data for NEV Analysis:")
+        print("Purchase Intention Counts:")
+        print(df['5年内购车意愿'].value_counts().sort_index())
+        print("Car Type Preference Counts:")
+        print(df['购车类型偏好'].value_counts().sort_index())
+        print("NEV Impression Counts:")
+        print(df['新能源汽车印象'].value_counts().sort_index())
+        
+        factor_totals = multi_select_totals(df, 'factors')
+        problem_totals = multi_select_totals(df, 'problems')
+        print("Influencing Factors Counts:")
+        for col in self.factor_cols:
+            print(f"{col}: {factor_totals[col]}")
+        print("Pain Points Counts:")
+        for col in self.problem_cols:
+            print(f"{col}: {problem_totals[col]}")
+        
+        codes = [1, 2, 3, 4, 5]
+        n_total = len(df)
+        intention_counts = df['5年内购车意愿'].value_counts().reindex(codes, fill_value=0)
+        car_pref = df['购车类型偏好'].value_counts().reindex(codes, fill_value=0)
+        impression = df['新能源汽车印象'].value_counts().reindex(codes, fill_value=0)
+        df_factors = pd.DataFrame({'Factor': self.factor_names, 'Count': factor_totals[self.factor_cols].to_numpy()})
+        df_problems = pd.DataFrame({'Problem': self.problem_names, 'Count': problem_totals[self.problem_cols].to_numpy()})
+        car_ci = None
+        car_table = counts_table(car_pref.values, self.car_labels, n_total)
+        if self.car_whiskers is not None:
+            # Factor and problem columns are in their multi-select blocks' option order
+            df_factors = with_ci_columns(df_factors, *option_share_ci(multi_select_codes(df, 'factors'),
+                                                                      len(self.factor_cols)))
+            df_problems = with_ci_columns(df_problems, *option_share_ci(multi_select_codes(df, 'problems'),
+                                                                        len(self.problem_cols)))
+            car_ci = share_ci(car_pref.values, n_total)
+            car_table = with_ci_columns(car_table, *car_ci)
+        df_factors = df_factors.sort_values('Count', ascending=True)
+        df_problems = df_problems.sort_values('Count', ascending=False)
+        
+        self.update(intention_counts, car_pref, impression, df_factors, df_problems, n_total, car_ci)
+        emit_data_bundle(save_path, 'nev_analysis', {
+            'purchase_intention': counts_table(intention_counts.values, self.intention_labels, n_total),
+            'car_type': car_table,
+            'impression': counts_table(impression.values, self.imp_labels, n_total),
+            'factors': df_factors.assign(Percent=df_factors['Count'] / n_total * 100),
+            'pain_points': df_problems.assign(Percent=df_problems['Count'] / n_total * 100),
+        }, n=n_total)
+        paths = save_fig(self.fig, save_path, close=False, relayout=not self._laid_out,
+                         layout_key=type(self).__name__)
+        self._laid_out = True
+        return paths
+    
+    def close(self):
+        plt.close(self.fig)
+
+
+@instrument_chart
+def plot_nev_analysis(df, save_path):
+    """Comprehensive Analysis of New Energy Vehicles (Multi-chart Composition)
     
-    problem_cols = ['问题_续航', '问题_充电设施', '问题_电池', '问题_价格', 
-                   '问题_安全', '问题_维修']
-    problem_names = ['Insufficient Range', 'Charging Facilities', 'Battery Issues', 'High Price', 
-                    'Safety Concerns', 'Maintenance Cost']
-    problem_vals = [df[col].sum() for col in problem_cols]
-    
-    df_problems = pd.DataFrame({'Problem': problem_names, 'Count': problem_vals})
-    df_problems = df_problems.sort_values('Count', ascending=False)
-    
-    # Use faceted bar chart to simulate importance
-    problem_colors = get_unified_palette(len(df_problems), 'warm')
-    
-    bars = ax5.bar(range(len(df_problems)), df_problems['Count'], 
-                  color=problem_colors, edgecolor='white', linewidth=2, width=0.7)
-    
-    ax5.set_xticks(range(len(df_problems)))
-    ax5.set_xticklabels(df_problems['Problem'], fontsize=11, rotation=0)
-    
-    # Add values and ranking
-    for i, (bar, val, prob) in enumerate(zip(bars, df_problems['Count'], df_problems['Problem'])):
-        height = bar.get_height()
-        pct = val / len(df) * 100
-        ax5.annotate(f'{val}\n({pct:.0f}%)', xy=(bar.get_x() + bar.get_width()/2, height),
-                    ha='center', va='bottom', fontsize=11, fontweight='bold',
-                    xytext=(0, 3), textcoords='offset points')
-        # Add ranking inside the bar
-        ax5.text(bar.get_x() + bar.get_width()/2, height/2, f'#{i+1}',
-                ha='center', va='center', fontsize=14, fontweight='bold', 
-                color='white', alpha=0.9)
-    
-    ax5.set_ylabel('Count', fontsize=11, fontweight='bold')
-    ax5.set_title('Analysis of Major NEV Pain Points (Sorted by Severity)', fontsize=13, fontweight='bold', pad=10)
-    sns.despine(ax=ax5)
-    ax5.grid(axis='y', alpha=0.3, linestyle='--')
-    add_panel_label(ax5, 'E')
-    
-    plt.suptitle('Figure 5: Comprehensive Analysis of NEV Market Potential and Consumer Insights', fontsize=22, fontweight='bold', 
-                y=0.98, color='#1A1A1A')
-    save_fig(fig, save_path)
+    For many subsets, reuse one NevAnalysisTemplate instead.
+    """
+    mark_phase('draw')
+    template = NevAnalysisTemplate()
+    try:
+        return template.render(df, save_path)
+    finally:
+        template.close()
+
+
+# Large-matrix mode of plot_correlation_heatmap: one image for all cells instead of one
+# outlined patch and text per cell, clustered order, sparse annotations, optional pages
+HEATMAP_LARGE_ITEMS = 40        # Matrices with more items switch to large mode
+HEATMAP_ANNOTATE_MIN_ABS = 0.5  # Large mode annotates only cells with |r| at least this
+HEATMAP_ANNOTATE_TOP_K = 150    # ... and at most this many of them (strongest first)
+HEATMAP_MAX_TICK_LABELS = 60    # Per axis; denser matrices label every k-th item
+HEATMAP_MIN_ANNOT_PT = 4        # Cells smaller than this (points) get no annotations
 
 
-def plot_correlation_heatmap(corr_matrix, save_path, title='Variable Correlation Heatmap'):
-    """Draw Professional Heatmap (Enhanced Version)"""
+def correlation_order(corr_matrix, method='average'):
+    """Item order that places strongly correlated items next to each other
+    (hierarchical clustering on 1 - |r|)"""
+    from scipy.cluster.hierarchy import linkage, leaves_list
+    from scipy.spatial.distance import squareform
+    if len(corr_matrix) < 3:
+        return list(corr_matrix.columns)
+    distance = 1 - np.abs(np.nan_to_num(corr_matrix.to_numpy(dtype=float), nan=0.0))
+    np.fill_diagonal(distance, 0)
+    distance = np.clip((distance + distance.T) / 2, 0, None)
+    leaves = leaves_list(linkage(squareform(distance, checks=False), method=method))
+    return [corr_matrix.columns[i] for i in leaves]
+
+
+def _draw_correlation_image(fig, ax, cax, corr, rows, cols, title, cmap,
+                            annotate_min_abs, annotate_top_k):
+    """Large-mode heatmap of corr[rows, cols] (positions into corr) as one image;
+    cells on or above the diagonal are left blank"""
+    values = corr.to_numpy(dtype=float)[np.ix_(rows, cols)]
+    blank = rows[:, None] <= cols[None, :]
+    image = np.where(blank, np.nan, values)
+    
+    cmap = cmap.copy()
+    cmap.set_bad('white')
+    im = ax.imshow(image, cmap=cmap, vmin=-1, vmax=1, interpolation='nearest', aspect='equal')
+    fig.colorbar(im, cax=cax)
+    
+    labels = corr.columns
+    for axis, index, setter in ((ax.xaxis, cols, ax.set_xticklabels), (ax.yaxis, rows, ax.set_yticklabels)):
+        step = max(1, int(np.ceil(len(index) / HEATMAP_MAX_TICK_LABELS)))
+        ticks = np.arange(0, len(index), step)
+        axis.set_ticks(ticks)
+        setter([labels[index[t]] for t in ticks])
+    
+    # Annotate the strongest cells only, and only when cells are large enough to read
+    box = ax.get_position()
+    cell_pt = min(box.width * fig.get_figwidth() / len(cols),
+                  box.height * fig.get_figheight() / len(rows)) * 72
+    fontsize = min(9, cell_pt / 3.2)   # "-.00" in bold is about 2.6 em wide
+    annotated = 0
+    if fontsize >= HEATMAP_MIN_ANNOT_PT:
+        strength = np.where(blank, -1, np.abs(np.nan_to_num(values, nan=-1)))
+        flat = np.flatnonzero(strength >= annotate_min_abs)
+        flat = flat[np.argsort(-strength.ravel()[flat], kind='stable')][:annotate_top_k]
+        for i, j in zip(*np.unravel_index(flat, values.shape)):
+            r = values[i, j]
+            ax.text(j, i, f'{r:.2f}'.replace('0.', '.', 1), ha='center', va='center', fontsize=fontsize,
+                    fontweight='bold', color='white' if abs(r) > 0.6 else '#333333')
+        annotated = len(flat)
+    ax.set_title(title, fontsize=18, fontweight='bold', pad=20, color='#1A1A1A')
+    return annotated
+
+
+@instrument_chart
+def plot_correlation_heatmap(corr_matrix, save_path, title='Variable Correlation Heatmap',
+                             large=None, order=None, annotate_min_abs=None, annotate_top_k=None,
+                             page_size=None):
+    """Draw Professional Heatmap (Enhanced Version)
+    
+    Matrices with more than HEATMAP_LARGE_ITEMS items (or large=True) are drawn in
+    large mode: a single image, items in clustered order, annotations only for the
+    annotate_top_k strongest cells with |r| >= annotate_min_abs. With page_size,
+    large mode also writes the lower triangle in page_size x page_size tiles to
+    '{name}_pages/'.
+    
+    Args:
+        order: 'cluster', 'original' or an explicit list of items (large mode
+            defaults to 'cluster'; the standard chart keeps the given order)
+    
+    Returns:
+        Paths of the page images (large mode with page_size), else None
+    """
+    import os
     # Log data
     print(f"\n[Data Log] Data for Correlation Heatmap:")
     print("Correlation Matrix:")
     print(corr_matrix)
+    
+    n_items = len(corr_matrix)
+    large = n_items > HEATMAP_LARGE_ITEMS if large is None else large
+    if order is None:
+        order = 'cluster' if large else 'original'
+    if order == 'cluster':
+        order = correlation_order(corr_matrix)
+    if order != 'original':
+        corr_matrix = corr_matrix.loc[list(order), list(order)]
 
     setup_style()
+    mark_phase('draw')
     fig = plt.figure(figsize=(14, 11), facecolor='white')
     gs = fig.add_gridspec(1, 2, width_ratios=[1, 0.03], wspace=0.02)
     
     ax = fig.add_subplot(gs[0])
     cax = fig.add_subplot(gs[1])
     
-    # Create mask (show only lower triangle)
-    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-    
     # Custom color palette
     cmap = sns.diverging_palette(250, 15, s=75, l=40, n=9, center='light', as_cmap=True)
     
-    # Draw heatmap
-    hm = sns.heatmap(corr_matrix, mask=mask, cmap=cmap, vmin=-1, vmax=1, center=0,
-                     annot=True, fmt='.2f', square=True, linewidths=0.8, 
-                     linecolor='white', cbar_ax=cax,
-                     annot_kws={"size": 9, "fontweight": "bold"}, ax=ax)
+    if large:
+        annotate_min_abs = HEATMAP_ANNOTATE_MIN_ABS if annotate_min_abs is None else annotate_min_abs
+        annotate_top_k = HEATMAP_ANNOTATE_TOP_K if annotate_top_k is None else annotate_top_k
+        positions = np.arange(n_items)
+        annotated = _draw_correlation_image(fig, ax, cax, corr_matrix, positions, positions, title,
+                                            cmap, annotate_min_abs, annotate_top_k)
+        print(f"Large mode: {n_items} items, {annotated} cells annotated "
+              f"(|r| >= {annotate_min_abs}, top {annotate_top_k})")
+    else:
+        # Create mask (show only lower triangle)
+        mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+        
+        # Draw heatmap
+        hm = sns.heatmap(corr_matrix, mask=mask, cmap=cmap, vmin=-1, vmax=1, center=0,
+                         annot=True, fmt='.2f', square=True, linewidths=0.8, 
+                         linecolor='white', cbar_ax=cax,
+                         annot_kws={"size": 9, "fontweight": "bold"}, ax=ax)
+        ax.set_title(title, fontsize=18, fontweight='bold', pad=20, color='#1A1A1A')
     
     # Beautify colorbar
     cax.set_ylabel('Correlation Coefficient', fontsize=12, fontweight='bold', labelpad=10)
     cax.tick_params(labelsize=10)
     
-    ax.set_title(title, fontsize=18, fontweight='bold', pad=20, color='#1A1A1A')
-    
     # Optimize labels
-    ax.tick_params(axis='x', rotation=45, labelsize=10)
-    ax.tick_params(axis='y', rotation=0, labelsize=10)
+    ax.tick_params(axis='x', rotation=45 if not large else 90, labelsize=10 if not large else 7)
+    ax.tick_params(axis='y', rotation=0, labelsize=10 if not large else 7)
     
     # Add border
     for spine in ax.spines.values():
@@ -981,9 +3163,37 @@ def plot_correlation_heatmap(corr_matrix, save_path, title='Variable Correlation
         spine.set_color('#CCCCCC')
         spine.set_linewidth(1)
     
+    meta = {'order': list(map(str, corr_matrix.columns))} if large else {}
+    emit_data_bundle(save_path, 'correlation_heatmap',
+                     {'correlations': correlation_pairs(corr_matrix)}, title=title, **meta)
     save_fig(fig, save_path)
+    
+    if not (large and page_size and n_items > page_size):
+        return None
+    pages_dir = os.path.join(os.path.dirname(save_path),
+                             os.path.splitext(os.path.basename(save_path))[0] + '_pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    blocks = [np.arange(start, min(start + page_size, n_items)) for start in range(0, n_items, page_size)]
+    page_paths = []
+    for bi, rows in enumerate(blocks):
+        for bj, cols in enumerate(blocks[:bi + 1]):
+            fig = plt.figure(figsize=(14, 11), facecolor='white')
+            gs = fig.add_gridspec(1, 2, width_ratios=[1, 0.03], wspace=0.02)
+            ax, cax = fig.add_subplot(gs[0]), fig.add_subplot(gs[1])
+            _draw_correlation_image(fig, ax, cax, corr_matrix, rows, cols,
+                                    f'{title} (rows {bi + 1}, columns {bj + 1})', cmap,
+                                    annotate_min_abs, annotate_top_k)
+            ax.tick_params(axis='x', rotation=90, labelsize=8)
+            ax.tick_params(axis='y', labelsize=8)
+            cax.set_ylabel('Correlation Coefficient', fontsize=12, fontweight='bold', labelpad=10)
+            page_path = os.path.join(pages_dir, f'page_r{bi + 1:02d}_c{bj + 1:02d}.png')
+            save_fig(fig, page_path)
+            page_paths.append(page_path)
+    print(f"  ✓ {len(page_paths)} heatmap pages written to {pages_dir}")
+    return page_paths
 
 
+@instrument_chart
 def plot_simple_slopes(df, X, Y, W, X_name, Y_name, W_name, simple_slopes, 
                        model_results, save_path, title):
     """Draw Moderation Effect Simple Slopes Plot (Professional Academic Style)"""
@@ -997,6 +3207,7 @@ def plot_simple_slopes(df, X, Y, W, X_name, Y_name, W_name, simple_slopes,
     print(model_results['model'].summary())
 
     setup_style()
+    mark_phase('draw')
     fig = plt.figure(figsize=(12, 8), facecolor='white')
     gs = fig.add_gridspec(1, 2, width_ratios=[1.5, 1], wspace=0.3)
     
@@ -1102,9 +3313,13 @@ def plot_simple_slopes(df, X, Y, W, X_name, Y_name, W_name, simple_slopes,
     
     plt.suptitle(f'{title}\nModeration Effect Analysis', fontsize=18, fontweight='bold', 
                 y=0.98, color='#1A1A1A')
+    emit_data_bundle(save_path, 'simple_slopes', {
+        'simple_slopes': pd.DataFrame(simple_slopes),
+    }, X=X_name, Y=Y_name, W=W_name, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_regression_coefficients(results, save_path, title='Regression Model Coefficients'):
     """Draw Regression Coefficient Forest Plot (Academic Journal Style)"""
     # Log data
@@ -1118,6 +3333,7 @@ def plot_regression_coefficients(results, save_path, title='Regression Model Coe
     print(f"F-stat: {results.get('f_statistic')}, F p-val: {results.get('f_pvalue')}")
 
     setup_style()
+    mark_phase('draw')
     fig = plt.figure(figsize=(12, 8), facecolor='white')
     gs = fig.add_gridspec(1, 2, width_ratios=[1.5, 1], wspace=0.25)
     
@@ -1242,6 +3458,10 @@ Significance Markers:
     ax2.set_title('Model Summary', fontsize=14, fontweight='bold', pad=10)
     add_panel_label(ax2, 'B', x=0.02)
     
+    emit_data_bundle(save_path, 'regression_coefficients', {
+        'coefficients': df_coef,
+    }, r_squared=r2, adj_r_squared=adj_r2, f_statistic=f_stat, f_pvalue=f_pval,
+       n=n_obs, title=title)
     save_fig(fig, save_path)
 
 
@@ -1249,6 +3469,7 @@ Significance Markers:
 # Comprehensive Combined Figure Function
 # ============================================================================
 
+@instrument_chart
 def create_combined_figure(df, save_path):
     """Create comprehensive analysis figure (including all key findings) and save subplots"""
     # Log data
@@ -1263,8 +3484,9 @@ def create_combined_figure(df, save_path):
     
     cols = ['可再生_太阳能', '可再生_风能', '可再生_水能', '可再生_生物质能',
            '可再生_石油', '可再生_煤炭', '可再生_天然气', '可再生_核能']
+    renewable_totals = multi_select_totals(df, 'renewable')
     print("Renewable Energy Recognition:")
-    print(df[cols].sum())
+    print(renewable_totals[cols])
     
     trust_cols = ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '激励政策认同度', '限油推新支持度']
     print("Trust Analysis Means:")
@@ -1274,12 +3496,14 @@ def create_combined_figure(df, save_path):
     print(df['5年内购车意愿'].value_counts().sort_index())
     
     factor_cols = ['因素_成本', '因素_续航', '因素_充电', '因素_技术', '因素_环保']
+    factor_totals = multi_select_totals(df, 'factors')
     print("Key Purchase Factors:")
-    print(df[factor_cols].sum())
+    print(factor_totals[factor_cols])
     
     problem_cols = ['问题_续航', '问题_充电设施', '问题_电池', '问题_价格', '问题_安全']
+    problem_totals = multi_select_totals(df, 'problems')
     print("Major NEV Issues:")
-    print(df[problem_cols].sum())
+    print(problem_totals[problem_cols])
 
     import os
     setup_style()
@@ -1299,7 +3523,7 @@ def create_combined_figure(df, save_path):
     
     def draw_education(ax):
         edu_counts = df['在学类别'].value_counts().sort_index()
-        edu_labels = ['Undergraduate', 'Master', 'PhD']
+        edu_labels = CODEBOOK.labels('在学类别')
         ax.bar(edu_labels, edu_counts.values, color=UNIFIED_COLORS['education'],
                edgecolor='white', linewidth=2)
         for i, v in enumerate(edu_counts.values):
@@ -1309,7 +3533,7 @@ def create_combined_figure(df, save_path):
         sns.despine(ax=ax)
     
     def draw_cognition(ax):
-        levels = ['Very Familiar', 'Familiar', 'Neutral', 'Unfamiliar', 'Very Unfamiliar']
+        levels = CODEBOOK.labels('能源转型了解度')
         energy_counts = df['能源转型了解度'].value_counts().reindex(range(1, 6), fill_value=0)
         carbon_counts = df['双碳了解度'].value_counts().reindex(range(1, 6), fill_value=0)
         x = np.arange(5)
@@ -1327,7 +3551,7 @@ def create_combined_figure(df, save_path):
         items = ['Solar', 'Wind', 'Hydro', 'Biomass', 'Oil', 'Coal', 'Natural Gas', 'Nuclear']
         cols = ['可再生_太阳能', '可再生_风能', '可再生_水能', '可再生_生物质能',
                '可再生_石油', '可再生_煤炭', '可再生_天然气', '可再生_核能']
-        vals = [df[col].sum() for col in cols]
+        vals = renewable_totals[cols].tolist()
         colors = [UNIFIED_COLORS['positive']]*4 + [UNIFIED_COLORS['negative']]*3 + [UNIFIED_COLORS['neutral']]
         ax.barh(items, vals, color=colors, edgecolor='white', linewidth=1.5)
         ax.set_xlabel('Count')
@@ -1336,9 +3560,9 @@ def create_combined_figure(df, save_path):
         ax.tick_params(left=False)
     
     def draw_trust_radar(ax):
-        categories = ['Tech Trust', 'NEV Tech', 'Policy Exec', 'Policy Agreement', 'Limit Oil/Promote New']
         trust_cols = ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '激励政策认同度', '限油推新支持度']
-        values = [6 - df[col].mean() for col in trust_cols]
+        categories = CODEBOOK.names(trust_cols)
+        values = [CODEBOOK.positive_series(df, col).mean() for col in trust_cols]
         values += values[:1]
         angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False).tolist()
         angles += angles[:1]
@@ -1353,7 +3577,7 @@ def create_combined_figure(df, save_path):
     
     def draw_intention(ax):
         intention = df['5年内购车意愿'].value_counts().sort_index()
-        labels = ['Very Likely', 'Likely', 'Uncertain', 'Unlikely', 'Very Unlikely']
+        labels = CODEBOOK.labels('5年内购车意愿')
         colors = [UNIFIED_COLORS['positive'], UNIFIED_COLORS['quaternary'], 
                   UNIFIED_COLORS['neutral'], UNIFIED_COLORS['secondary'], UNIFIED_COLORS['negative']]
         ax.pie(intention.values, labels=labels, autopct='%1.1f%%', colors=colors[:len(intention)],
@@ -1363,7 +3587,7 @@ def create_combined_figure(df, save_path):
     def draw_factors(ax):
         factor_cols = ['因素_成本', '因素_续航', '因素_充电', '因素_技术', '因素_环保']
         factor_names = ['Cost', 'Range', 'Charging', 'Tech', 'Env']
-        factor_vals = [df[col].sum() for col in factor_cols]
+        factor_vals = factor_totals[factor_cols].tolist()
         df_factors = pd.DataFrame({'Factor': factor_names, 'Count': factor_vals})
         df_factors = df_factors.sort_values('Count', ascending=True)
         ax.barh(df_factors['Factor'], df_factors['Count'], 
@@ -1376,7 +3600,7 @@ def create_combined_figure(df, save_path):
     def draw_problems(ax):
         problem_cols = ['问题_续航', '问题_充电设施', '问题_电池', '问题_价格', '问题_安全']
         problem_names = ['Range', 'Charging', 'Battery', 'Price', 'Safety']
-        problem_vals = [df[col].sum() for col in problem_cols]
+        problem_vals = problem_totals[problem_cols].tolist()
         ax.bar(problem_names, problem_vals, color=get_unified_palette(5), edgecolor='white')
         for i, v in enumerate(problem_vals):
             ax.text(i, v + 0.5, str(v), ha='center', fontweight='bold', fontsize=10)
@@ -1388,7 +3612,7 @@ def create_combined_figure(df, save_path):
         ax.axis('off')
         positive_purchase = (df['5年内购车意愿'].isin([1, 2]).sum() / len(df) * 100)
         avg_energy_knowledge = df['能源转型了解度'].mean()
-        renewable_accuracy = (df['可再生_太阳能'].sum() + df['可再生_风能'].sum()) / (2 * len(df)) * 100
+        renewable_accuracy = (renewable_totals['可再生_太阳能'] + renewable_totals['可再生_风能']) / (2 * len(df)) * 100
         summary_text = f"""
 📊 Key Research Findings Summary
 {'═'*30}
@@ -1408,12 +3632,13 @@ def create_combined_figure(df, save_path):
    2. Improve Charging Infrastructure
    3. Enhance Technology Trust
 """
-        ax.text(0.05, 0.95, summary_text, transform=ax.transAxes,
+        ax.text(0.05, 0.95, symbol_text(summary_text), transform=ax.transAxes,
                 fontsize=11, va='top', fontfamily='sans-serif',
                 bbox=dict(boxstyle='round,pad=0.8', facecolor='#F0F4F8', 
                          edgecolor=UNIFIED_COLORS['primary'], linewidth=2))
         ax.set_title('I. Research Summary', fontsize=14, fontweight='bold')
     
+    mark_phase('draw')
     # ============ Save Subplots ============
     # A. Gender Distribution
     fig_sub, ax_sub = plt.subplots(figsize=(8, 6), facecolor='white')
@@ -1477,31 +3702,48 @@ def create_combined_figure(df, save_path):
     plt.suptitle('Comprehensive Analysis of College Students\' Energy Transition Awareness and NEV Purchase Intention', 
                 fontsize=24, fontweight='bold', y=0.98, color='#1A1A1A')
     
+    n_total = len(df)
+    emit_data_bundle(save_path, 'combined_figure', {
+        'gender': counts_table(df['性别'].value_counts().sort_index().values, CODEBOOK.labels('性别'), n_total),
+        'education': counts_table(df['在学类别'].value_counts().sort_index().values,
+                                  CODEBOOK.labels('在学类别'), n_total),
+        'renewable': renewable_totals[cols].rename('Count'),
+        'trust': pd.DataFrame({'Dimension': CODEBOOK.names(trust_cols),
+                               'Score': [CODEBOOK.positive_series(df, col).mean() for col in trust_cols]}),
+        'purchase_intention': counts_table(df['5年内购车意愿'].value_counts().sort_index().values,
+                                           CODEBOOK.labels('5年内购车意愿'), n_total),
+        'factors': factor_totals[factor_cols].rename('Count'),
+        'problems': problem_totals[problem_cols].rename('Count'),
+    }, n=n_total)
     save_fig(fig, save_path)
     print(f"  → Subplots saved to: {subplots_dir}")
 
 
+@instrument_chart
 def create_info_channel_figure(df, save_path):
     """Create Information Channel and Attitude Analysis Figure, and save subplots"""
     # Log data
     print(f"\n[Data Log] Data for Info Channel Figure:")
     channel_cols = ['渠道_学校课程', '渠道_新闻媒体', '渠道_社交媒体', 
                    '渠道_学术文献', '渠道_亲友交流']
+    channel_totals = multi_select_totals(df, 'channels')
     print("Information Channels:")
-    print(df[channel_cols].sum())
+    print(channel_totals[channel_cols])
     
     goal_cols = ['目标_保障能源安全', '目标_减少污染', '目标_降低依赖', 
                 '目标_技术创新', '目标_绿色转型']
+    goal_totals = multi_select_totals(df, 'goals')
     print("Energy Transition Goals:")
-    print(df[goal_cols].sum())
+    print(goal_totals[goal_cols])
     
     print("Social Responsibility (Obligation):")
     print(df['大学生义务'].value_counts().sort_index())
     
     gov_cols = ['发力_技术研发', '发力_基础设施', '发力_教育宣传', 
                '发力_激励政策', '发力_节能改造']
+    gov_totals = multi_select_totals(df, 'gov_focus')
     print("Expected Gov Focus Areas:")
-    print(df[gov_cols].sum())
+    print(gov_totals[gov_cols])
 
     import os
     setup_style()
@@ -1509,14 +3751,26 @@ def create_info_channel_figure(df, save_path):
     # Create subplot save directory
     subplots_dir = get_subplots_dir(save_path)
     
+    # CI whisker bounds in respondents (columns are in their blocks' option order)
+    n_total = len(df)
+    ci = {}
+    if CI_WHISKERS:
+        for block in ('channels', 'gov_focus'):
+            low, high = option_share_ci(multi_select_codes(df, block), len(multi_select_columns(block)))
+            ci[block] = pd.DataFrame({'CI Low': low, 'CI High': high})
+        ci['duty'] = pd.DataFrame(dict(zip(['CI Low', 'CI High'], share_ci(
+            df['大学生义务'].value_counts().sort_index().values, n_total))))
+    
     # ============ Define Subplot Drawing Functions ============
     def draw_channels(ax):
         channel_cols = ['渠道_学校课程', '渠道_新闻媒体', '渠道_社交媒体', 
                        '渠道_学术文献', '渠道_亲友交流']
         channel_names = ['School Courses', 'News Media', 'Social Media', 'Academic Lit', 'Friends/Family']
-        channel_vals = [df[col].sum() for col in channel_cols]
+        channel_vals = channel_totals[channel_cols].tolist()
         
         df_channel = pd.DataFrame({'Channel': channel_names, 'Count': channel_vals})
+        if 'channels' in ci:
+            df_channel = df_channel.join(ci['channels'] * n_total / 100)
         df_channel = df_channel.sort_values('Count', ascending=True)
         
         colors = get_unified_palette(len(df_channel), 'categorical')
@@ -1527,13 +3781,17 @@ def create_info_channel_figure(df, save_path):
         ax.set_yticks(range(len(df_channel)))
         ax.set_yticklabels(df_channel['Channel'], fontsize=11)
         
-        for i, cnt in enumerate(df_channel['Count']):
+        ends = df_channel['Count'].to_numpy()
+        if 'channels' in ci:
+            draw_ci_whiskers(ax, range(len(df_channel)), df_channel['CI Low'], df_channel['CI High'])
+            ends = df_channel['CI High'].to_numpy()
+        for i, (cnt, end) in enumerate(zip(df_channel['Count'], ends)):
             pct = cnt / len(df) * 100
-            ax.text(cnt + 1, i, f'{cnt} ({pct:.0f}%)', va='center', fontsize=10, fontweight='bold')
+            ax.text(end + 1, i, f'{cnt} ({pct:.0f}%)', va='center', fontsize=10, fontweight='bold')
         
         ax.set_xlabel('Count', fontsize=12, fontweight='bold')
         ax.set_title('A. Information Channels', fontsize=14, fontweight='bold')
-        ax.set_xlim(0, max(channel_vals) * 1.25)
+        ax.set_xlim(0, max(ends) * 1.25)
         sns.despine(ax=ax, left=True)
         ax.tick_params(left=False)
         ax.grid(axis='x', alpha=0.3, linestyle='--')
@@ -1542,7 +3800,7 @@ def create_info_channel_figure(df, save_path):
         goal_cols = ['目标_保障能源安全', '目标_减少污染', '目标_降低依赖', 
                     '目标_技术创新', '目标_绿色转型']
         goal_names = ['Energy Security', 'Reduce Pollution', 'Reduce Dependency', 'Tech Innovation', 'Green Transition']
-        goal_vals = [df[col].sum() for col in goal_cols]
+        goal_vals = goal_totals[goal_cols].tolist()
         
         theta = np.linspace(0, 2*np.pi, len(goal_names), endpoint=False)
         width = 2*np.pi / len(goal_names) * 0.8
@@ -1555,15 +3813,22 @@ def create_info_channel_figure(df, save_path):
     
     def draw_duty(ax):
         duty_counts = df['大学生义务'].value_counts().sort_index()
-        duty_labels = ['Yes', 'No', 'Uncertain']
+        duty_labels = CODEBOOK.labels('大学生义务')
         duty_colors = [UNIFIED_COLORS['positive'], UNIFIED_COLORS['negative'], UNIFIED_COLORS['neutral']]
         
         ax.bar(duty_labels[:len(duty_counts)], duty_counts.values, 
                color=duty_colors[:len(duty_counts)], edgecolor='white', linewidth=2, width=0.6)
         
-        for i, v in enumerate(duty_counts.values):
+        ends = duty_counts.values
+        if 'duty' in ci:
+            bounds = ci['duty'].to_numpy() * n_total / 100
+            draw_ci_whiskers(ax, range(len(duty_counts)), bounds[:, 0], bounds[:, 1], horizontal=False)
+            ends = bounds[:, 1]
+        for i, (v, end) in enumerate(zip(duty_counts.values, ends)):
             pct = v / len(df) * 100
-            ax.text(i, v + 1, f'{v}\n({pct:.0f}%)', ha='center', fontsize=10, fontweight='bold')
+            ax.text(i, end + 1, f'{v}\n({pct:.0f}%)', ha='center', fontsize=10, fontweight='bold')
+        if 'duty' in ci:
+            ax.set_ylim(0, max(ends) * 1.18)
         
         ax.set_ylabel('Count', fontsize=12)
         ax.set_xlabel('Obligation to Understand Energy Transition', fontsize=11)
@@ -1574,9 +3839,11 @@ def create_info_channel_figure(df, save_path):
         gov_cols = ['发力_技术研发', '发力_基础设施', '发力_教育宣传', 
                    '发力_激励政策', '发力_节能改造']
         gov_names = ['R&D', 'Infrastructure', 'Education', 'Incentives', 'Retrofitting']
-        gov_vals = [df[col].sum() for col in gov_cols]
+        gov_vals = gov_totals[gov_cols].tolist()
         
         df_gov = pd.DataFrame({'Area': gov_names, 'Count': gov_vals})
+        if 'gov_focus' in ci:
+            df_gov = df_gov.join(ci['gov_focus'] * n_total / 100)
         df_gov = df_gov.sort_values('Count', ascending=False)
         
         bars = ax.bar(range(len(df_gov)), df_gov['Count'], 
@@ -1585,15 +3852,22 @@ def create_info_channel_figure(df, save_path):
         ax.set_xticks(range(len(df_gov)))
         ax.set_xticklabels(df_gov['Area'], fontsize=10, rotation=15, ha='right')
         
-        for i, (bar, val) in enumerate(zip(bars, df_gov['Count'])):
+        ends = df_gov['Count'].to_numpy()
+        if 'gov_focus' in ci:
+            draw_ci_whiskers(ax, range(len(df_gov)), df_gov['CI Low'], df_gov['CI High'], horizontal=False)
+            ends = df_gov['CI High'].to_numpy()
+        for i, (bar, val, end) in enumerate(zip(bars, df_gov['Count'], ends)):
             pct = val / len(df) * 100
-            ax.text(bar.get_x() + bar.get_width()/2, val + 0.5, 
+            ax.text(bar.get_x() + bar.get_width()/2, end + 0.5, 
                     f'{val}\n({pct:.0f}%)', ha='center', fontsize=10, fontweight='bold')
+        if 'gov_focus' in ci:
+            ax.set_ylim(0, max(ends) * 1.18)
         
         ax.set_ylabel('Count', fontsize=12)
         ax.set_title('D. Expected Gov Focus Areas', fontsize=14, fontweight='bold')
         sns.despine(ax=ax)
     
+    mark_phase('draw')
     # ============ Save Subplots ============
     # A. Information Channels
     fig_sub, ax_sub = plt.subplots(figsize=(10, 6), facecolor='white')
@@ -1626,6 +3900,22 @@ def create_info_channel_figure(df, save_path):
     
     plt.suptitle('Figure 6: Comprehensive Analysis of Information Channels and Public Attitudes', fontsize=20, fontweight='bold', 
                 y=0.98, color='#1A1A1A')
+    tables = {
+        'channels': counts_table(channel_totals[channel_cols].values,
+                                 ['School Courses', 'News Media', 'Social Media', 'Academic Lit', 'Friends/Family'],
+                                 n_total),
+        'goals': counts_table(goal_totals[goal_cols].values,
+                              ['Energy Security', 'Reduce Pollution', 'Reduce Dependency', 'Tech Innovation',
+                               'Green Transition'], n_total),
+        'obligation': counts_table(df['大学生义务'].value_counts().sort_index().values,
+                                   CODEBOOK.labels('大学生义务'), n_total),
+        'gov_focus': counts_table(gov_totals[gov_cols].values,
+                                  ['R&D', 'Infrastructure', 'Education', 'Incentives', 'Retrofitting'], n_total),
+    }
+    for table, block in [('channels', 'channels'), ('obligation', 'duty'), ('gov_focus', 'gov_focus')]:
+        if block in ci:
+            tables[table] = tables[table].join(ci[block])
+    emit_data_bundle(save_path, 'info_channel_figure', tables, n=n_total)
     save_fig(fig, save_path)
     print(f"  → Subplots saved to: {subplots_dir}")
 
@@ -1634,6 +3924,7 @@ def create_info_channel_figure(df, save_path):
 # Advanced Chart Types
 # ============================================================================
 
+@instrument_chart
 def plot_raincloud(df, var, group_var, var_label, group_label, save_path, title=None):
     """
     Draw Raincloud Plot
@@ -1647,11 +3938,12 @@ def plot_raincloud(df, var, group_var, var_label, group_label, save_path, title=
     print(df.groupby(group_var)[var].describe())
 
     setup_style()
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(14, 10), facecolor='white')
     
     # Prepare data
-    plot_data = df[[var, group_var]].dropna().copy()
-    groups = sorted(plot_data[group_var].unique())
+    plot_data = df[[var, group_var]].dropna()
+    groups = observed_groups(plot_data[group_var])
     n_groups = len(groups)
     
     # Color scheme - use unified palette
@@ -1674,7 +3966,7 @@ def plot_raincloud(df, var, group_var, var_label, group_label, save_path, title=
         
         # ===== 2. Half-Violin Plot (Right) =====
         parts = ax.violinplot([data], positions=[pos + 0.35], showmeans=False, showmedians=False, 
-                             showextrema=False, widths=0.6, vert=True)
+                             showextrema=False, widths=0.6)
         
         # Keep only right half
         for pc in parts['bodies']:
@@ -1688,7 +3980,7 @@ def plot_raincloud(df, var, group_var, var_label, group_label, save_path, title=
         
         # ===== 3. Box Plot (Center) - Draw last, highest zorder =====
         bp = ax.boxplot([data], positions=[pos], widths=0.25, patch_artist=True,
-                       showfliers=False, zorder=10, vert=True)
+                       showfliers=False, zorder=10)
         
         # Box style - use white fill to ensure visibility
         bp['boxes'][0].set_facecolor('white')
@@ -1712,7 +4004,7 @@ def plot_raincloud(df, var, group_var, var_label, group_label, save_path, title=
     ax.set_xticks(positions)
     
     # Create label mapping - show sample size and IQR info
-    label_map = {1: 'Undergraduate', 2: 'Master', 3: 'PhD'}
+    label_map = CODEBOOK.label_map(group_var)
     tick_labels = []
     for g in groups:
         data = plot_data[plot_data[group_var] == g][var].values
@@ -1755,9 +4047,13 @@ def plot_raincloud(df, var, group_var, var_label, group_label, save_path, title=
            color='#666666', style='italic',
            bbox=dict(boxstyle='round,pad=0.3', facecolor='#FFFBEA', alpha=0.9, edgecolor='#F0C36D'))
     
+    group_stats = plot_data.groupby(group_var)[var].describe().reset_index()
+    emit_data_bundle(save_path, 'raincloud', {'group_stats': group_stats},
+                     variable=var_label, group=group_label, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_ridgeline(df, variables, var_labels, save_path, title='Ridgeline Plot of Core Variables'):
     """
     Draw Ridgeline/Joy Plot
@@ -1772,6 +4068,7 @@ def plot_ridgeline(df, variables, var_labels, save_path, title='Ridgeline Plot o
     setup_style()
     
     n_vars = len(variables)
+    mark_phase('draw')
     fig, axes = plt.subplots(n_vars, 1, figsize=(14, 2.5 * n_vars), facecolor='white', 
                              sharex=True)
     
@@ -1784,6 +4081,7 @@ def plot_ridgeline(df, variables, var_labels, save_path, title='Ridgeline Plot o
         all_data.extend(df[var].dropna().values)
     x_min, x_max = min(all_data) - 0.5, max(all_data) + 0.5
     x_range = np.linspace(x_min, x_max, 200)
+    density_curves = {}
     
     for i, (var, label, color) in enumerate(zip(variables, var_labels, colors)):
         ax = axes[i] if n_vars > 1 else axes
@@ -1798,6 +4096,7 @@ def plot_ridgeline(df, variables, var_labels, save_path, title='Ridgeline Plot o
             
             # Normalize
             density = density / density.max() * 0.8
+            density_curves[label] = density
             
             # Draw filled area
             ax.fill_between(x_range, 0, density, color=color, alpha=0.7, 
@@ -1835,10 +4134,16 @@ def plot_ridgeline(df, variables, var_labels, save_path, title='Ridgeline Plot o
     axes[-1].set_xlabel('Score', fontsize=13, fontweight='bold')
     
     plt.suptitle(title, fontsize=20, fontweight='bold', y=1.02)
-    plt.tight_layout()
+    summary = df[variables].agg(['mean', 'std', 'count']).T
+    summary.index = var_labels
+    emit_data_bundle(save_path, 'ridgeline', {
+        'density': pd.DataFrame({'x': x_range, **density_curves}),
+        'summary': summary.rename_axis('Variable').reset_index(),
+    }, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Correlation Network Diagram'):
     """
     Draw Correlation Network Diagram
@@ -1851,6 +4156,7 @@ def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Corre
     print(corr_matrix)
 
     setup_style()
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(12, 12), facecolor='white')
     
     variables = list(corr_matrix.columns)
@@ -1861,6 +4167,11 @@ def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Corre
     radius = 3.5
     pos = {var: (radius * np.cos(angle), radius * np.sin(angle)) 
            for var, angle in zip(variables, angles)}
+    node_radius = min(0.5, 0.4 * 2 * np.pi * radius / n)   # Neighbouring nodes must not touch
+    
+    # r labels slide along their edge to avoid each other (e.g. crossing diagonals)
+    placer = LabelPlacer(ax)
+    edge_fractions = [0.4, 0.6, 0.3, 0.7, 0.25, 0.75]
     
     # Draw edges (correlation coefficients)
     for i, var1 in enumerate(variables):
@@ -1881,9 +4192,12 @@ def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Corre
                     
                     # Label correlation coefficient at edge midpoint
                     mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-                    ax.text(mid_x, mid_y, f'{r:.2f}', fontsize=9, ha='center', va='center',
-                           bbox=dict(boxstyle='round,pad=0.2', facecolor='white', 
-                                    edgecolor='#CCCCCC', alpha=0.9))
+                    label = ax.annotate(f'{r:.2f}', xy=(mid_x, mid_y), xytext=(0, 0),
+                                        textcoords='offset points', fontsize=9, ha='center', va='center',
+                                        bbox=dict(boxstyle='round,pad=0.2', facecolor='white', 
+                                                  edgecolor='#CCCCCC', alpha=0.9))
+                    placer.add(label, priority=abs(r),
+                               anchors=[(x1 + t * (x2 - x1), y1 + t * (y2 - y1)) for t in edge_fractions])
     
     # Draw nodes
     node_sizes = []
@@ -1893,8 +4207,10 @@ def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Corre
         node_sizes.append(800 + avg_corr * 1500)
     
     for var, (x, y), size in zip(variables, pos.values(), node_sizes):
-        circle = plt.Circle((x, y), 0.5, color=UNIFIED_COLORS['primary'], ec='white', linewidth=3, zorder=3)
+        circle = plt.Circle((x, y), node_radius, color=UNIFIED_COLORS['primary'], ec='white', linewidth=3,
+                            zorder=3)
         ax.add_patch(circle)
+        placer.add_obstacle(circle)
         
         # Variable label
         angle = np.arctan2(y, x)
@@ -1902,8 +4218,8 @@ def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Corre
         label_y = (radius + 0.8) * np.sin(angle)
         ha = 'left' if x >= 0 else 'right'
         
-        ax.text(label_x, label_y, var, fontsize=11, fontweight='bold',
-               ha=ha, va='center', color='#333333')
+        placer.add_obstacle(ax.text(label_x, label_y, var, fontsize=11, fontweight='bold',
+                                    ha=ha, va='center', color='#333333'))
     
     # Set range
     ax.set_xlim(-5.5, 5.5)
@@ -1922,9 +4238,13 @@ def plot_correlation_network(corr_matrix, save_path, threshold=0.3, title='Corre
     ax.text(0.5, -0.02, f'Only showing |r| ≥ {threshold}, line width indicates strength', 
            transform=ax.transAxes, ha='center', fontsize=10, color='#666666', style='italic')
     
+    emit_data_bundle(save_path, 'correlation_network',
+                     {'edges': correlation_pairs(corr_matrix, threshold)},
+                     threshold=threshold, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_mediation_diagram(a, b, c, c_prime, indirect, ci_low, ci_high, 
                           X_name, M_name, Y_name, save_path, title='Mediation Effect Path Diagram'):
     """
@@ -1939,6 +4259,7 @@ def plot_mediation_diagram(a, b, c, c_prime, indirect, ci_low, ci_high,
     print(f"Indirect Effect: {indirect} (95% CI: [{ci_low}, {ci_high}])")
 
     setup_style()
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(14, 8), facecolor='white')
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 6)
@@ -2004,26 +4325,52 @@ Direct Effect (c'): {c_prime:.4f}
     
     ax.set_title(title, fontsize=20, fontweight='bold', pad=30)
     
+    emit_data_bundle(save_path, 'mediation', {
+        'paths': pd.DataFrame({
+            'Path': ['a', 'b', 'c', "c'", 'indirect'],
+            'From': [X_name, M_name, X_name, X_name, X_name],
+            'To': [M_name, Y_name, Y_name, Y_name, Y_name],
+            'Estimate': [a, b, c, c_prime, indirect],
+        }),
+    }, ci_low=ci_low, ci_high=ci_high, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_dumbbell_chart(df, variables, var_labels, group_var, group_labels, 
-                        save_path, title='Group Difference Dumbbell Chart'):
+                        save_path, title='Group Difference Dumbbell Chart', group_means=None):
     """
     Draw Dumbbell Chart / Slope Chart
     Compare differences between groups across multiple variables
+    
+    group_means: Optional precomputed means (groups x variables, e.g. from
+                 SurveyAggregates); df is then not read
+    
+    With SIGNIFICANCE_MARKERS (and df), variable labels are marked with the
+    between-groups permutation test result.
     """
+    if group_means is None:
+        group_means = df.groupby(group_var)[variables].mean()
+    group_means = group_means[variables].sort_index()
+    tests = None
+    if SIGNIFICANCE_MARKERS and df is not None:
+        tests = permutation_test(df[variables], df[group_var])
+    
     # Log data
     print(f"\n[Data Log] Data for {title}:")
     print(f"Variables: {variables}")
     print(f"Group Variable: {group_var}")
     print("Group Means:")
-    print(df.groupby(group_var)[variables].mean())
+    print(group_means)
+    if tests is not None:
+        print("Permutation Tests:")
+        print(tests)
 
     setup_style()
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(14, len(variables) * 1.5 + 3), facecolor='white')
     
-    groups = sorted(df[group_var].unique())
+    groups = list(group_means.index)
     n_groups = len(groups)
     colors = get_unified_palette(n_groups)
     
@@ -2033,12 +4380,9 @@ def plot_dumbbell_chart(df, variables, var_labels, group_var, group_labels,
     all_means = []
     
     for i, (var, label) in enumerate(zip(variables, var_labels)):
-        # Calculate mean for each group
-        means = []
-        for group in groups:
-            group_mean = df[df[group_var] == group][var].mean()
-            means.append(group_mean)
-            all_means.append(group_mean)
+        # Mean for each group
+        means = group_means[var].tolist()
+        all_means.extend(means)
         
         # Draw connecting lines - use thicker lines
         ax.plot(means, [i] * len(means), color='#DDDDDD', linewidth=4, zorder=1, solid_capstyle='round')
@@ -2055,10 +4399,7 @@ def plot_dumbbell_chart(df, variables, var_labels, group_var, group_labels,
     
     # Add value labels outside the chart
     for i, (var, label) in enumerate(zip(variables, var_labels)):
-        means = []
-        for group in groups:
-            group_mean = df[df[group_var] == group][var].mean()
-            means.append(group_mean)
+        means = group_means[var].tolist()
         
         # Min value label on left, max value label on right
         min_idx = np.argmin(means)
@@ -2079,7 +4420,11 @@ def plot_dumbbell_chart(df, variables, var_labels, group_var, group_labels,
                        va='bottom', ha='center', color=color)
     
     ax.set_yticks(y_positions)
-    ax.set_yticklabels(var_labels, fontsize=12)
+    tick_labels = var_labels
+    if tests is not None:
+        markers = omnibus_markers(tests)
+        tick_labels = [f'{label} {markers[var]}'.strip() for var, label in zip(variables, var_labels)]
+    ax.set_yticklabels(tick_labels, fontsize=12)
     ax.set_xlabel('Mean Score', fontsize=13, fontweight='bold')
     
     # Legend - placed at the top
@@ -2096,10 +4441,27 @@ def plot_dumbbell_chart(df, variables, var_labels, group_var, group_labels,
     ax.text(0.98, 0.02, '● Line length indicates magnitude of group difference', 
            transform=ax.transAxes, ha='right', va='bottom', fontsize=10, 
            color='#666666', style='italic')
-    
+    if tests is not None:
+        ax.annotate(significance_note(), xy=(0.5, 0), xycoords='axes fraction', xytext=(0, -48),
+                    textcoords='offset points', ha='center', va='top', fontsize=10,
+                    color='#666666', style='italic')
+    
+    labelled_means = group_means.copy()
+    group_names = dict(zip(groups, [group_labels[j] if j < len(group_labels) else str(g)
+                                    for j, g in enumerate(groups)]))
+    labelled_means.index = list(group_names.values())
+    labelled_means.columns = var_labels
+    tables = {
+        'group_means': labelled_means.rename_axis('Group').reset_index()
+                                     .melt(id_vars='Group', var_name='Variable', value_name='Mean'),
+    }
+    if tests is not None:
+        tables['tests'] = labelled_tests(tests, dict(zip(variables, var_labels)), group_names)
+    emit_data_bundle(save_path, 'dumbbell', tables, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_sankey_flow(df, source_var, target_var, source_labels, target_labels,
                      save_path, title='Cognition-Intention Flow Sankey Diagram'):
     """
@@ -2113,11 +4475,12 @@ def plot_sankey_flow(df, source_var, target_var, source_labels, target_labels,
     print(pd.crosstab(df[source_var], df[target_var]))
 
     setup_style()
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(14, 10), facecolor='white')
     
-    # Prepare data
-    source_cats = sorted(df[source_var].unique())
-    target_cats = sorted(df[target_var].unique())
+    # Prepare data (answered codes only, so nullable and float columns agree)
+    source_cats = observed_groups(df[source_var])
+    target_cats = observed_groups(df[target_var])
     
     n_source = len(source_cats)
     n_target = len(target_cats)
@@ -2224,30 +4587,51 @@ def plot_sankey_flow(df, source_var, target_var, source_labels, target_labels,
     ax.axis('off')
     
     # Add title and labels
-    ax.text(0.5, -0.3, source_var, fontsize=14, fontweight='bold', ha='center')
-    ax.text(8.5, -0.3, target_var, fontsize=14, fontweight='bold', ha='center')
+    ax.text(0.5, -0.3, CODEBOOK.name(source_var), fontsize=14, fontweight='bold', ha='center')
+    ax.text(8.5, -0.3, CODEBOOK.name(target_var), fontsize=14, fontweight='bold', ha='center')
     
     ax.set_title(title, fontsize=20, fontweight='bold', pad=20)
     
+    src_names = [source_labels[i] if i < len(source_labels) else str(c) for i, c in enumerate(source_cats)]
+    tgt_names = [target_labels[j] if j < len(target_labels) else str(c) for j, c in enumerate(target_cats)]
+    src_idx, tgt_idx = np.nonzero(flow_matrix)
+    emit_data_bundle(save_path, 'sankey', {
+        'links': pd.DataFrame({'Source': [src_names[i] for i in src_idx],
+                               'Target': [tgt_names[j] for j in tgt_idx],
+                               'Value': flow_matrix[src_idx, tgt_idx].astype(int)}),
+    }, source=source_var, target=target_var, n=total, title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_radar_comparison(df, group_var, variables, var_labels, group_labels, 
                           save_path, title='Group Radar Comparison'):
     """
     Draw Group Radar Comparison Panel
+    
+    With SIGNIFICANCE_MARKERS, variable labels are marked with the
+    between-groups permutation test result (on the positive scale).
     """
+    tests = None
+    if SIGNIFICANCE_MARKERS:
+        positive = pd.DataFrame({var: CODEBOOK.positive_series(df, var) for var in variables})
+        tests = permutation_test(positive, df[group_var])
+    
     # Log data
     print(f"\n[Data Log] Data for {title}:")
     print(f"Group Variable: {group_var}")
     print("Group Means (Radar Data):")
     print(df.groupby(group_var)[variables].mean())
+    if tests is not None:
+        print("Permutation Tests:")
+        print(tests)
 
     setup_style()
     
-    groups = sorted(df[group_var].unique())
+    groups = observed_groups(df[group_var])
     n_groups = len(groups)
     
+    mark_phase('draw')
     fig = plt.figure(figsize=(6 * n_groups, 6), facecolor='white')
     
     # Color palette
@@ -2256,25 +4640,27 @@ def plot_radar_comparison(df, group_var, variables, var_labels, group_labels,
     n_vars = len(variables)
     angles = np.linspace(0, 2 * np.pi, n_vars, endpoint=False).tolist()
     angles += angles[:1]
+    radar_rows = []
+    tick_labels = var_labels
+    if tests is not None:
+        markers = omnibus_markers(tests)
+        tick_labels = [f'{label} {markers[var]}'.strip() for var, label in zip(variables, var_labels)]
     
     for i, (group, color, g_label) in enumerate(zip(groups, colors, group_labels)):
         ax = fig.add_subplot(1, n_groups, i + 1, projection='polar')
         
         group_df = df[df[group_var] == group]
         
-        # Calculate mean for each variable (convert to positive 5-point scale)
-        values = []
-        for var in variables:
-            # Assuming original score is 1-5, 1 being most positive
-            mean_val = 6 - group_df[var].mean()
-            values.append(mean_val)
+        # Calculate mean for each variable on the positive scale (higher = better)
+        values = [CODEBOOK.positive_series(group_df, var).mean() for var in variables]
+        radar_rows += [(g_label, label, val, len(group_df)) for label, val in zip(var_labels, values)]
         values += values[:1]  # Close
         
         # Set radar chart
         ax.set_theta_offset(np.pi / 2)
         ax.set_theta_direction(-1)
         ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(var_labels, fontsize=10)
+        ax.set_xticklabels(tick_labels, fontsize=10)
         ax.set_ylim(0, 5)
         ax.set_yticks([1, 2, 3, 4, 5])
         ax.set_yticklabels(['1', '2', '3', '4', '5'], fontsize=8, color='#666666')
@@ -2293,10 +4679,18 @@ def plot_radar_comparison(df, group_var, variables, var_labels, group_labels,
         add_panel_label(ax, chr(65 + i), x=0.1, y=1.15)
     
     plt.suptitle(title, fontsize=20, fontweight='bold', y=1.05)
-    plt.tight_layout()
+    tables = {'scores': pd.DataFrame(radar_rows, columns=['Group', 'Variable', 'Score', 'n'])}
+    if tests is not None:
+        fig.text(0.5, -0.02, significance_note(), ha='center', va='top', fontsize=10,
+                 color='#666666', style='italic')
+        tables['tests'] = labelled_tests(tests, dict(zip(variables, var_labels)),
+                                         dict(zip(groups, group_labels)))
+    emit_data_bundle(save_path, 'radar_comparison', tables, scale='1-5, higher = more positive', title=title)
     save_fig(fig, save_path)
 
 
+@instrument_chart
+@background_encoding()
 def create_advanced_visualization_suite(df, save_dir):
     """
     Generate complete suite of advanced visualization charts
@@ -2304,12 +4698,17 @@ def create_advanced_visualization_suite(df, save_dir):
     import os
     
     print("Generating advanced visualization suite...")
+    report_glyph_coverage([symbol_text(CHART_SYMBOLS), *map(str, df.columns)], 'chart labels')
+    
+    # Compact dtypes, packed multi-select blocks and display labels (Education_Label,
+    # ...) live in derived frames; the caller's df is not modified
+    df = pack_multi_select(compact_dtypes(df))
+    labelled = with_label_columns(df)
     
     # 1. Raincloud Plot: Attitude distribution by education level
     print("  ✓ Raincloud Plot...")
-    df['Education_Label'] = df['在学类别'].map({1: 'Undergraduate', 2: 'Master', 3: 'PhD'})
     if '态度' in df.columns:
-        plot_raincloud(df, '态度', 'Education_Label', 'Attitude Score', 'Education Level',
+        plot_raincloud(labelled, '态度', 'Education_Label', 'Attitude Score', 'Education Level',
                       os.path.join(save_dir, 'Advanced_Raincloud_Attitude_x_Education.png'),
                       'Attitude Distribution by Education Level')
     
@@ -2317,9 +4716,7 @@ def create_advanced_visualization_suite(df, save_dir):
     print("  ✓ Ridgeline Plot...")
     core_vars = ['认知指数', '责任感指数', '信任指数', '政策认同指数']
     core_vars_exist = [v for v in core_vars if v in df.columns]
-    var_labels_map = {'认知指数': 'Knowledge Index', '责任感指数': 'Responsibility Index', 
-                      '信任指数': 'Trust Index', '政策认同指数': 'Policy Support Index'}
-    core_vars_labels = [var_labels_map.get(v, v) for v in core_vars_exist]
+    core_vars_labels = CODEBOOK.names(core_vars_exist)
     
     if core_vars_exist:
         plot_ridgeline(df, core_vars_exist, core_vars_labels,
@@ -2329,7 +4726,7 @@ def create_advanced_visualization_suite(df, save_dir):
     print("  ✓ Dumbbell Chart...")
     if core_vars_exist and '在学类别' in df.columns:
         plot_dumbbell_chart(df, core_vars_exist, core_vars_labels,
-                           '在学类别', ['Undergraduate', 'Master', 'PhD'],
+                           '在学类别', CODEBOOK.labels('在学类别'),
                            os.path.join(save_dir, 'Advanced_Dumbbell_Education_Comparison.png'),
                            'Core Variables Comparison by Education')
     
@@ -2337,29 +4734,27 @@ def create_advanced_visualization_suite(df, save_dir):
     print("  ✓ Group Radar Chart...")
     trust_vars = ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', 
                  '激励政策认同度', '限油推新支持度']
-    trust_labels = ['Tech Trust', 'NEV Tech', 'Policy Exec', 'Policy Support', 'Limit Oil']
+    trust_labels = CODEBOOK.names(trust_vars)
     
     # Group by Energy Experience
     if '能源经历' in df.columns:
-        df['Experience_Label'] = df['能源经历'].map({1: 'Experienced', 2: 'No Experience'})
-        plot_radar_comparison(df, 'Experience_Label', trust_vars, trust_labels,
-                             ['Experienced', 'No Experience'],
+        plot_radar_comparison(labelled, 'Experience_Label', trust_vars, trust_labels,
+                             CODEBOOK.labels('能源经历'),
                              os.path.join(save_dir, 'Advanced_Radar_Energy_Experience.png'),
                              'Impact of Energy Experience on Trust')
     
     # Group by Gender
     if '性别' in df.columns:
-        df['Gender_Label'] = df['性别'].map({1: 'Male', 2: 'Female'})
-        plot_radar_comparison(df, 'Gender_Label', trust_vars, trust_labels,
-                             ['Male', 'Female'],
+        plot_radar_comparison(labelled, 'Gender_Label', trust_vars, trust_labels,
+                             CODEBOOK.labels('性别'),
                              os.path.join(save_dir, 'Advanced_Radar_Gender.png'),
                              'Impact of Gender on Trust and Policy Support')
     
     # 5. Cognition-Intention Flow Chart
     print("  ✓ Sankey Flow Chart...")
     if '能源转型了解度' in df.columns and '5年内购车意愿' in df.columns:
-        source_labels = ['Very Familiar', 'Familiar', 'Neutral', 'Unfamiliar', 'Very Unfamiliar']
-        target_labels = ['Very Likely', 'Likely', 'Uncertain', 'Unlikely', 'Very Unlikely']
+        source_labels = CODEBOOK.labels('能源转型了解度')
+        target_labels = CODEBOOK.labels('5年内购车意愿')
         plot_sankey_flow(df, '能源转型了解度', '5年内购车意愿',
                         source_labels, target_labels,
                         os.path.join(save_dir, 'Advanced_Sankey_Knowledge_to_Intention.png'),
@@ -2384,21 +4779,175 @@ def create_advanced_visualization_suite(df, save_dir):
     print("  ✓ Awareness Space PCA Scatter Plot...")
     plot_awareness_pca(df, save_dir)
     
-    # 10. SEM Style Path Diagram
-    print("  ✓ SEM Path Diagram...")
-    plot_sem_path_diagram(df, save_dir)
+    # 10. SEM Style Path Diagram
+    print("  ✓ SEM Path Diagram...")
+    plot_sem_path_diagram(df, save_dir)
+    
+    # 11. Risk-Intention Relationship Chart
+    print("  ✓ Risk-Intention Relationship Chart...")
+    plot_risk_intention_chart(df, save_dir)
+    
+    # 12. Latent class segmentation: segment profiles and segments in the awareness space
+    print("  ✓ Latent Class Segmentation...")
+    if any(item in df.columns for item in SEGMENT_ITEMS):
+        model, members = segment_respondents(df)
+        plot_segment_profiles(df, save_dir, model=model, memberships=members)
+        plot_awareness_pca(df, save_dir, segments=members['Segment'], output='Advanced_Awareness_PCA_Segments.png')
+    
+    # Wait for background image writes and surface any failures
+    n_written = flush_encoders()
+    print(f"  ✓ {n_written} image writes flushed")
+    
+    print("Advanced visualization suite generation completed!")
+
+
+# ============================================================================
+# Upgraded Advanced Visualization Functions
+# ============================================================================
+
+def compute_alluvial_flows(df, stages):
+    """
+    Count nodes and adjacent-stage flows for an alluvial diagram in one pass
+    
+    Args:
+        df: DataFrame holding the stage columns (not modified)
+        stages: Ordered list of stage column names (any number >= 2)
+    
+    Returns:
+        categories: List of category labels per stage (categorical order, or sorted)
+        node_counts: List of 1D count arrays, one per stage
+        flow_counts: List of 2D arrays, flow_counts[k][i, j] = rows going from
+                     category i of stage k to category j of stage k + 1
+    """
+    categories = []
+    code_columns = []
+    for stage in stages:
+        series = df[stage]
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        categories.append(list(series.cat.categories))
+        code_columns.append(series.cat.codes.to_numpy(dtype=np.int64))
+    
+    codes = np.column_stack(code_columns)  # (n_rows, n_stages), -1 = missing
+    sizes = np.array([len(c) for c in categories], dtype=np.int64)
+    
+    # Node counts: one bincount over all stages, offset into a shared index space
+    node_offsets = np.concatenate([[0], np.cumsum(sizes)])
+    valid = codes >= 0
+    node_index = (codes + node_offsets[:-1])[valid]
+    node_flat = np.bincount(node_index, minlength=node_offsets[-1])
+    node_counts = [node_flat[node_offsets[k]:node_offsets[k + 1]] for k in range(len(stages))]
+    
+    # Flow counts: encode every adjacent pair (k, k+1) as one flat index, one bincount
+    pair_sizes = sizes[:-1] * sizes[1:]
+    pair_offsets = np.concatenate([[0], np.cumsum(pair_sizes)])
+    pair_valid = valid[:, :-1] & valid[:, 1:]
+    pair_index = codes[:, :-1] * sizes[1:] + codes[:, 1:] + pair_offsets[:-1]
+    flow_flat = np.bincount(pair_index[pair_valid], minlength=pair_offsets[-1])
+    flow_counts = [flow_flat[pair_offsets[k]:pair_offsets[k + 1]].reshape(sizes[k], sizes[k + 1])
+                   for k in range(len(stages) - 1)]
+    
+    return categories, node_counts, flow_counts
+
+
+def draw_alluvial(ax, df, stages, stage_names=None, level_colors=None,
+                  node_width=0.06, y_start=0.1, y_end=0.9, n_curve_points=32):
+    """
+    Draw an N-stage alluvial diagram on ax
+    
+    Nodes are stacked bottom-up in category order; all ribbons are emitted as a
+    single PolyCollection so rendering cost does not grow with one patch per flow.
+    Returns the output of compute_alluvial_flows.
+    """
+    from matplotlib.collections import PolyCollection
+    
+    stage_names = stage_names or list(stages)
+    level_colors = level_colors or {}
+    categories, node_counts, flow_counts = compute_alluvial_flows(df, stages)
+    
+    n_stages = len(stages)
+    stage_x = np.linspace(0.1, 0.9, n_stages)
+    y_range = y_end - y_start
+    half_w = node_width / 2
+    
+    # Node geometry: bottom edge and height of every category at every stage
+    node_bottoms = []
+    node_heights = []
+    for stage_idx, (counts, cats, stage_name) in enumerate(zip(node_counts, categories, stage_names)):
+        x = stage_x[stage_idx]
+        total = counts.sum()
+        heights = counts / total * y_range if total > 0 else np.zeros(len(counts))
+        bottoms = y_start + np.concatenate([[0], np.cumsum(heights)[:-1]])
+        node_bottoms.append(bottoms)
+        node_heights.append(heights)
+        
+        for cat, count, bottom, height in zip(cats, counts, bottoms, heights):
+            if count == 0:
+                continue
+            color = level_colors.get(cat, '#95A5A6')
+            rect = plt.Rectangle((x - half_w, bottom), node_width, height,
+                                 facecolor=color, edgecolor='white', linewidth=2, alpha=0.85)
+            ax.add_patch(rect)
+            
+            if height > 0.05:
+                ax.text(x, bottom + height / 2, f'{cat}\n({count})', ha='center', va='center',
+                       fontsize=9, fontweight='bold', color='white')
+        
+        # Stage title
+        ax.text(x, 0.02, stage_name, ha='center', va='bottom', fontsize=13,
+               fontweight='bold', color='#2C3E50')
+    
+    # Ribbon geometry for all stage pairs, computed as arrays
+    t = np.linspace(0, 1, n_curve_points)
+    # Cubic Bezier weights with control points at 40% of the gap (x) and flat tangents (y)
+    w0, w1, w2, w3 = (1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3
+    ease = w2 + w3  # y blend factor between source and target
+    
+    polygons = []
+    face_colors = []
+    for stage_idx, flows in enumerate(flow_counts):
+        src_total = node_counts[stage_idx].sum()
+        if src_total == 0:
+            continue
+        heights = flows / src_total * y_range
+        
+        # Stack flows inside source nodes by target order, and inside target nodes by source order
+        src_y = node_bottoms[stage_idx][:, None] + np.cumsum(heights, axis=1) - heights
+        dst_y = node_bottoms[stage_idx + 1][None, :] + np.cumsum(heights, axis=0) - heights
+        
+        src_idx, dst_idx = np.nonzero(flows)
+        if len(src_idx) == 0:
+            continue
+        h = heights[src_idx, dst_idx][:, None]
+        y0 = src_y[src_idx, dst_idx][:, None]
+        y1 = dst_y[src_idx, dst_idx][:, None]
+        
+        x1 = stage_x[stage_idx] + half_w
+        x2 = stage_x[stage_idx + 1] - half_w
+        x_offset = (x2 - x1) * 0.4
+        curve_x = w0 * x1 + w1 * (x1 + x_offset) + w2 * (x2 - x_offset) + w3 * x2
+        bottom_y = y0 + (y1 - y0) * ease
+        
+        n_flows = len(src_idx)
+        xs = np.broadcast_to(np.concatenate([curve_x, curve_x[::-1]]), (n_flows, 2 * n_curve_points))
+        ys = np.concatenate([bottom_y, (bottom_y + h)[:, ::-1]], axis=1)
+        polygons.append(np.stack([xs, ys], axis=-1))
+        
+        src_cats = categories[stage_idx]
+        face_colors.extend(level_colors.get(src_cats[i], '#95A5A6') for i in src_idx)
     
-    # 11. Risk-Intention Relationship Chart
-    print("  ✓ Risk-Intention Relationship Chart...")
-    plot_risk_intention_chart(df, save_dir)
+    if polygons:
+        ribbons = PolyCollection(np.concatenate(polygons), facecolors=face_colors,
+                                 edgecolors='white', linewidths=0.5, alpha=0.6, zorder=1)
+        ax.add_collection(ribbons)
     
-    print("Advanced visualization suite generation completed!")
-
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
+    return categories, node_counts, flow_counts
 
-# ============================================================================
-# Upgraded Advanced Visualization Functions
-# ============================================================================
 
+@instrument_chart
 def plot_multi_stage_alluvial(df, save_dir):
     """
     Multi-stage Alluvial/Sankey Diagram: Knowledge -> Trust -> Attitude -> Intention
@@ -2411,54 +4960,54 @@ def plot_multi_stage_alluvial(df, save_dir):
     
     setup_style()
     
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(18, 12), facecolor='white')
     
     # Prepare data: Discretize continuous variables into 3 levels
     def discretize(series, labels=['Low', 'Medium', 'High']):
         try:
-            return pd.qcut(series, q=3, labels=labels, duplicates='drop')
+            grouped = pd.qcut(series, q=3, labels=labels, duplicates='drop')
         except:
             # If quantiles are the same, use cut
-            return pd.cut(series, bins=3, labels=labels)
+            grouped = pd.cut(series, bins=3, labels=labels)
+        # Stack High at the bottom of each stage
+        return grouped.cat.reorder_categories(labels[::-1])
     
-    # Variables for four stages
-    stages = []
+    # Stage columns are kept local; the caller's DataFrame is not modified
+    stage_data = {}
     stage_names = []
     
     # Stage 1: Knowledge Level
     if '认知指数' in df.columns:
-        df['Knowledge_Group'] = discretize(df['认知指数'], ['Low Know.', 'Med Know.', 'High Know.'])
-        stages.append('Knowledge_Group')
+        stage_data['Knowledge_Group'] = discretize(df['认知指数'], ['Low Know.', 'Med Know.', 'High Know.'])
         stage_names.append('Knowledge Level')
     
     # Stage 2: Trust Level
     if '信任指数' in df.columns:
-        df['Trust_Group'] = discretize(df['信任指数'], ['Low Trust', 'Med Trust', 'High Trust'])
-        stages.append('Trust_Group')
+        stage_data['Trust_Group'] = discretize(df['信任指数'], ['Low Trust', 'Med Trust', 'High Trust'])
         stage_names.append('Trust Level')
     
     # Stage 3: Attitude
     if '态度' in df.columns:
-        df['Attitude_Group'] = discretize(df['态度'], ['Low Att.', 'Med Att.', 'High Att.'])
-        stages.append('Attitude_Group')
+        stage_data['Attitude_Group'] = discretize(df['态度'], ['Low Att.', 'Med Att.', 'High Att.'])
         stage_names.append('Attitude Level')
     
     # Stage 4: Purchase Intention
     if '5年内购车意愿' in df.columns:
         intention_map = {1: 'High Int.', 2: 'High Int.', 3: 'Med Int.', 4: 'Low Int.', 5: 'Low Int.'}
-        df['Intention_Group'] = df['5年内购车意愿'].map(intention_map)
-        stages.append('Intention_Group')
+        stage_data['Intention_Group'] = pd.Categorical(df['5年内购车意愿'].map(intention_map),
+                                                       categories=['High Int.', 'Med Int.', 'Low Int.'])
         stage_names.append('Purchase Intention')
     
+    stages = list(stage_data.keys())
+    
     if len(stages) < 3:
         ax.text(0.5, 0.5, 'Insufficient data to generate multi-stage alluvial plot', ha='center', va='center', fontsize=14)
 
         save_fig(fig, os.path.join(save_dir, 'Advanced_Multi_Stage_Alluvial.png'))
         return
     
-    # Calculate categories and positions for each stage
-    n_stages = len(stages)
-    stage_x = np.linspace(0.1, 0.9, n_stages)
+    stage_frame = pd.DataFrame(stage_data, index=df.index)
     
     # Color scheme
     level_colors = {
@@ -2469,143 +5018,7 @@ def plot_multi_stage_alluvial(df, save_dir):
         'High Int.': UNIFIED_COLORS['positive'], 'Med Int.': UNIFIED_COLORS['neutral'], 'Low Int.': UNIFIED_COLORS['negative'],
     }
     
-    # Draw nodes for each stage
-    node_positions = {}  # Store position of each node
-    
-    for stage_idx, (stage, stage_name) in enumerate(zip(stages, stage_names)):
-        x = stage_x[stage_idx]
-        categories = df[stage].dropna().unique()
-        # Order: High, Medium, Low
-        order = ['High', 'Medium', 'Low']
-        categories = sorted(categories, key=lambda c: next((i for i, o in enumerate(order) if o in str(c)), 99))
-        
-        counts = df[stage].value_counts()
-        total = counts.sum()
-        
-        # Calculate y position for each category
-        y_start = 0.1
-        y_end = 0.9
-        y_range = y_end - y_start
-        
-        current_y = y_start
-        for cat in categories:
-            count = counts.get(cat, 0)
-            height = (count / total) * y_range
-            
-            # Node center position
-            node_y = current_y + height / 2
-            node_positions[(stage_idx, cat)] = (x, node_y, height)
-            
-            # Draw node (rectangle)
-            color = level_colors.get(cat, '#95A5A6')
-            rect = plt.Rectangle((x - 0.03, current_y), 0.06, height,
-                                 facecolor=color, edgecolor='white', linewidth=2, alpha=0.85)
-            ax.add_patch(rect)
-            
-            # Add label
-            if height > 0.05:
-                ax.text(x, node_y, f'{cat}\n({count})', ha='center', va='center',
-                       fontsize=9, fontweight='bold', color='white')
-            
-            current_y += height
-        
-        # Stage title
-        ax.text(x, 0.02, stage_name, ha='center', va='bottom', fontsize=13, 
-               fontweight='bold', color='#2C3E50')
-    
-    # Draw flows (filled areas, like Sankey)
-    from matplotlib.path import Path
-    import matplotlib.patches as mpatches
-    
-    y_range = 0.8  # Consistent with node drawing range
-    total_n = len(df)
-    
-    # Track flow positions for connections between stages
-    # Need to track: right exit position of left node, left entry position of right node
-    for stage_idx in range(n_stages - 1):
-        stage1, stage2 = stages[stage_idx], stages[stage_idx + 1]
-        
-        # Initialize flow position tracking for current stage connection
-        # Left node: accumulate from bottom
-        left_flow_pos = {}
-        for cat in df[stage1].dropna().unique():
-            key = (stage_idx, cat)
-            if key in node_positions:
-                x, y_center, h = node_positions[key]
-                left_flow_pos[cat] = y_center - h / 2  # Start from bottom
-        
-        # Right node: accumulate from bottom
-        right_flow_pos = {}
-        for cat in df[stage2].dropna().unique():
-            key = (stage_idx + 1, cat)
-            if key in node_positions:
-                x, y_center, h = node_positions[key]
-                right_flow_pos[cat] = y_center - h / 2  # Start from bottom
-        
-        # Calculate flow volume
-        flow_data = df.groupby([stage1, stage2]).size().reset_index(name='count')
-        
-        for _, row in flow_data.iterrows():
-            cat1, cat2, count = row[stage1], row[stage2], row['count']
-            
-            if pd.isna(cat1) or pd.isna(cat2):
-                continue
-            
-            pos1 = node_positions.get((stage_idx, cat1))
-            pos2 = node_positions.get((stage_idx + 1, cat2))
-            
-            if pos1 is None or pos2 is None:
-                continue
-            
-            x1, y1_center, h1 = pos1
-            x2, y2_center, h2 = pos2
-            
-            # Flow height proportional to count (consistent with node height calculation)
-            flow_height = (count / total_n) * y_range
-            
-            # Get current flow position
-            y0 = left_flow_pos.get(cat1, y1_center - h1 / 2)
-            y1 = right_flow_pos.get(cat2, y2_center - h2 / 2)
-            
-            # Update flow position
-            left_flow_pos[cat1] = y0 + flow_height
-            right_flow_pos[cat2] = y1 + flow_height
-            
-            # Use source node color
-            color = level_colors.get(cat1, '#95A5A6')
-            
-            # Control point x offset (make curve smoother)
-            x_offset = (x2 - x1) * 0.4
-            
-            # Draw filled area (closed Bezier curve path)
-            verts = [
-                (x1 + 0.03, y0),  # Bottom left
-                (x1 + 0.03 + x_offset, y0),  # Control point 1
-                (x2 - 0.03 - x_offset, y1),  # Control point 2
-                (x2 - 0.03, y1),  # Bottom right
-                (x2 - 0.03, y1 + flow_height),  # Top right
-                (x2 - 0.03 - x_offset, y1 + flow_height),  # Control point 3
-                (x1 + 0.03 + x_offset, y0 + flow_height),  # Control point 4
-                (x1 + 0.03, y0 + flow_height),  # Top left
-                (x1 + 0.03, y0)  # Close
-            ]
-            
-            codes = [
-                Path.MOVETO,
-                Path.CURVE4, Path.CURVE4, Path.CURVE4,
-                Path.LINETO,
-                Path.CURVE4, Path.CURVE4, Path.CURVE4,
-                Path.CLOSEPOLY
-            ]
-            
-            path = Path(verts, codes)
-            patch = mpatches.PathPatch(path, facecolor=color, edgecolor='white',
-                                       linewidth=0.5, alpha=0.6)
-            ax.add_patch(patch)
-    
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.axis('off')
+    categories, _, flow_counts = draw_alluvial(ax, stage_frame, stages, stage_names, level_colors)
     
     ax.set_title('Knowledge -> Trust -> Attitude -> Intention Multi-stage Flow\n(Mediation Path Visualization)', 
                 fontsize=18, fontweight='bold', pad=20)
@@ -2619,49 +5032,68 @@ def plot_multi_stage_alluvial(df, save_dir):
     ax.legend(handles=legend_elements, loc='upper left', fontsize=10, 
              title='Level Category', title_fontsize=11)
     
+    flow_rows = []
+    for k, flows in enumerate(flow_counts):
+        for i, j in zip(*np.nonzero(flows)):
+            flow_rows.append((stage_names[k], categories[k][i], stage_names[k + 1],
+                              categories[k + 1][j], int(flows[i, j])))
+    emit_data_bundle(os.path.join(save_dir, 'Advanced_Multi_Stage_Alluvial.png'), 'multi_stage_alluvial', {
+        'flows': pd.DataFrame(flow_rows, columns=['From Stage', 'From', 'To Stage', 'To', 'Count']),
+    }, n=len(df))
     save_fig(fig, os.path.join(save_dir, 'Advanced_Multi_Stage_Alluvial.png'))
 
 
-def plot_chord_diagram(df, save_dir):
+CHORD_TANGENTIAL_LABELS = 10    # More nodes than this get radial labels outside the ring
+
+
+@instrument_chart
+def plot_chord_diagram(df, save_dir, matrix=None, output='Advanced_Variable_Chord.png',
+                       title='Core Variable Correlation Chord Diagram', threshold=0.3):
     """
     Variable Relationship Chord Diagram
-    Visualizing correlations between core variables
+    Visualizing correlations between core variables, or between the items of a
+    precomputed symmetric matrix (e.g. phi associations) when matrix is given
     """
     import os
+    
+    if matrix is None:
+        # Select core variables
+        core_vars = ['认知指数', '责任感指数', '信任指数', '政策认同指数', '态度', '购车意愿']
+        var_labels = ['Knowledge', 'Responsibility', 'Trust', 'Policy', 'Attitude', 'Intention']
+        
+        # Column views of the caller's data; Intention is the positive-scale 5-year
+        # intention (precomputed by CODEBOOK.apply, else recoded locally)
+        core_columns = {v: df[v] for v in core_vars if v in df.columns}
+        if '购车意愿' not in core_columns and '5年内购车意愿' in df.columns:
+            core_columns['购车意愿'] = CODEBOOK.positive_series(df, '5年内购车意愿')
+        core_data = pd.DataFrame(core_columns, columns=[v for v in core_vars if v in core_columns])
+        
+        available_vars = list(core_data.columns)
+        available_labels = [var_labels[core_vars.index(v)] for v in available_vars]
+        corr_matrix = core_data.corr()
+    else:
+        available_vars = available_labels = list(matrix.columns)
+        corr_matrix = matrix
+    
     # Log data
     print(f"\n[Data Log] Data for Chord Diagram:")
-    core_vars = ['认知指数', '责任感指数', '信任指数', '政策认同指数', '态度', '购车意愿']
-    available_vars = [v for v in core_vars if v in df.columns]
     print(f"Variables: {available_vars}")
     if available_vars:
         print("Correlation Matrix:")
-        print(df[available_vars].corr())
+        print(corr_matrix)
 
     setup_style()
     
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(14, 14), facecolor='white', subplot_kw=dict(projection='polar'))
     
-    # Select core variables
-    core_vars = ['认知指数', '责任感指数', '信任指数', '政策认同指数', '态度', '购车意愿']
-    var_labels = ['Knowledge', 'Responsibility', 'Trust', 'Policy', 'Attitude', 'Intention']
-    
-    # If Intention doesn't exist but 5-year intention does, create it
-    if '购车意愿' not in df.columns and '5年内购车意愿' in df.columns:
-        df['购车意愿'] = 6 - df['5年内购车意愿']  # Reverse coding
-    
-    available_vars = [v for v in core_vars if v in df.columns]
-    available_labels = [var_labels[i] for i, v in enumerate(core_vars) if v in df.columns]
-    
     if len(available_vars) < 3:
         ax.text(0.5, 0.5, 'Insufficient data to generate chord diagram', ha='center', va='center', fontsize=14)
-        save_fig(fig, os.path.join(save_dir, 'Advanced_Variable_Chord.png'))
+        save_fig(fig, os.path.join(save_dir, output))
         return
     
     n_vars = len(available_vars)
     
-    # Calculate correlation matrix
-    corr_matrix = df[available_vars].corr()
-    
     # Node positions (evenly distributed on circle)
     angles = np.linspace(0, 2 * np.pi, n_vars, endpoint=False)
     
@@ -2681,17 +5113,22 @@ def plot_chord_diagram(df, save_dir):
         if angle > np.pi/2 and angle < 3*np.pi/2:
             rotation += 180
         
-        ax.text(angle, 1.15, label, ha='center', va='center', fontsize=12, fontweight='bold',
-               rotation=rotation, rotation_mode='anchor')
-    
-    # Draw chords (correlations)
-    threshold = 0.3  # Only show |r|>0.3
+        if n_vars <= CHORD_TANGENTIAL_LABELS:
+            ax.text(angle, 1.15, label, ha='center', va='center', fontsize=12, fontweight='bold',
+                   rotation=rotation, rotation_mode='anchor')
+        else:
+            # Many nodes: radial labels outside the ring so neighbours don't collide
+            flip = np.pi / 2 < angle < 3 * np.pi / 2
+            ax.text(angle, 1.34, label, ha='right' if flip else 'left', va='center', fontsize=10,
+                   fontweight='bold', rotation=np.degrees(angle) + (180 if flip else 0),
+                   rotation_mode='anchor')
     
+    # Draw chords (correlations); only |r| >= threshold is shown
     for i in range(n_vars):
         for j in range(i + 1, n_vars):
             r = corr_matrix.iloc[i, j]
             
-            if abs(r) < threshold:
+            if not abs(r) >= threshold:   # also skips NaN (undefined) entries
                 continue
             
             angle1, angle2 = angles[i], angles[j]
@@ -2743,7 +5180,8 @@ def plot_chord_diagram(df, save_dir):
     ax.set_ylim(0, 1.3)
     ax.axis('off')
     
-    ax.set_title('Core Variable Correlation Chord Diagram\n(Relationships |r|>0.3)', fontsize=18, fontweight='bold', y=1.05)
+    ax.set_title(f'{title}\n(Relationships |r|>{threshold:g})', fontsize=18, fontweight='bold',
+                 y=1.05 if n_vars <= CHORD_TANGENTIAL_LABELS else 1.15)
     
     # Add legend
     from matplotlib.lines import Line2D
@@ -2754,9 +5192,14 @@ def plot_chord_diagram(df, save_dir):
     ax.legend(handles=legend_elements, loc='lower right', fontsize=11,
              bbox_to_anchor=(1.1, -0.05))
     
-    save_fig(fig, os.path.join(save_dir, 'Advanced_Variable_Chord.png'))
+    labelled_corr = corr_matrix.set_axis(available_labels, axis=0).set_axis(available_labels, axis=1)
+    emit_data_bundle(os.path.join(save_dir, output), 'chord', {
+        'chords': correlation_pairs(labelled_corr, threshold),
+    }, threshold=threshold)
+    save_fig(fig, os.path.join(save_dir, output))
 
 
+@instrument_chart
 def plot_respondent_clustermap(df, save_dir):
     """
     Respondent Cluster Heatmap
@@ -2781,21 +5224,21 @@ def plot_respondent_clustermap(df, save_dir):
     for item in trust_items:
         if item in df.columns:
             key_items.append(item)
-            item_labels.append(item.replace('度', '').replace('技术', 'Tech ').replace('新能源汽车', 'NEV ').replace('政策执行', 'Policy Exec ').replace('信任', 'Trust'))
+            item_labels.append(CODEBOOK.name(item))
     
     # Attitude related
     attitude_items = ['转型支持度', '碳中和支持度', '新能源汽车态度']
     for item in attitude_items:
         if item in df.columns:
             key_items.append(item)
-            item_labels.append(item.replace('度', '').replace('转型', 'Trans ').replace('支持', 'Support').replace('碳中和', 'Carbon Neutral ').replace('新能源汽车', 'NEV ').replace('态度', 'Attitude'))
+            item_labels.append(CODEBOOK.name(item))
     
     # Policy related
     policy_items = ['激励政策认同度', '限油推新支持度']
     for item in policy_items:
         if item in df.columns:
             key_items.append(item)
-            item_labels.append(item.replace('度', '').replace('激励政策', 'Incentive ').replace('认同', 'Approval').replace('限油推新', 'Fuel Limit ').replace('支持', 'Support'))
+            item_labels.append(CODEBOOK.name(item))
     
     if len(key_items) < 4:
         fig, ax = plt.subplots(figsize=(10, 8))
@@ -2803,16 +5246,18 @@ def plot_respondent_clustermap(df, save_dir):
         save_fig(fig, os.path.join(save_dir, 'Advanced_Respondent_Cluster.png'))
         return
     
-    # Prepare data matrix
-    data_matrix = df[key_items].copy()
+    # Prepare data matrix (column views; rescaled columns are new series)
+    data_matrix = df[key_items]
     
     # Convert to positive scoring (if needed) and normalize to 1-5
-    for col in data_matrix.columns:
-        if data_matrix[col].max() > 5:
-            data_matrix[col] = (data_matrix[col] - data_matrix[col].min()) / (data_matrix[col].max() - data_matrix[col].min()) * 4 + 1
+    col_min, col_max = data_matrix.min(), data_matrix.max()
+    rescale = [col for col in key_items if col_max[col] > 5]
+    if rescale:
+        data_matrix = data_matrix.assign(**{
+            col: (data_matrix[col] - col_min[col]) / (col_max[col] - col_min[col]) * 4 + 1 for col in rescale})
     
-    # Handle missing values
-    data_matrix = data_matrix.dropna()
+    # Handle missing values (float: nullable Int8 columns would reach seaborn as objects)
+    data_matrix = data_matrix.dropna().astype(float)
     
     if len(data_matrix) < 10:
         fig, ax = plt.subplots(figsize=(10, 8))
@@ -2821,6 +5266,7 @@ def plot_respondent_clustermap(df, save_dir):
         return
     
     # Use seaborn clustermap
+    mark_phase('draw')
     # Custom colormap
     cmap = sns.diverging_palette(250, 15, s=75, l=40, n=9, center='light', as_cmap=True)
     
@@ -2847,20 +5293,31 @@ def plot_respondent_clustermap(df, save_dir):
     g.ax_cbar.set_ylabel('Score (1-5)', fontsize=10)
     
     # Save
-    g.savefig(os.path.join(save_dir, 'Advanced_Respondent_Cluster.png'), 
-              dpi=FIGURE_DPI, bbox_inches='tight', facecolor='white')
-    plt.close()
+    emit_data_bundle(os.path.join(save_dir, 'Advanced_Respondent_Cluster.png'), 'respondent_cluster', {
+        'item_summary': pd.DataFrame({'Item': item_labels,
+                                      'Mean': data_matrix.mean().values,
+                                      'Std': data_matrix.std().values}),
+        'item_order': pd.DataFrame({'Item': [item_labels[i] for i in g.dendrogram_col.reordered_ind]}),
+    }, n=len(data_matrix))
+    # seaborn has already positioned the clustermap axes, so no tight_layout pass
+    save_fig(g.fig, os.path.join(save_dir, 'Advanced_Respondent_Cluster.png'), relayout=False)
 
 
-def plot_awareness_pca(df, save_dir):
+@instrument_chart
+def plot_awareness_pca(df, save_dir, segments=None, output='Advanced_Awareness_PCA.png'):
     """
     Awareness Space PCA Scatter Plot
     Reducing multi-dimensional variables to 2D, showing respondents' "awareness map"
+    
+    segments: Optional segment numbers aligned with df (e.g. the 'Segment' column of
+        segment_respondents memberships); points are then coloured by segment
+        instead of purchase intention
     """
     import os
     from sklearn.preprocessing import StandardScaler
     from sklearn.decomposition import PCA
     
+    save_path = os.path.join(save_dir, output)
     # Log data
     print(f"\n[Data Log] Data for Awareness PCA:")
     pca_vars = ['认知指数', '责任感指数', '信任指数', '政策认同指数']
@@ -2872,6 +5329,7 @@ def plot_awareness_pca(df, save_dir):
 
     setup_style()
     
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(14, 12), facecolor='white')
     
     # Select variables for PCA
@@ -2880,7 +5338,7 @@ def plot_awareness_pca(df, save_dir):
     
     if len(available_vars) < 3:
         ax.text(0.5, 0.5, 'Insufficient data for PCA analysis', ha='center', va='center', fontsize=14)
-        save_fig(fig, os.path.join(save_dir, 'Advanced_Awareness_PCA.png'))
+        save_fig(fig, save_path)
         return
     
     # Prepare data
@@ -2888,7 +5346,7 @@ def plot_awareness_pca(df, save_dir):
     
     if len(pca_data) < 20:
         ax.text(0.5, 0.5, 'Insufficient valid samples', ha='center', va='center', fontsize=14)
-        save_fig(fig, os.path.join(save_dir, 'Advanced_Awareness_PCA.png'))
+        save_fig(fig, save_path)
         return
     
     # Standardization
@@ -2915,21 +5373,27 @@ def plot_awareness_pca(df, save_dir):
         pca_df['Experience'] = df.loc[pca_df.index, '能源经历'].map(exp_map)
     
     # Color and marker mapping
-    intention_colors = {'High Int.': UNIFIED_COLORS['positive'], 'Med Int.': UNIFIED_COLORS['neutral'], 'Low Int.': UNIFIED_COLORS['negative']}
+    color_column, legend_title = 'Intention', 'Intention / Experience'
+    group_colors = {'High Int.': UNIFIED_COLORS['positive'], 'Med Int.': UNIFIED_COLORS['neutral'], 'Low Int.': UNIFIED_COLORS['negative']}
+    if segments is not None:
+        pca_df['Segment'] = segments.reindex(pca_df.index).map(lambda k: f'Segment {k}' if pd.notna(k) else k)
+        present = sorted(pca_df['Segment'].dropna().unique(), key=lambda name: int(name.split()[-1]))
+        color_column, legend_title = 'Segment', 'Segment / Experience'
+        group_colors = dict(zip(present, get_unified_palette(len(present))))
     exp_markers = {'Exp.': 'o', 'No Exp.': 's'}
     
     # Draw scatter plot
-    for intention in ['High Int.', 'Med Int.', 'Low Int.']:
+    for group in group_colors:
         for exp in ['Exp.', 'No Exp.']:
-            mask = (pca_df['Intention'] == intention) & (pca_df['Experience'] == exp)
+            mask = (pca_df[color_column] == group) & (pca_df['Experience'] == exp)
             subset = pca_df[mask]
             
             if len(subset) > 0:
                 ax.scatter(subset['PC1'], subset['PC2'],
-                          c=intention_colors.get(intention, '#95A5A6'),
+                          c=group_colors.get(group, '#95A5A6'),
                           marker=exp_markers.get(exp, 'o'),
                           s=120, alpha=0.7, edgecolors='white', linewidths=1.5,
-                          label=f'{intention} / {exp}')
+                          label=f'{group} / {exp}')
     
     # Add quadrant lines
     ax.axhline(y=0, color='#BDC3C7', linestyle='--', linewidth=1, alpha=0.7)
@@ -2939,14 +5403,14 @@ def plot_awareness_pca(df, save_dir):
     xlim = ax.get_xlim()
     ylim = ax.get_ylim()
     
-    ax.text(xlim[1]*0.7, ylim[1]*0.8, 'High Trust/Resp.', fontsize=11, 
-           color=UNIFIED_COLORS['positive'], fontweight='bold', alpha=0.8)
-    ax.text(xlim[0]*0.7, ylim[1]*0.8, 'Low Trust/High Resp.', fontsize=11, 
-           color=UNIFIED_COLORS['neutral'], fontweight='bold', alpha=0.8)
-    ax.text(xlim[0]*0.7, ylim[0]*0.8, 'Low Trust/Low Resp.', fontsize=11, 
-           color=UNIFIED_COLORS['negative'], fontweight='bold', alpha=0.8)
-    ax.text(xlim[1]*0.7, ylim[0]*0.8, 'High Trust/Low Resp.', fontsize=11, 
-           color=UNIFIED_COLORS['primary'], fontweight='bold', alpha=0.8)
+    # Loading names below stay clear of the quadrant labels, legend and each other
+    placer = LabelPlacer(ax)
+    for x, y, text, color in [
+            (xlim[1]*0.7, ylim[1]*0.8, 'High Trust/Resp.', UNIFIED_COLORS['positive']),
+            (xlim[0]*0.7, ylim[1]*0.8, 'Low Trust/High Resp.', UNIFIED_COLORS['neutral']),
+            (xlim[0]*0.7, ylim[0]*0.8, 'Low Trust/Low Resp.', UNIFIED_COLORS['negative']),
+            (xlim[1]*0.7, ylim[0]*0.8, 'High Trust/Low Resp.', UNIFIED_COLORS['primary'])]:
+        placer.add_obstacle(ax.text(x, y, text, fontsize=11, color=color, fontweight='bold', alpha=0.8))
     
     # Axis labels (with variance explained)
     ax.set_xlabel(f'PC1 ({pca.explained_variance_ratio_[0]*100:.1f}% Var Explained)\n← Low Trust/Policy — High Trust/Policy →', 
@@ -2957,8 +5421,8 @@ def plot_awareness_pca(df, save_dir):
     ax.set_title('University Student NEV Awareness Space (PCA)', fontsize=18, fontweight='bold', pad=20)
     
     # Legend
-    ax.legend(loc='upper left', fontsize=10, title='Intention / Experience', 
-             title_fontsize=11, framealpha=0.95)
+    placer.add_obstacle(ax.legend(loc='upper left', fontsize=10, title=legend_title, 
+                                  title_fontsize=11, framealpha=0.95))
     
     # Add loading vectors (optional)
     # Show contribution of each variable to PCs
@@ -2968,8 +5432,10 @@ def plot_awareness_pca(df, save_dir):
         var_short = var.replace('指数', '').replace('认知', 'Know.').replace('责任感', 'Resp.').replace('信任', 'Trust').replace('政策认同', 'Policy')
         ax.annotate('', xy=(loadings[i, 0]*3, loadings[i, 1]*3), xytext=(0, 0),
                    arrowprops=dict(arrowstyle='->', color='#2C3E50', lw=2))
-        ax.text(loadings[i, 0]*3.3, loadings[i, 1]*3.3, var_short, 
-               fontsize=10, fontweight='bold', color='#2C3E50')
+        label = ax.annotate(var_short, xy=(loadings[i, 0]*3.3, loadings[i, 1]*3.3), xytext=(0, 0),
+                            textcoords='offset points', fontsize=10, fontweight='bold', color='#2C3E50')
+        placer.add(label, priority=np.hypot(*loadings[i]),
+                   anchors=[(loadings[i, 0]*k, loadings[i, 1]*k) for k in (3.6, 3.9)])
     
     sns.despine(ax=ax)
     ax.grid(True, alpha=0.3, linestyle='--')
@@ -2979,9 +5445,22 @@ def plot_awareness_pca(df, save_dir):
     ax.text(0.02, 0.02, f'Total Variance Explained: {total_var:.1f}%', transform=ax.transAxes,
            fontsize=10, color='#666666', style='italic')
     
-    save_fig(fig, os.path.join(save_dir, 'Advanced_Awareness_PCA.png'))
+    # Summaries only: the bundle does not grow with the number of respondents
+    group_columns = [c for c in (color_column, 'Experience') if c in pca_df.columns]
+    emit_data_bundle(save_path, 'awareness_pca', {
+        'explained_variance': pd.DataFrame({'Component': ['PC1', 'PC2'],
+                                            'Variance Ratio': pca.explained_variance_ratio_[:2],
+                                            'Eigenvalue': pca.explained_variance_[:2]}),
+        'loadings': pd.DataFrame({'Variable': available_vars, 'PC1': loadings[:, 0], 'PC2': loadings[:, 1]}),
+        'group_centroids': pca_df.groupby(group_columns).agg(
+            n=('PC1', 'size'), **{f'{pc} {name}': (pc, stat) for pc in ('PC1', 'PC2')
+                                  for name, stat in (('mean', 'mean'), ('sd', 'std'))}).reset_index(),
+        'score_bins': binned_scores(pca_df, 'PC1', 'PC2'),
+    }, explained_variance=pca.explained_variance_ratio_[:2].tolist(), n=len(pca_df))
+    save_fig(fig, save_path)
 
 
+@instrument_chart
 def plot_sem_path_diagram(df, save_dir):
     """
     SEM Style Path Diagram
@@ -3008,6 +5487,7 @@ def plot_sem_path_diagram(df, save_dir):
 
     setup_style()
     
+    mark_phase('draw')
     fig, ax = plt.subplots(figsize=(16, 12), facecolor='white')
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 8)
@@ -3077,6 +5557,10 @@ def plot_sem_path_diagram(df, save_dir):
         'Intention': UNIFIED_COLORS['positive'],
     }
     
+    # β labels keep clear of the nodes and of each other, sliding along their path
+    placer = LabelPlacer(ax)
+    path_fractions = [0.4, 0.6, 0.3, 0.7]
+    
     for node, (x, y) in available_nodes.items():
         # Draw rounded rectangle
         rect = plt.Rectangle((x-0.7, y-0.4), 1.4, 0.8, 
@@ -3091,6 +5575,7 @@ def plot_sem_path_diagram(df, save_dir):
                               edgecolor='white', linewidth=3,
                               alpha=0.9, zorder=10)
         ax.add_patch(bbox)
+        placer.add_obstacle(bbox)
         
         # Node label
         ax.text(x, y, node, ha='center', va='center', fontsize=13, 
@@ -3098,10 +5583,11 @@ def plot_sem_path_diagram(df, save_dir):
         
         # Add R² (if dependent variable)
         if node in ['Attitude', 'Intention']:
-            ax.text(x, y-0.55, 'R²=0.XX', ha='center', va='top', fontsize=9,
-                   color='#2C3E50', style='italic')
+            placer.add_obstacle(ax.text(x, y-0.55, 'R²=0.XX', ha='center', va='top', fontsize=9,
+                                        color='#2C3E50', style='italic'))
     
     # Draw paths
+    path_rows = []
     for start, end in paths:
         if start not in available_nodes or end not in available_nodes:
             continue
@@ -3114,6 +5600,7 @@ def plot_sem_path_diagram(df, save_dir):
         
         if coef is None:
             continue
+        path_rows.append((start, end, coef, pval))
         
         # Path style
         if pval is not None and pval < 0.05:
@@ -3166,189 +5653,2084 @@ def plot_sem_path_diagram(df, save_dir):
         else:
             sig = ''
         
-        ax.text(mid_x, mid_y, f'β={coef:.2f}{sig}', ha='center', va='center',
-               fontsize=9, fontweight='bold', color=color,
-               bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.9))
+        label = ax.annotate(f'β={coef:.2f}{sig}', xy=(mid_x, mid_y), xytext=(0, 0),
+                            textcoords='offset points', ha='center', va='center',
+                            fontsize=9, fontweight='bold', color=color,
+                            bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.9))
+        placer.add(label, priority=abs(coef),
+                   anchors=[(start_x + t * (end_x - start_x), start_y + t * (end_y - start_y))
+                            for t in path_fractions])
+    
+    # Add legend
+    from matplotlib.lines import Line2D
+    legend_elements = [
+        Line2D([0], [0], color=UNIFIED_COLORS['positive'], linewidth=3, label='Positive Effect'),
+        Line2D([0], [0], color=UNIFIED_COLORS['negative'], linewidth=3, label='Negative Effect'),
+        Line2D([0], [0], color='gray', linewidth=2, linestyle='--', label='Not Significant'),
+    ]
+    ax.legend(handles=legend_elements, loc='lower left', fontsize=10,
+             title='Path Type', title_fontsize=11, framealpha=0.95)
+    
+    # Significance explanation
+    ax.text(0.98, 0.02, '*** p<0.001  ** p<0.01  * p<0.05', 
+           transform=ax.transAxes, ha='right', va='bottom', fontsize=9,
+           color='#666666', style='italic')
+    
+    ax.set_title('NEV Purchase Intention Influence Path Model\n(SEM Style Path Diagram)', 
+                fontsize=18, fontweight='bold', pad=20)
+    
+    emit_data_bundle(os.path.join(save_dir, 'Advanced_SEM_Path.png'), 'sem_path', {
+        'paths': pd.DataFrame(path_rows, columns=['From', 'To', 'r', 'p']),
+    })
+    save_fig(fig, os.path.join(save_dir, 'Advanced_SEM_Path.png'))
+
+
+RISK_INTENTION_ITEMS = {
+    '问题_续航': 'Range Anxiety',
+    '问题_充电设施': 'Charging Inconv.',
+    '问题_电池': 'Battery Safety',
+    '问题_价格': 'High Price',
+    '问题_安全': 'Overall Safety',
+}
+RISK_INTENTION_MAX_ITEMS = 30   # Items drawn (most selected first); the data bundle has them all
+RISK_INTENTION_TERMS = {
+    'concern': dict(share='Worry Percentage (%)', bar='Worry %',
+                    diff='Intention Difference (Not Worried - Worried)',
+                    positive='Positive Diff (Not worried has higher int.)',
+                    negative='Negative Diff (Worried has higher int.)',
+                    note='Positive difference means worry about this issue reduces purchase intention'),
+    'option': dict(share='Selection Percentage (%)', bar='Selected %',
+                   diff='Intention Difference (Not Selected - Selected)',
+                   positive='Positive Diff (Not selecting has higher int.)',
+                   negative='Negative Diff (Selecting has higher int.)',
+                   note='Positive difference means respondents selecting this option have lower purchase intention'),
+}
+
+
+@instrument_chart
+def plot_risk_intention_chart(df, save_dir, items=None, blocks=None, output='Advanced_Risk_Intention.png',
+                              title='NEV Concerns vs Purchase Intention\n(Worry % vs Intention Difference)',
+                              terms='concern', max_items=None):
+    """
+    Risk-Intention Relationship Chart
+    Visualizing relationship between concerns and purchase intention
+    
+    Args:
+        items: Binary columns -> labels (default: RISK_INTENTION_ITEMS)
+        blocks: Multi-select blocks to use instead of items (see option_matrix)
+        terms: Wording of the axes and legend, a RISK_INTENTION_TERMS key
+        max_items: Most selected items drawn (default: RISK_INTENTION_MAX_ITEMS)
+    
+    The selected / not selected intention means, the SE of their difference and
+    a Welch t-test come from binary_mean_differences for all items at once.
+    """
+    import os
+    
+    save_path = os.path.join(save_dir, output)
+    if blocks is not None:
+        X, labels = option_matrix(df, blocks)
+    else:
+        items = {k: v for k, v in (items or RISK_INTENTION_ITEMS).items() if has_option_column(df, k)}
+        X = option_indicators(df, list(items))
+        labels = list(items.values())
+    
+    # Log data
+    print(f"\n[Data Log] Data for Risk-Intention Chart:")
+    print(f"Items: {labels}")
+    
+    effects = None
+    if len(labels) and '5年内购车意愿' in df.columns:
+        # Intention on the positive scale (the caller's frame is not modified)
+        intention_pos = CODEBOOK.positive_series(df, '5年内购车意愿')
+        effects = binary_mean_differences(X, intention_pos, labels)
+        # Shares are over all respondents, as the chart has always shown them; the
+        # intention means and tests use the respondents who gave an intention
+        effects['Selected%'] = X.sum(axis=0) / max(len(X), 1) * 100
+        print("Selection Percentages and Intention Differences:")
+        print(effects)
+    
+    setup_style()
+    
+    mark_phase('draw')
+    # Items with both groups present, most selected first (ties in reverse item order,
+    # as the chart has always sorted them)
+    shown = pd.DataFrame()
+    if effects is not None:
+        shown = effects[effects['Difference'].notna()]
+        shown = shown.iloc[np.argsort(shown['Selected%'].to_numpy(), kind='stable')[::-1]]
+        shown = shown.head(max_items or RISK_INTENTION_MAX_ITEMS)
+    fig, ax = plt.subplots(figsize=(14, max(10, len(shown) * 0.45 + 3)), facecolor='white')
+    
+    if shown.empty:
+        ax.text(0.5, 0.5, 'Insufficient data', ha='center', va='center', fontsize=14)
+        save_fig(fig, save_path)
+        return
+    
+    wording = RISK_INTENTION_TERMS[terms]
+    labels = list(shown['Item'])
+    worry_pcts = shown['Selected%'].to_numpy()
+    intention_diffs = shown['Difference'].to_numpy()
+    error_bars = np.nan_to_num(shown['SE'].to_numpy())
+    
+    y_pos = np.arange(len(labels))
+    
+    # Create dual axis
+    ax2 = ax.twiny()
+    
+    # Draw worry percentage (horizontal bar chart)
+    bars = ax.barh(y_pos, worry_pcts, height=0.6, color=UNIFIED_COLORS['primary'], alpha=0.7,
+                   edgecolor='white', linewidth=2, label=wording['bar'])
+    
+    # Add worry percentage values
+    for i, (bar, pct) in enumerate(zip(bars, worry_pcts)):
+        ax.text(pct + 1, bar.get_y() + bar.get_height()/2, f'{pct:.0f}%',
+               va='center', fontsize=10, fontweight='bold', color=UNIFIED_COLORS['primary'])
+    
+    # Draw intention difference points (on second x-axis)
+    scatter_x = intention_diffs
+    scatter_colors = [UNIFIED_COLORS['positive'] if d > 0 else UNIFIED_COLORS['negative'] for d in scatter_x]
+    
+    ax2.scatter(scatter_x, y_pos, s=200, c=scatter_colors, 
+               edgecolors='white', linewidths=2, zorder=5, marker='D')
+    
+    # Add error bars (SE of the difference)
+    ax2.errorbar(scatter_x, y_pos, xerr=error_bars, fmt='none', 
+                ecolor='#666666', elinewidth=1.5, capsize=4, capthick=1.5, zorder=4)
+    
+    # Add difference values (above points), marked with the t-test result
+    markers = [''] * len(labels)
+    if SIGNIFICANCE_MARKERS:
+        markers = [significance_marker(p) for p in shown['p-value']]
+    for i, (x, diff, marker) in enumerate(zip(scatter_x, intention_diffs, markers)):
+        ax2.text(x, y_pos[i] + 0.25, f'{diff:+.2f}{marker}', va='bottom', ha='center',
+                fontsize=11, fontweight='bold', color=scatter_colors[i],
+                bbox=dict(boxstyle='round,pad=0.2', facecolor='white', 
+                         edgecolor=scatter_colors[i], alpha=0.9))
+    
+    # Zero line
+    ax2.axvline(x=0, color='#BDC3C7', linestyle='--', linewidth=1.5, alpha=0.7)
+    
+    # Set axes
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(labels, fontsize=12)
+    ax.set_xlabel(wording['share'], fontsize=13, fontweight='bold', color=UNIFIED_COLORS['primary'])
+    ax.set_xlim(0, max(max(worry_pcts) * 1.3, 1))
+    
+    ax2.set_xlabel(wording['diff'], fontsize=13, fontweight='bold', color='#666666')
+    xlim_max = max(np.abs(scatter_x).max() * 1.5, (np.abs(scatter_x) + error_bars).max() * 1.1, 1e-3)
+    ax2.set_xlim(-xlim_max, xlim_max)
+    
+    # Legend
+    from matplotlib.patches import Patch
+    from matplotlib.lines import Line2D
+    legend_elements = [
+        Patch(facecolor=UNIFIED_COLORS['primary'], alpha=0.7, label=wording['bar']),
+        Line2D([0], [0], marker='D', color='w', markerfacecolor=UNIFIED_COLORS['positive'],
+               markersize=10, label=wording['positive']),
+        Line2D([0], [0], marker='D', color='w', markerfacecolor=UNIFIED_COLORS['negative'],
+               markersize=10, label=wording['negative']),
+    ]
+    ax.legend(handles=legend_elements, loc='lower right', fontsize=10, framealpha=0.95)
+    
+    ax.set_title(title, fontsize=18, fontweight='bold', pad=20)
+    
+    sns.despine(ax=ax, left=True)
+    ax.tick_params(left=False)
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    
+    # Add explanation
+    note = wording['note']
+    if SIGNIFICANCE_MARKERS:
+        note += '\n' + significance_note(test='Welch t-test')
+    ax.text(0.02, 0.02, note, transform=ax.transAxes, fontsize=9, color='#666666', style='italic')
+    
+    if terms == 'concern':
+        tables = {'concerns': effects.rename(columns={'Item': 'Concern', 'Selected%': 'Worry%',
+                                                      'Mean Not Selected': 'Intention Not Worried',
+                                                      'Mean Selected': 'Intention Worried'})}
+    else:
+        tables = {'items': effects}
+    emit_data_bundle(save_path, 'risk_intention', tables, n=len(df),
+                     intention_scale='1-5, higher = more likely to buy')
+    save_fig(fig, save_path)
+
+
+# ============================================================================
+# Multi-select Blocks
+# ============================================================================
+
+# Multi-select questions: block -> prefix, title and (option column suffix, label).
+# Option i is bit i of the block's packed code, stored in '{prefix}mask' (so the
+# block's 'prefix_*' input pattern matches packed and unpacked frames alike).
+MULTI_SELECT_BLOCKS = {
+    'renewable': ('可再生_', 'Which Are Renewable Energy Sources?', [
+        ('太阳能', 'Solar'), ('风能', 'Wind'), ('水能', 'Hydro'), ('生物质能', 'Biomass'),
+        ('石油', 'Oil'), ('煤炭', 'Coal'), ('天然气', 'Natural Gas'), ('核能', 'Nuclear')]),
+    'factors': ('因素_', 'NEV Purchase Factors', [
+        ('成本', 'Cost'), ('环保', 'Environmental'), ('技术', 'Tech Reliability'), ('续航', 'Range'),
+        ('充电', 'Charging Convenience'), ('性能', 'Performance'), ('政策', 'Policy Support'),
+        ('品牌', 'Brand Reputation')]),
+    'problems': ('问题_', 'NEV Pain Points', [
+        ('续航', 'Insufficient Range'), ('充电设施', 'Charging Facilities'), ('电池', 'Battery Issues'),
+        ('价格', 'High Price'), ('安全', 'Safety Concerns'), ('维修', 'Maintenance Cost')]),
+    'channels': ('渠道_', 'Information Channels', [
+        ('学校课程', 'School Courses'), ('新闻媒体', 'News Media'), ('社交媒体', 'Social Media'),
+        ('学术文献', 'Academic Lit'), ('亲友交流', 'Friends/Family')]),
+    'goals': ('目标_', 'Perceived Energy Transition Goals', [
+        ('保障能源安全', 'Energy Security'), ('减少污染', 'Reduce Pollution'), ('降低依赖', 'Reduce Dependency'),
+        ('技术创新', 'Tech Innovation'), ('绿色转型', 'Green Transition')]),
+    'gov_focus': ('发力_', 'Expected Gov Focus Areas', [
+        ('技术研发', 'R&D'), ('基础设施', 'Infrastructure'), ('教育宣传', 'Education'),
+        ('激励政策', 'Incentives'), ('节能改造', 'Retrofitting')]),
+}
+MULTI_SELECT_MASK = 'mask'
+
+
+def multi_select_columns(block):
+    """Option columns of a multi-select block, in bit order"""
+    prefix, _, options = MULTI_SELECT_BLOCKS[block]
+    return [prefix + suffix for suffix, _ in options]
+
+
+def multi_select_mask_column(block):
+    return MULTI_SELECT_BLOCKS[block][0] + MULTI_SELECT_MASK
+
+
+def _mask_dtype(n_options):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_options <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f'{n_options} options do not fit in a 64-bit mask')
+
+
+def multi_select_codes(df, block):
+    """Packed option codes of a block, one integer per respondent (bit i = option i)
+    
+    Read from the mask column when df is packed, else packed from the 0/1 columns
+    (missing answers count as not selected).
+    """
+    mask_col = multi_select_mask_column(block)
+    if mask_col in df.columns:
+        return df[mask_col].to_numpy()
+    cols = multi_select_columns(block)
+    values = df[cols].to_numpy()
+    if values.dtype.kind == 'f':
+        values = np.nan_to_num(values)
+    if not np.isin(values, (0, 1)).all():
+        raise ValueError(f'{block}: multi-select columns must hold 0/1 values')
+    # OR the bits in the mask dtype: no n x options upcast of (compacted) int8 columns
+    dtype = _mask_dtype(len(cols))
+    codes = np.zeros(len(values), dtype=dtype)
+    for bit in range(len(cols)):
+        codes |= values[:, bit].astype(dtype) << dtype(bit)
+    return codes
+
+
+# Option column -> (block, bit)
+_MULTI_SELECT_OPTIONS = {col: (block, bit) for block in MULTI_SELECT_BLOCKS
+                         for bit, col in enumerate(multi_select_columns(block))}
+
+
+def has_option_column(df, column):
+    """Whether df holds an option column, as a column or packed in its block's mask"""
+    if column in df.columns:
+        return True
+    return column in _MULTI_SELECT_OPTIONS and \
+        multi_select_mask_column(_MULTI_SELECT_OPTIONS[column][0]) in df.columns
+
+
+def option_indicators(df, columns):
+    """Respondents x columns 0/1 float matrix of option columns, packed or not
+    (missing answers count as not selected)"""
+    X = np.zeros((len(df), len(columns)))
+    for j, col in enumerate(columns):
+        if col in df.columns:
+            X[:, j] = np.nan_to_num(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        else:
+            block, bit = _MULTI_SELECT_OPTIONS[col]
+            X[:, j] = (multi_select_codes(df, block) >> bit) & 1
+    return X
+
+
+def pack_multi_select(df, blocks=None):
+    """
+    Replace each multi-select block's 0/1 columns with one packed mask column
+    
+    Blocks whose columns are not all present are left as they are. df is not
+    modified. Charts read option data through multi_select_codes (or
+    multi_select_totals / option_indicators), which accept packed and unpacked
+    frames alike.
+    
+    Returns:
+        New DataFrame
+    """
+    blocks = list(MULTI_SELECT_BLOCKS) if blocks is None else blocks
+    packed, dropped = {}, []
+    for block in blocks:
+        cols = multi_select_columns(block)
+        if all(col in df.columns for col in cols):
+            packed[multi_select_mask_column(block)] = multi_select_codes(df, block)
+            dropped.extend(cols)
+    if not packed:
+        return df
+    before = df[dropped].memory_usage(index=False, deep=True).sum()
+    after = sum(codes.nbytes for codes in packed.values())
+    print(f"[Data Log] Packed {len(packed)} multi-select blocks ({len(dropped)} columns): "
+          f"{before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+    return df.drop(columns=dropped).assign(**packed)
+
+
+def unpack_multi_select(df, blocks=None):
+    """df with the 0/1 option columns of packed blocks restored (int8), as a new frame
+    when anything was unpacked; mask columns are kept"""
+    blocks = list(MULTI_SELECT_BLOCKS) if blocks is None else blocks
+    restored = {}
+    for block in blocks:
+        mask_col = multi_select_mask_column(block)
+        if mask_col not in df.columns:
+            continue
+        codes = df[mask_col].to_numpy()
+        for bit, col in enumerate(multi_select_columns(block)):
+            if col not in df.columns:
+                restored[col] = ((codes >> bit) & 1).astype(np.int8)
+    return df.assign(**restored) if restored else df
+
+
+def combination_counts(codes, n_options):
+    """Respondents per option combination: entry c counts the respondents whose code is c"""
+    return np.bincount(np.asarray(codes, dtype=np.int64), minlength=1 << n_options)
+
+
+def option_totals(counts, n_options):
+    """Per-option selection counts from combination counts"""
+    bits = (np.arange(len(counts))[:, None] >> np.arange(n_options)) & 1
+    return counts @ bits
+
+
+def multi_select_totals(df, block):
+    """Selections per option of a block (Series indexed by option column), counted
+    over the packed codes"""
+    n_options = len(MULTI_SELECT_BLOCKS[block][2])
+    counts = combination_counts(multi_select_codes(df, block), n_options)
+    return pd.Series(option_totals(counts, n_options), index=multi_select_columns(block))
+
+
+@instrument_chart
+def plot_upset(df, block, save_path, top_n=15):
+    """
+    UpSet-style Co-occurrence Chart of a Multi-select Block
+    Bars: respondents per exact option combination (top_n largest); dot matrix: the
+    options in each combination; left bars: total selections per option
+    """
+    _, title, options = MULTI_SELECT_BLOCKS[block]
+    labels = [label for _, label in options]
+    n_options = len(options)
+    
+    codes = multi_select_codes(df, block)
+    counts = combination_counts(codes, n_options)
+    totals = option_totals(counts, n_options)
+    n_total = len(codes)
+    
+    order = np.argsort(-counts, kind='stable')
+    combos = order[counts[order] > 0][:top_n]
+    combo_counts = counts[combos]
+    membership = (combos[None, :] >> np.arange(n_options)[:, None]) & 1   # options x combos
+    
+    # Log data
+    print(f"\n[Data Log] Data for UpSet ({block}):")
+    print(f"Respondents: {n_total}, distinct combinations: {(counts > 0).sum()} of {len(counts)}")
+    print("Option Totals:", dict(zip(labels, totals.tolist())))
+    
+    setup_style()
+    mark_phase('draw')
+    fig = plt.figure(figsize=(max(12, 0.6 * len(combos) + 6), 4 + 0.45 * n_options + 4), facecolor='white')
+    gs = fig.add_gridspec(2, 2, width_ratios=[1, 3], height_ratios=[3, 0.45 * n_options + 0.5],
+                          wspace=0.6, hspace=0.05)
+    ax_bars = fig.add_subplot(gs[0, 1])
+    ax_matrix = fig.add_subplot(gs[1, 1], sharex=ax_bars)
+    ax_sets = fig.add_subplot(gs[1, 0], sharey=ax_matrix)
+    
+    x = np.arange(len(combos))
+    colors = get_unified_palette(n_options)
+    
+    # Intersection sizes
+    ax_bars.bar(x, combo_counts, color=UNIFIED_COLORS['primary'], edgecolor='white', width=0.7)
+    for xi, cnt in zip(x, combo_counts):
+        ax_bars.text(xi, cnt, f'{cnt}\n({cnt / n_total * 100:.0f}%)', ha='center', va='bottom', fontsize=8)
+    ax_bars.set_ylabel('Respondents', fontsize=12, fontweight='bold')
+    ax_bars.set_ylim(0, combo_counts.max() * 1.25 if len(combos) else 1)
+    ax_bars.tick_params(axis='x', bottom=False, labelbottom=False)
+    ax_bars.set_title(f'{title}: Option Combinations (top {len(combos)})', fontsize=16, fontweight='bold', pad=15)
+    sns.despine(ax=ax_bars)
+    ax_bars.grid(axis='y', alpha=0.3, linestyle='--')
+    
+    # Membership matrix
+    rows = np.arange(n_options)
+    grid_x, grid_y = np.meshgrid(x, rows)
+    ax_matrix.scatter(grid_x.ravel(), grid_y.ravel(), s=90, color='#E5E5E5', zorder=1)
+    on_y, on_x = np.nonzero(membership)
+    ax_matrix.scatter(x[on_x], on_y, s=110, c=[colors[i] for i in on_y], edgecolors='#333333',
+                      linewidths=0.8, zorder=3)
+    for xi in x:
+        members = np.flatnonzero(membership[:, xi])
+        if len(members) > 1:
+            ax_matrix.plot([xi, xi], [members.min(), members.max()], color='#333333', linewidth=2, zorder=2)
+    ax_matrix.set_ylim(n_options - 0.5, -0.5)
+    ax_matrix.set_xlim(-0.6, len(combos) - 0.4)
+    ax_matrix.set_yticks(rows)
+    ax_matrix.set_yticklabels(labels, fontsize=11)
+    ax_matrix.tick_params(axis='y', length=0, pad=10)
+    ax_matrix.tick_params(axis='x', bottom=False, labelbottom=False)
+    for spine in ax_matrix.spines.values():
+        spine.set_visible(False)
+    
+    # Option totals (bars grow to the left, towards the option names)
+    ax_sets.barh(rows, totals, color=colors, edgecolor='white', height=0.6)
+    ax_sets.invert_xaxis()
+    ax_sets.tick_params(axis='y', left=False, labelleft=False)
+    ax_sets.set_xlabel('Selections', fontsize=11, fontweight='bold')
+    sns.despine(ax=ax_sets, left=True)
+    
+    combo_labels = [' + '.join(label for label, on in zip(labels, membership[:, j]) if on) or '(none)'
+                    for j in range(len(combos))]
+    emit_data_bundle(save_path, f'upset_{block}', {
+        'combinations': pd.DataFrame({'Combination': combo_labels, 'Code': combos, 'Count': combo_counts,
+                                      'Percent': combo_counts / n_total * 100}),
+        'options': counts_table(totals, labels, n_total),
+    }, n=n_total, distinct_combinations=int((counts > 0).sum()))
+    save_fig(fig, save_path)
+
+
+# Option co-occurrence across multi-select blocks (purchase factors, pain points,
+# information channels and expected government focus by default)
+ASSOCIATION_BLOCKS = ['factors', 'problems', 'channels', 'gov_focus']
+ASSOCIATION_MEASURES = ('count', 'phi', 'lift', 'jaccard')
+
+
+def option_matrix(df, blocks=None):
+    """
+    Respondent x option 0/1 matrix over the options of several multi-select blocks
+    
+    Packed blocks are read from their mask columns, unpacked ones from the option
+    columns; blocks with neither are skipped.
+    
+    Returns:
+        (matrix, labels): float32 array (float64 from 2**24 rows, where float32 sums
+        stop being exact) and the option labels, which are unique across blocks
+    """
+    blocks = ASSOCIATION_BLOCKS if blocks is None else blocks
+    dtype = np.float32 if len(df) < 2 ** 24 else np.float64
+    parts, labels = [], []
+    for block in blocks:
+        cols = multi_select_columns(block)
+        if multi_select_mask_column(block) not in df.columns and not all(col in df.columns for col in cols):
+            continue
+        codes = multi_select_codes(df, block)
+        parts.append(((codes[:, None] >> np.arange(len(cols), dtype=codes.dtype)) & 1).astype(dtype))
+        labels.extend(label for _, label in MULTI_SELECT_BLOCKS[block][2])
+    if not parts:
+        return np.empty((len(df), 0), dtype=dtype), labels
+    return np.hstack(parts), labels
+
+
+def association_matrices(df, blocks=None):
+    """
+    Option x option co-occurrence and the association measures derived from it
+    
+    All pairwise counts come from one X'X product over the 0/1 option matrix; with
+    a_i = respondents selecting option i, c_ij = respondents selecting both and n
+    respondents:
+        phi     = (n c_ij - a_i a_j) / sqrt(a_i (n - a_i) a_j (n - a_j))
+        lift    = n c_ij / (a_i a_j)
+        jaccard = c_ij / (a_i + a_j - c_ij)
+    Measures involving an option nobody (or everybody, for phi) selected are NaN.
+    
+    Returns:
+        Dict of ASSOCIATION_MEASURES -> DataFrame indexed by option label both ways
+    """
+    X, labels = option_matrix(df, blocks)
+    n = len(X)
+    co = (X.T @ X).astype(np.float64)
+    a = np.diag(co)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = np.sqrt(a * (n - a))
+        phi = (n * co - np.outer(a, a)) / np.outer(spread, spread)
+        lift = n * co / np.outer(a, a)
+        jaccard = co / (a[:, None] + a[None, :] - co)
+    frames = {}
+    for name, values in zip(ASSOCIATION_MEASURES, (co, phi, lift, jaccard)):
+        values[~np.isfinite(values)] = np.nan
+        frames[name] = pd.DataFrame(values, index=labels, columns=labels)
+    
+    # Log data
+    print(f"\n[Data Log] Option associations: {len(labels)} options, {n} respondents")
+    return frames
+
+
+def binary_mean_differences(X, y, labels=None):
+    """
+    Mean of y among respondents with and without each binary item, with Welch t-tests
     
-    # Add legend
-    from matplotlib.lines import Line2D
-    legend_elements = [
-        Line2D([0], [0], color=UNIFIED_COLORS['positive'], linewidth=3, label='Positive Effect'),
-        Line2D([0], [0], color=UNIFIED_COLORS['negative'], linewidth=3, label='Negative Effect'),
-        Line2D([0], [0], color='gray', linewidth=2, linestyle='--', label='Not Significant'),
-    ]
-    ax.legend(handles=legend_elements, loc='lower left', fontsize=10,
-             title='Path Type', title_fontsize=11, framealpha=0.95)
+    Group sizes, sums and sums of squares of every item come from one product
+    X' [1, y, y^2] (with y centred, for accurate variances); the complements follow
+    from the totals. One pass over X, however many items it has.
     
-    # Significance explanation
-    ax.text(0.98, 0.02, '*** p<0.001  ** p<0.01  * p<0.05', 
-           transform=ax.transAxes, ha='right', va='bottom', fontsize=9,
-           color='#666666', style='italic')
+    Args:
+        X: Respondent x item 0/1 matrix (e.g. from option_matrix)
+        y: Value per respondent; respondents without one are left out
+        labels: Item labels (default: column numbers)
+    
+    Returns:
+        DataFrame with a row per item: 'Item', 'n Selected', 'Selected%', 'Mean
+        Selected', 'Mean Not Selected', 'Difference' (not selected - selected),
+        'SE' (of the difference), 't', 'df' (Welch) and 'p-value' (two-sided).
+        Statistics that need an empty or one-respondent group are NaN.
+    """
+    from scipy import stats
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    X, y = np.asarray(X)[valid], y[valid]
+    labels = list(range(X.shape[1])) if labels is None else list(labels)
+    n = len(y)
+    center = y.mean() if n else 0.0
+    y = y - center
+    moments = X.T @ np.column_stack([np.ones(n), y, y * y])   # Items x (count, sum, sum of squares)
+    n1, s1, q1 = moments.T
+    n0, s0, q0 = n - n1, y.sum() - s1, (y * y).sum() - q1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m1, m0 = s1 / n1, s0 / n0
+        e1 = np.maximum(q1 - n1 * m1 ** 2, 0) / (n1 - 1) / n1   # Squared standard errors of the means
+        e0 = np.maximum(q0 - n0 * m0 ** 2, 0) / (n0 - 1) / n0
+        e1[n1 < 2], e0[n0 < 2] = np.nan, np.nan
+        se = np.sqrt(e1 + e0)
+        t = (m0 - m1) / se
+        dof = (e1 + e0) ** 2 / (e1 ** 2 / (n1 - 1) + e0 ** 2 / (n0 - 1))
+    return pd.DataFrame({
+        'Item': labels, 'n Selected': n1.astype(np.int64), 'Selected%': n1 / max(n, 1) * 100,
+        'Mean Selected': m1 + center, 'Mean Not Selected': m0 + center, 'Difference': m0 - m1,
+        'SE': se, 't': t, 'df': dof, 'p-value': 2 * stats.t.sf(np.abs(t), dof),
+    })
+
+
+# ============================================================================
+# Respondent Segmentation
+# ============================================================================
+
+# Latent class typologies over Likert items (on the positive scale) and multi-select options
+SEGMENT_ITEMS = ['能源转型了解度', '双碳了解度', '技术信任度', '新能源汽车技术信任度', '政策执行信任度',
+                 '转型支持度', '碳中和支持度', '新能源汽车态度', '激励政策认同度', '限油推新支持度']
+SEGMENT_BLOCKS = ['factors', 'problems', 'channels']
+SEGMENT_CLASSES = 4
+SEGMENT_STARTS = 3              # Random starts; the one with the best log-likelihood is kept
+SEGMENT_MAX_ITER = 200
+SEGMENT_TOL = 1e-6              # Relative log-likelihood gain that ends full-batch EM
+SEGMENT_BATCH_SIZE = 2 ** 16    # Rows per EM chunk; larger samples are fitted by mini-batch EM
+SEGMENT_EPOCHS = 3              # Mini-batch passes over large samples
+SEGMENT_SEED = 0
+SEGMENT_PRIOR = 0.01            # Pseudo-count per class and answer, keeps probabilities off zero
+
+
+class LatentClassModel:
+    """
+    Latent class model (a mixture of independent categorical items) fitted by EM
+    
+    Each answer level of each item is a column of a sparse respondent x answer
+    indicator matrix X, so the E-step is X @ log(theta).T plus the log class
+    weights and the M-step counts are X.T @ posteriors: two sparse products per
+    chunk of SEGMENT_BATCH_SIZE rows. Missing answers have no column and drop out
+    of the likelihood. For samples larger than one chunk the random starts run on
+    a chunk-sized subsample, and the best one is refined on every respondent by
+    stepwise mini-batch EM, which blends each batch's statistics into running
+    ones (step (t + 2)^-0.6) and needs a few passes instead of one per iteration.
+    Segments are numbered by size, largest first.
     
-    ax.set_title('NEV Purchase Intention Influence Path Model\n(SEM Style Path Diagram)', 
-                fontsize=18, fontweight='bold', pad=20)
+    Args:
+        n_classes, items, blocks: Default SEGMENT_CLASSES, SEGMENT_ITEMS, SEGMENT_BLOCKS
+    """
     
-    save_fig(fig, os.path.join(save_dir, 'Advanced_SEM_Path.png'))
+    def __init__(self, n_classes=None, items=None, blocks=None, seed=None):
+        self.n_classes = n_classes or SEGMENT_CLASSES
+        self.items = list(SEGMENT_ITEMS if items is None else items)
+        self.blocks = list(SEGMENT_BLOCKS if blocks is None else blocks)
+        self.seed = SEGMENT_SEED if seed is None else seed
+        self.variables = None   # (name, kind, first code, levels); kind is 'likert' or the block
+        self.weights = None     # Segment shares
+        self.theta = None       # Segments x answer columns: answer probabilities
+        self.log_likelihood = None
+        self.bic = None
+    
+    def encode(self, df):
+        """
+        Answer codes of the model's items present in df (respondents x variables
+        int8, level index or -1 when missing) and their variables
+        """
+        columns, variables = [], []
+        for item in self.items:
+            if item not in df.columns or (item in CODEBOOK and CODEBOOK[item].scale is None):
+                continue
+            low, high = CODEBOOK[item].scale if item in CODEBOOK else (1, 5)
+            scores = CODEBOOK.positive_series(df, item).to_numpy(dtype=np.float64) - low
+            valid = (scores >= 0) & (scores <= high - low) & (scores % 1 == 0)
+            columns.append(np.where(valid, np.nan_to_num(scores), -1).astype(np.int8))
+            variables.append((CODEBOOK.name(item), 'likert', low, high - low + 1))
+        for block in self.blocks:
+            cols = multi_select_columns(block)
+            if multi_select_mask_column(block) not in df.columns and not all(col in df.columns for col in cols):
+                continue
+            codes = multi_select_codes(df, block)
+            for bit, (_, label) in enumerate(MULTI_SELECT_BLOCKS[block][2]):
+                columns.append(((codes >> bit) & 1).astype(np.int8))
+                variables.append((label, block, 0, 2))
+        codes = np.column_stack(columns) if columns else np.empty((len(df), 0), dtype=np.int8)
+        return codes, variables
+    
+    def _indicators(self, codes):
+        """Sparse respondents x answer columns 0/1 matrix of a chunk of codes"""
+        from scipy import sparse
+        valid = codes >= 0
+        columns = (codes.astype(np.int32) + self._offsets)[valid]
+        indptr = np.concatenate([[0], np.cumsum(valid.sum(axis=1))])
+        return sparse.csr_matrix((np.ones(len(columns)), columns, indptr),
+                                 shape=(len(codes), int(self._levels.sum())))
+    
+    def _posteriors(self, X):
+        """Segment posteriors and per-respondent log-likelihoods of an indicator chunk"""
+        joint = X @ np.log(self.theta).T + np.log(self.weights)
+        top = joint.max(axis=1, keepdims=True)
+        log_norm = top[:, 0] + np.log(np.exp(joint - top).sum(axis=1))
+        return np.exp(joint - log_norm[:, None]), log_norm
+    
+    def _statistics(self, codes):
+        """Expected segment sizes and answer counts over codes, and their log-likelihood"""
+        sizes, counts, log_likelihood = np.zeros(self.n_classes), np.zeros(self.theta.shape), 0.0
+        for start in range(0, len(codes), SEGMENT_BATCH_SIZE):
+            X = self._indicators(codes[start:start + SEGMENT_BATCH_SIZE])
+            posteriors, log_norm = self._posteriors(X)
+            sizes += posteriors.sum(axis=0)
+            counts += (X.T @ posteriors).T
+            log_likelihood += log_norm.sum()
+        return sizes, counts, log_likelihood
+    
+    def _maximize(self, sizes, counts):
+        self.weights = (sizes + SEGMENT_PRIOR) / (sizes + SEGMENT_PRIOR).sum()
+        counts = counts + SEGMENT_PRIOR
+        self.theta = counts / np.repeat(np.add.reduceat(counts, self._offsets, axis=1), self._levels, axis=1)
+    
+    def _fit_full(self, codes):
+        """Full-batch EM from the current parameters; returns the last log-likelihood"""
+        previous = -np.inf
+        for _ in range(SEGMENT_MAX_ITER):
+            sizes, counts, log_likelihood = self._statistics(codes)
+            self._maximize(sizes, counts)
+            if log_likelihood - previous <= SEGMENT_TOL * abs(log_likelihood):
+                break
+            previous = log_likelihood
+        return log_likelihood
+    
+    def _fit_minibatch(self, codes, rng):
+        n = len(codes)
+        sizes = self.weights * n
+        counts = self.theta * sizes[:, None]
+        step = 0
+        for _ in range(SEGMENT_EPOCHS):
+            order = rng.permutation(n)
+            for start in range(0, n, SEGMENT_BATCH_SIZE):
+                batch = np.sort(order[start:start + SEGMENT_BATCH_SIZE])
+                batch_sizes, batch_counts, _ = self._statistics(codes[batch])
+                rate = (step + 2) ** -0.6
+                sizes = (1 - rate) * sizes + rate * batch_sizes * (n / len(batch))
+                counts = (1 - rate) * counts + rate * batch_counts * (n / len(batch))
+                self._maximize(sizes, counts)
+                step += 1
+    
+    def fit(self, df):
+        """Fit to the respondents of df; returns self"""
+        codes, self.variables = self.encode(df)
+        if not self.variables or not len(codes):
+            raise ValueError('No segmentation items or respondents in the data')
+        self._levels = np.array([levels for _, _, _, levels in self.variables])
+        self._offsets = np.concatenate([[0], np.cumsum(self._levels)[:-1]])
+        n_columns = int(self._levels.sum())
+        rng = np.random.default_rng(self.seed)
+        sample = codes
+        if len(codes) > SEGMENT_BATCH_SIZE:
+            sample = codes[np.sort(rng.choice(len(codes), SEGMENT_BATCH_SIZE, replace=False))]
+        best = None
+        for _ in range(SEGMENT_STARTS):
+            # Random start: answer probabilities scattered around uniform
+            self._maximize(np.ones(self.n_classes), rng.gamma(10.0, size=(self.n_classes, n_columns)))
+            log_likelihood = self._fit_full(sample)
+            if best is None or log_likelihood > best[0]:
+                best = (log_likelihood, self.weights, self.theta)
+        _, self.weights, self.theta = best
+        if len(sample) < len(codes):
+            self._fit_minibatch(codes, rng)
+        
+        self.log_likelihood = self._statistics(codes)[2]
+        order = np.argsort(-self.weights, kind='stable')
+        self.weights, self.theta = self.weights[order], self.theta[order]
+        n_parameters = self.n_classes - 1 + self.n_classes * int((self._levels - 1).sum())
+        self.bic = -2 * self.log_likelihood + n_parameters * np.log(len(codes))
+        return self
+    
+    def segment_names(self):
+        return [f'Segment {k + 1}' for k in range(self.n_classes)]
+    
+    def memberships(self, df):
+        """
+        Segment posteriors of the respondents of df
+        
+        Returns:
+            DataFrame indexed like df: 'Segment' (1-based, most likely), 'Segment
+            Probability' (its posterior) and 'P(Segment k)' for every segment
+        """
+        codes, variables = self.encode(df)
+        if [v[:2] for v in variables] != [v[:2] for v in self.variables]:
+            raise ValueError('df does not hold the variables the model was fitted on')
+        posteriors = np.vstack([np.empty((0, self.n_classes))] + [
+            self._posteriors(self._indicators(codes[start:start + SEGMENT_BATCH_SIZE]))[0]
+            for start in range(0, len(codes), SEGMENT_BATCH_SIZE)])
+        members = pd.DataFrame(posteriors, index=df.index, columns=[f'P({name})' for name in self.segment_names()])
+        members.insert(0, 'Segment Probability', posteriors.max(axis=1) if len(posteriors) else [])
+        members.insert(0, 'Segment', (posteriors.argmax(axis=1) + 1).astype(np.int8))
+        return members
+    
+    def profiles(self):
+        """
+        Segment profiles: a row per variable with 'Variable', 'Kind' ('likert' or
+        the multi-select block) and a column per segment holding the expected
+        positive score (Likert items) or the selection percentage (options)
+        """
+        rows = []
+        for (name, kind, low, levels), offset in zip(self.variables, self._offsets):
+            probabilities = self.theta[:, offset:offset + levels]
+            values = low + probabilities @ np.arange(levels) if kind == 'likert' else probabilities[:, 1] * 100
+            rows.append([name, kind, *values])
+        return pd.DataFrame(rows, columns=['Variable', 'Kind', *self.segment_names()])
 
 
-def plot_risk_intention_chart(df, save_dir):
+def segment_respondents(df, n_classes=None):
     """
-    Risk-Intention Relationship Chart
-    Visualizing relationship between concerns and purchase intention
+    Fit a LatentClassModel to df
+    
+    Returns:
+        (model, memberships): the fitted model and its memberships(df)
     """
-    import os
-    from scipy import stats
+    import time
+    started = time.perf_counter()
+    model = LatentClassModel(n_classes).fit(df)
+    members = model.memberships(df)
     
     # Log data
-    print(f"\n[Data Log] Data for Risk-Intention Chart:")
-    problem_vars = {
-        '问题_续航': 'Range Anxiety',
-        '问题_充电设施': 'Charging Inconv.',
-        '问题_电池': 'Battery Safety',
-        '问题_价格': 'High Price',
-        '问题_安全': 'Overall Safety',
-    }
-    available_problems = {k: v for k, v in problem_vars.items() if k in df.columns}
-    print(f"Problem Variables: {available_problems}")
-    
-    if available_problems and '5年内购车意愿' in df.columns:
-        print("Worry Percentages and Intention Differences:")
-        summary_data = []
-        for prob in available_problems:
-             worry_pct = df[prob].sum() / len(df) * 100
-             worried_int = df[df[prob] == 1]['5年内购车意愿'].mean()
-             not_worried_int = df[df[prob] == 0]['5年内购车意愿'].mean()
-             summary_data.append({'Problem': prob, 'Worry%': worry_pct, 'Worried_Intention': worried_int, 'Not_Worried_Intention': not_worried_int})
-        print(pd.DataFrame(summary_data))
+    print(f"\n[Data Log] Latent classes: {model.n_classes} segments over {len(model.variables)} variables, "
+          f"{len(df)} respondents ({time.perf_counter() - started:.1f}s)")
+    print(f"Log-likelihood: {model.log_likelihood:.1f}, BIC: {model.bic:.1f}")
+    print(pd.DataFrame({'Share%': model.weights * 100,
+                        'n': members['Segment'].value_counts().reindex(range(1, model.n_classes + 1), fill_value=0)
+                                               .to_numpy()},
+                       index=model.segment_names()))
+    return model, members
+
 
+@instrument_chart
+def plot_segment_profiles(df, save_dir, model=None, memberships=None, output='Advanced_Segment_Profiles.png'):
+    """
+    Latent Class Segment Profiles
+    Expected Likert scores per segment (left) and option selection rates (right)
+    
+    model, memberships: A fitted LatentClassModel and its memberships of df
+        (see segment_respondents); fitted here when not given
+    """
+    import os
+    from matplotlib.colors import LinearSegmentedColormap
+    
+    save_path = os.path.join(save_dir, output)
+    if model is None:
+        model, memberships = segment_respondents(df)
+    profiles = model.profiles()
+    names = model.segment_names()
+    counts = memberships['Segment'].value_counts().reindex(range(1, model.n_classes + 1), fill_value=0)
+    
+    # Log data
+    print(f"\n[Data Log] Data for Segment Profiles:")
+    print(profiles)
+    
     setup_style()
     
-    fig, ax = plt.subplots(figsize=(14, 10), facecolor='white')
+    mark_phase('draw')
+    likert = profiles[profiles['Kind'] == 'likert']
+    options = profiles[profiles['Kind'] != 'likert']
+    panels = [kind for kind, table in (('likert', likert), ('options', options)) if len(table)]
+    fig = plt.figure(figsize=(9 * len(panels), max(8, len(options) * 0.4 + 2)), facecolor='white')
+    gs = fig.add_gridspec(1, len(panels), wspace=0.35)
+    colors = get_unified_palette(model.n_classes)
+    
+    for index, kind in enumerate(panels):
+        ax = fig.add_subplot(gs[index])
+        if kind == 'likert':
+            x = np.arange(len(likert))
+            for name, color, share, n in zip(names, colors, model.weights, counts):
+                ax.plot(x, likert[name], color=color, linewidth=2.5, marker='o', markersize=8,
+                        markeredgecolor='white', label=f'{name} ({share * 100:.0f}%, n={n})')
+            ax.set_xticks(x)
+            ax.set_xticklabels(likert['Variable'], rotation=35, ha='right', fontsize=10)
+            ax.set_ylim(1, 5)
+            ax.set_ylabel('Expected Score (1-5, higher = more positive)', fontsize=12, fontweight='bold')
+            ax.set_title('Attitude and Knowledge Profiles', fontsize=14, fontweight='bold', pad=15)
+            ax.legend(loc='lower left', fontsize=10, framealpha=0.95)
+            ax.grid(axis='y', alpha=0.3, linestyle='--')
+            sns.despine(ax=ax)
+        else:
+            cmap = LinearSegmentedColormap.from_list('selection', ['#FFFFFF', UNIFIED_COLORS['primary']])
+            values = options[names].to_numpy()
+            ax.imshow(values, cmap=cmap, vmin=0, vmax=100, aspect='auto')
+            for (i, j), value in np.ndenumerate(values):
+                ax.text(j, i, f'{value:.0f}%', ha='center', va='center', fontsize=9, color='#333333')
+            # Separators and names of the multi-select blocks
+            kinds = options['Kind'].tolist()
+            for i in range(1, len(kinds)):
+                if kinds[i] != kinds[i - 1]:
+                    ax.axhline(i - 0.5, color='#333333', linewidth=1.2)
+            ax.set_yticks(range(len(options)))
+            ax.set_yticklabels(options['Variable'], fontsize=10)
+            ax.set_xticks(range(len(names)))
+            ax.set_xticklabels(names, fontsize=11)
+            ax.xaxis.tick_top()
+            ax.tick_params(length=0)
+            for block in dict.fromkeys(kinds):
+                rows = [i for i, k in enumerate(kinds) if k == block]
+                ax.text(len(names) - 0.4, (rows[0] + rows[-1]) / 2, MULTI_SELECT_BLOCKS[block][1],
+                        rotation=270, ha='left', va='center', fontsize=10, color='#666666', style='italic')
+            ax.set_title('Option Selection Rate (%)', fontsize=14, fontweight='bold', pad=30)
+            for spine in ax.spines.values():
+                spine.set_visible(False)
+    
+    plt.suptitle('Respondent Typologies: Latent Class Segment Profiles', fontsize=18, fontweight='bold', y=1.0)
+    emit_data_bundle(save_path, 'segment_profiles', {
+        'profiles': profiles,
+        'segments': pd.DataFrame({'Segment': names, 'Share%': model.weights * 100, 'n': counts.to_numpy()}),
+    }, n=len(memberships), log_likelihood=model.log_likelihood, bic=model.bic,
+       score_scale='1-5, higher = more positive')
+    save_fig(fig, save_path)
+
+
+# ============================================================================
+# Chart Registry and Incremental Rebuild
+# ============================================================================
+
+CORE_INDEX_VARS = ['认知指数', '责任感指数', '信任指数', '政策认同指数']
+CORE_INDEX_LABELS = CODEBOOK.names(CORE_INDEX_VARS)
+TRUST_ITEM_VARS = ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '激励政策认同度', '限油推新支持度']
+TRUST_ITEM_LABELS = CODEBOOK.names(TRUST_ITEM_VARS)
+
+def with_label_columns(df):
+    """df with the CODEBOOK derived columns (display labels such as Education_Label,
+    positive-scale scores) added, as a new frame
     
-    # Problem perception variables
-    problem_vars = {
-        '问题_续航': 'Range Anxiety',
-        '问题_充电设施': 'Charging Inconv.',
-        '问题_电池': 'Battery Safety',
-        '问题_价格': 'High Price',
-        '问题_安全': 'Overall Safety',
-    }
+    df is not modified; under copy-on-write the new frame shares df's columns.
+    Packed multi-select blocks stay packed (charts read them with multi_select_codes).
+    """
+    return CODEBOOK.apply(df)
+
+
+def named_correlation(corr):
+    """Correlation matrix relabelled with the CODEBOOK English names of its columns"""
+    names = CODEBOOK.names(corr.columns)
+    return corr.set_axis(names, axis=0).set_axis(names, axis=1)
+
+
+def _correlation_heatmap_chart(df, save_path, columns=CORE_INDEX_VARS,
+                               title='Variable Correlation Heatmap'):
+    plot_correlation_heatmap(named_correlation(df[columns].corr()), save_path, title)
+
+
+def _correlation_network_chart(df, save_path, columns=CORE_INDEX_VARS, threshold=0.3,
+                               title='Correlation Network Diagram'):
+    plot_correlation_network(named_correlation(df[columns].corr()), save_path, threshold, title)
+
+
+def _association_heatmap_chart(df, save_path, blocks=None,
+                               title='Multi-select Option Associations (phi)'):
+    # Too many options for per-cell annotations: large mode clusters co-selected
+    # options together and only annotates the strong associations
+    plot_correlation_heatmap(association_matrices(df, blocks)['phi'], save_path, title, large=True)
+
+
+def _association_network_chart(df, save_path, blocks=None, threshold=0.2,
+                               title='Multi-select Option Association Network (phi)'):
+    plot_correlation_network(association_matrices(df, blocks)['phi'], save_path, threshold, title)
+
+
+def _association_chord_chart(df, save_dir, blocks=None, threshold=0.2):
+    plot_chord_diagram(df, save_dir, matrix=association_matrices(df, blocks)['phi'],
+                       output='Advanced_Association_Chord.png',
+                       title='Multi-select Option Association Chord Diagram', threshold=threshold)
+
+
+def _segment_pca_chart(df, save_dir, output='Advanced_Awareness_PCA_Segments.png'):
+    plot_awareness_pca(df, save_dir, segments=segment_respondents(df)[1]['Segment'], output=output)
+
+
+# Every chart entry point drawn from the survey DataFrame:
+#   func    - plotting function, called as func(df, save_path=...) or func(df, save_dir=...)
+#   output  - image file name (fixed by the function itself for save_dir functions)
+#   params  - keyword arguments beyond df and the output location
+#   inputs  - columns the chart reads; 'prefix_*' patterns match a multi-select block
+#   min_rows - optional (n, columns): the chart only draws a placeholder unless at least
+#              n rows are complete over the available columns; fan-out skips it instead
+# Label columns are derived from their source columns, so inputs name the source.
+# Mediation, moderation and regression plots take fitted models and are not listed.
+CHART_REGISTRY = {
+    'demographics': dict(
+        func=plot_demographics, output='Demographics.png', params={},
+        inputs=['性别', '在学类别', '专业_*', '能源经历']),
+    'knowledge': dict(
+        func=plot_knowledge_level, output='Knowledge_Level.png', params={},
+        inputs=['能源转型了解度', '双碳了解度', '在学类别']),
+    'renewable': dict(
+        func=plot_renewable_recognition, output='Renewable_Recognition.png', params={},
+        inputs=['可再生_*']),
+    'trust_radar': dict(
+        func=plot_trust_radar, output='Trust_Radar.png', params={},
+        inputs=TRUST_ITEM_VARS + ['在学类别']),
+    'nev': dict(
+        func=plot_nev_analysis, output='NEV_Analysis.png', params={},
+        inputs=['5年内购车意愿', '购车类型偏好', '新能源汽车印象', '因素_*', '问题_*']),
+    'combined': dict(
+        func=create_combined_figure, output='Combined_Overview.png', params={},
+        inputs=['性别', '在学类别', '能源转型了解度', '双碳了解度', '可再生_*', '5年内购车意愿',
+                '因素_*', '问题_*'] + TRUST_ITEM_VARS),
+    'info_channels': dict(
+        func=create_info_channel_figure, output='Info_Channels.png', params={},
+        inputs=['渠道_*', '目标_*', '大学生义务', '发力_*']),
+    'correlation_heatmap': dict(
+        func=_correlation_heatmap_chart, output='Correlation_Heatmap.png', params={},
+        inputs=CORE_INDEX_VARS),
+    'correlation_network': dict(
+        func=_correlation_network_chart, output='Correlation_Network.png', params={},
+        inputs=CORE_INDEX_VARS),
+    'raincloud': dict(
+        func=plot_raincloud, output='Advanced_Raincloud_Attitude_x_Education.png',
+        params={'var': '态度', 'group_var': 'Education_Label', 'var_label': 'Attitude Score',
+                'group_label': 'Education Level', 'title': 'Attitude Distribution by Education Level'},
+        inputs=['态度', '在学类别']),
+    'ridgeline': dict(
+        func=plot_ridgeline, output='Advanced_Ridgeline_Core_Indices.png',
+        params={'variables': CORE_INDEX_VARS, 'var_labels': CORE_INDEX_LABELS},
+        inputs=CORE_INDEX_VARS),
+    'dumbbell': dict(
+        func=plot_dumbbell_chart, output='Advanced_Dumbbell_Education_Comparison.png',
+        params={'variables': CORE_INDEX_VARS, 'var_labels': CORE_INDEX_LABELS, 'group_var': '在学类别',
+                'group_labels': CODEBOOK.labels('在学类别'),
+                'title': 'Core Variables Comparison by Education'},
+        inputs=CORE_INDEX_VARS + ['在学类别']),
+    'radar_experience': dict(
+        func=plot_radar_comparison, output='Advanced_Radar_Energy_Experience.png',
+        params={'group_var': 'Experience_Label', 'variables': TRUST_ITEM_VARS,
+                'var_labels': TRUST_ITEM_LABELS, 'group_labels': CODEBOOK.labels('能源经历'),
+                'title': 'Impact of Energy Experience on Trust'},
+        inputs=TRUST_ITEM_VARS + ['能源经历']),
+    'radar_gender': dict(
+        func=plot_radar_comparison, output='Advanced_Radar_Gender.png',
+        params={'group_var': 'Gender_Label', 'variables': TRUST_ITEM_VARS,
+                'var_labels': TRUST_ITEM_LABELS, 'group_labels': CODEBOOK.labels('性别'),
+                'title': 'Impact of Gender on Trust and Policy Support'},
+        inputs=TRUST_ITEM_VARS + ['性别']),
+    'sankey': dict(
+        func=plot_sankey_flow, output='Advanced_Sankey_Knowledge_to_Intention.png',
+        params={'source_var': '能源转型了解度', 'target_var': '5年内购车意愿',
+                'source_labels': CODEBOOK.labels('能源转型了解度'),
+                'target_labels': CODEBOOK.labels('5年内购车意愿'),
+                'title': 'Flow Analysis: Knowledge Level to Purchase Intention'},
+        inputs=['能源转型了解度', '5年内购车意愿']),
+    'alluvial': dict(
+        func=plot_multi_stage_alluvial, output='Advanced_Multi_Stage_Alluvial.png', params={},
+        inputs=['认知指数', '信任指数', '态度', '5年内购车意愿']),
+    'chord': dict(
+        func=plot_chord_diagram, output='Advanced_Variable_Chord.png', params={},
+        inputs=CORE_INDEX_VARS + ['态度', '购车意愿', '5年内购车意愿']),
+    'clustermap': dict(
+        func=plot_respondent_clustermap, output='Advanced_Respondent_Cluster.png', params={},
+        inputs=['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '转型支持度', '碳中和支持度',
+                '新能源汽车态度', '激励政策认同度', '限油推新支持度'],
+        min_rows=(10, ['技术信任度', '新能源汽车技术信任度', '政策执行信任度', '转型支持度', '碳中和支持度',
+                       '新能源汽车态度', '激励政策认同度', '限油推新支持度'])),
+    'pca': dict(
+        func=plot_awareness_pca, output='Advanced_Awareness_PCA.png', params={},
+        inputs=CORE_INDEX_VARS + ['能源经历', '5年内购车意愿'],
+        min_rows=(20, CORE_INDEX_VARS)),
+    'sem': dict(
+        func=plot_sem_path_diagram, output='Advanced_SEM_Path.png', params={},
+        inputs=CORE_INDEX_VARS + ['态度', '5年内购车意愿']),
+    'risk_intention': dict(
+        func=plot_risk_intention_chart, output='Advanced_Risk_Intention.png', params={},
+        inputs=['问题_*', '5年内购车意愿']),
+    'segment_profiles': dict(
+        func=plot_segment_profiles, output='Advanced_Segment_Profiles.png', params={},
+        inputs=SEGMENT_ITEMS + [MULTI_SELECT_BLOCKS[block][0] + '*' for block in SEGMENT_BLOCKS],
+        min_rows=(20, SEGMENT_ITEMS)),
+    'pca_segments': dict(
+        func=_segment_pca_chart, output='Advanced_Awareness_PCA_Segments.png', params={},
+        inputs=CORE_INDEX_VARS + ['能源经历'] + SEGMENT_ITEMS
+               + [MULTI_SELECT_BLOCKS[block][0] + '*' for block in SEGMENT_BLOCKS],
+        min_rows=(20, CORE_INDEX_VARS)),
+}
+ASSOCIATION_INPUTS = [MULTI_SELECT_BLOCKS[block][0] + '*' for block in ASSOCIATION_BLOCKS]
+CHART_REGISTRY.update({
+    'association_heatmap': dict(
+        func=_association_heatmap_chart, output='Association_Heatmap.png', params={},
+        inputs=ASSOCIATION_INPUTS),
+    'association_network': dict(
+        func=_association_network_chart, output='Association_Network.png', params={},
+        inputs=ASSOCIATION_INPUTS),
+    'association_chord': dict(
+        func=_association_chord_chart, output='Advanced_Association_Chord.png', params={},
+        inputs=ASSOCIATION_INPUTS),
+})
+# One UpSet co-occurrence chart per multi-select block
+CHART_REGISTRY.update({
+    f'upset_{block}': dict(
+        func=plot_upset, output=f'Advanced_UpSet_{block.title()}.png', params={'block': block},
+        inputs=[prefix + '*'])
+    for block, (prefix, _, _) in MULTI_SELECT_BLOCKS.items()
+})
+# Purchase intention with and without each option, for the other multi-select blocks
+RISK_INTENTION_BLOCKS = ['factors', 'channels', 'goals', 'gov_focus']
+CHART_REGISTRY.update({
+    f'risk_intention_{block}': dict(
+        func=plot_risk_intention_chart, output=f'Advanced_Risk_Intention_{block.title()}.png',
+        params={'blocks': [block], 'output': f'Advanced_Risk_Intention_{block.title()}.png', 'terms': 'option',
+                'title': f'{MULTI_SELECT_BLOCKS[block][1]} vs Purchase Intention\n'
+                         f'(Selection % vs Intention Difference)'},
+        inputs=[MULTI_SELECT_BLOCKS[block][0] + '*', '5年内购车意愿'])
+    for block in RISK_INTENTION_BLOCKS
+})
+
+REBUILD_STATE_NAME = '.chart_fingerprints.json'
+REBUILD_STATE_VERSION = 2
+
+
+def resolve_chart_inputs(chart, columns):
+    """Concrete columns a registered chart reads, given the available columns"""
+    import fnmatch
+    resolved = []
+    for pattern in CHART_REGISTRY[chart]['inputs']:
+        if '*' in pattern:
+            resolved.extend(sorted(fnmatch.filter(columns, pattern)))
+        else:
+            resolved.append(pattern)
+    return list(dict.fromkeys(resolved))
+
+
+def chart_output_paths(chart, save_dir):
+    """Files a registered chart may write with the current export settings: its
+    image, the extra EXPORT_FORMATS files and the data bundle"""
+    import os
+    path = os.path.join(save_dir, CHART_REGISTRY[chart]['output'])
+    paths = [out_path for _, _, out_path in get_export_paths(path)]
+    if _export_setting('DATA_BUNDLES'):
+        paths.append(os.path.splitext(path)[0] + '.data.json')
+    return paths
+
+
+def chart_fingerprints(df, charts=None):
+    """
+    Fingerprint every chart by the content of its input columns
     
-    available_problems = {k: v for k, v in problem_vars.items() if k in df.columns}
+    A fingerprint covers the values (and dtype) of each resolved input column, the
+    absence of declared columns, the chart parameters, the module's code (shared
+    helpers such as save_fig and CODEBOOK included) and colours, and the value of
+    every FANOUT_SETTINGS entry, so editing the data, the code or an
+    output-affecting setting invalidates it. Each column is hashed once, however
+    many charts read it.
     
-    if len(available_problems) == 0 or '5年内购车意愿' not in df.columns:
-        ax.text(0.5, 0.5, 'Insufficient data', ha='center', va='center', fontsize=14)
-        save_fig(fig, os.path.join(save_dir, 'Advanced_Risk_Intention.png'))
-        return
+    Returns:
+        {chart: hex digest}
+    """
+    import hashlib
+    import inspect
+    import sys
+    charts = list(CHART_REGISTRY) if charts is None else charts
+    column_hashes = {}
+    shared = hashlib.sha1(inspect.getsource(sys.modules[__name__]).encode())
+    shared.update(repr(COLORS).encode())
+    shared.update(repr([(name, _export_setting(name)) for name in FANOUT_SETTINGS]).encode())
+    shared = shared.hexdigest()
+    
+    def column_hash(col):
+        if col not in column_hashes:
+            if col in df.columns:
+                values = pd.util.hash_pandas_object(df[col], index=False).to_numpy()
+                column_hashes[col] = hashlib.sha1(str(df[col].dtype).encode() + values.tobytes()).hexdigest()
+            else:
+                column_hashes[col] = 'missing'
+        return column_hashes[col]
+    
+    fingerprints = {}
+    for chart in charts:
+        spec = CHART_REGISTRY[chart]
+        h = hashlib.sha1(shared.encode())
+        h.update(repr(sorted(spec['params'].items())).encode())
+        h.update(str(len(df)).encode())
+        for col in resolve_chart_inputs(chart, list(df.columns)):
+            h.update(f'{col}={column_hash(col)};'.encode())
+        fingerprints[chart] = h.hexdigest()
+    return fingerprints
+
+
+def render_registered_chart(chart, df, save_dir, params=None):
+    """Draw one registered chart into save_dir and return its image path
     
-    # Intention to positive
-    df['Intention_Pos'] = 6 - df['5年内购车意愿']
+    df must carry the label columns; params replaces the registered parameters.
+    """
+    import os
+    import inspect
+    spec = CHART_REGISTRY[chart]
+    params = spec['params'] if params is None else params
+    if 'save_dir' in inspect.signature(spec['func']).parameters:
+        spec['func'](df, save_dir=save_dir, **params)
+    else:
+        spec['func'](df, save_path=os.path.join(save_dir, spec['output']), **params)
+    return os.path.join(save_dir, spec['output'])
+
+
+@background_encoding()
+def rebuild_charts(df, save_dir, charts=None, force=False, dry_run=False):
+    """
+    Re-render only the charts whose inputs changed since the last rebuild
     
-    problems = list(available_problems.keys())
-    labels = list(available_problems.values())
+    Fingerprints from the previous run, with the files each chart wrote, are kept
+    in save_dir/REBUILD_STATE_NAME. A chart is redrawn when its fingerprint
+    differs, it has never been built, or any file it wrote (image, extra formats,
+    data bundle) is missing.
     
-    # Calculate worry percentage and intention difference for each problem
-    worry_pcts = []
-    intention_diffs = []
-    intention_high = []
-    intention_low = []
-    error_bars = []
+    Args:
+        df: Survey data
+        save_dir: Output directory (holds the fingerprint state)
+        charts: Registry names to consider (default: all)
+        force: Redraw everything regardless of fingerprints
+        dry_run: Only report what would be redrawn
+    
+    Returns:
+        List of chart names that were (or would be) redrawn
+    """
+    import os
+    import json
+    
+    state_path = os.path.join(save_dir, REBUILD_STATE_NAME)
+    previous = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as fh:
+            state = json.load(fh)
+        if state.get('version') == REBUILD_STATE_VERSION:
+            previous = state.get('charts', {})
+    
+    current = chart_fingerprints(df, charts)
+    
+    def up_to_date(chart):
+        record = previous.get(chart)
+        return (record is not None and record['fingerprint'] == current[chart]
+                and all(os.path.exists(os.path.join(save_dir, name)) for name in record['outputs']))
+    stale = [chart for chart in current if force or not up_to_date(chart)]
+    print(f"Rebuild: {len(stale)} of {len(current)} charts out of date")
+    if dry_run or not stale:
+        return stale
+    
+    os.makedirs(save_dir, exist_ok=True)
+    report_glyph_coverage([symbol_text(CHART_SYMBOLS), *map(str, df.columns)], 'chart labels')
+    labelled = with_label_columns(df)
+    for chart in stale:
+        print(f"  ✓ {chart}")
+        render_registered_chart(chart, labelled, save_dir)
+    flush_encoders()
+    
+    # Charts are only recorded once their files are written
+    for chart in stale:
+        previous[chart] = {
+            'fingerprint': current[chart],
+            'outputs': [os.path.relpath(path, save_dir) for path in chart_output_paths(chart, save_dir)
+                        if os.path.exists(path)],
+        }
+    with open(state_path, 'w', encoding='utf-8') as fh:
+        json.dump({'version': REBUILD_STATE_VERSION, 'charts': dict(sorted(previous.items()))},
+                  fh, indent=2)
+        fh.write('\n')
+    return stale
+
+
+# Ceiling on the peak additional Python-heap memory (tracemalloc) of one chart render
+CHART_MEMORY_BUDGET_MB = 64
+
+
+def _frame_signature(df):
+    """Columns, dtypes and a content hash of df, to detect in-place modification"""
+    content = int(pd.util.hash_pandas_object(df, index=True).sum())
+    return tuple(df.columns), tuple(str(t) for t in df.dtypes), content
+
+
+def check_chart_budgets(df, save_dir, charts=None, budget_mb=None):
+    """
+    Render registered charts and check that each leaves its input untouched and
+    stays within the memory budget (suitable as a CI gate)
     
-    for prob in problems:
-        # Worry percentage (proportion of people selecting this problem)
-        worry_pct = df[prob].sum() / len(df) * 100
-        worry_pcts.append(worry_pct)
-        
-        # Intention difference between worried and not worried groups
-        worried = df[df[prob] == 1]['Intention_Pos']
-        not_worried = df[df[prob] == 0]['Intention_Pos']
-        
-        mean_worried = worried.mean() if len(worried) > 0 else 0
-        mean_not_worried = not_worried.mean() if len(not_worried) > 0 else 0
-        
-        intention_high.append(mean_not_worried)
-        intention_low.append(mean_worried)
-        intention_diffs.append(mean_not_worried - mean_worried)
-        
-        # Standard error
-        se = worried.std() / np.sqrt(len(worried)) if len(worried) > 1 else 0
-        error_bars.append(se)
+    Every chart receives the same labelled frame. Afterwards its columns, dtypes
+    and contents must be unchanged, and the tracemalloc peak above the pre-render
+    level (including image encoding) must not exceed budget_mb. The first chart
+    to use scipy/sklearn also pays for importing it.
     
-    # Sort (by worry percentage)
-    sorted_idx = np.argsort(worry_pcts)[::-1]
-    labels = [labels[i] for i in sorted_idx]
-    worry_pcts = [worry_pcts[i] for i in sorted_idx]
-    intention_diffs = [intention_diffs[i] for i in sorted_idx]
-    intention_high = [intention_high[i] for i in sorted_idx]
-    intention_low = [intention_low[i] for i in sorted_idx]
-    error_bars = [error_bars[i] for i in sorted_idx]
+    Returns:
+        {chart: peak additional MB}
     
-    y_pos = np.arange(len(labels))
+    Raises:
+        RuntimeError listing every chart that mutated its input or exceeded the budget
+    """
+    import io
+    import contextlib
+    import tracemalloc
+    
+    budget_mb = CHART_MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    charts = list(CHART_REGISTRY) if charts is None else charts
+    labelled = with_label_columns(df)
+    signature = _frame_signature(labelled)
+    
+    flush_encoders()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    peaks, violations = {}, []
+    try:
+        for chart in charts:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            with contextlib.redirect_stdout(io.StringIO()):
+                render_registered_chart(chart, labelled, save_dir)
+                flush_encoders()
+            peaks[chart] = (tracemalloc.get_traced_memory()[1] - baseline) / 2**20
+            plt.close('all')
+            
+            if peaks[chart] > budget_mb:
+                violations.append(f'{chart}: peak {peaks[chart]:.1f} MB exceeds {budget_mb} MB')
+            if _frame_signature(labelled) != signature:
+                violations.append(f'{chart}: modified its input DataFrame')
+                signature = _frame_signature(labelled)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    
+    print(f"Memory budget ({budget_mb} MB per chart, n={len(df)}):")
+    for chart, peak in sorted(peaks.items(), key=lambda item: -item[1]):
+        print(f"  {chart:<22s} {peak:7.1f} MB")
+    if violations:
+        raise RuntimeError(f'{len(violations)} chart budget violation(s):\n' + '\n'.join(violations))
+    return peaks
+
+
+CHART_PROFILE_SUMMARY_NAME = 'chart_profile_summary.json'
+
+
+def profile_charts(df, save_dir, charts=None, top=5):
+    """
+    Render registered charts with phase profiling and rank where the time goes
     
-    # Create dual axis
-    ax2 = ax.twiny()
+    Each registered chart is one top-level record (its registry wrapper's data
+    prep included), so the summary covers the whole suite. The summary is
+    printed and written to CHART_PROFILE_SUMMARY_NAME in save_dir.
     
-    # Draw worry percentage (horizontal bar chart)
-    bars = ax.barh(y_pos, worry_pcts, height=0.6, color=UNIFIED_COLORS['primary'], alpha=0.7,
-                   edgecolor='white', linewidth=2, label='Worry %')
+    Returns:
+        summarize_chart_profiles result
+    """
+    import io
+    import os
+    import json
+    global CHART_PROFILING
+    
+    charts = list(CHART_REGISTRY) if charts is None else charts
+    os.makedirs(save_dir, exist_ok=True)
+    labelled = with_label_columns(df)
+    
+    previous, CHART_PROFILING = CHART_PROFILING, True
+    start = len(_chart_profiles)
+    try:
+        for chart in charts:
+            with contextlib.redirect_stdout(io.StringIO()), profile_chart(chart, save_dir):
+                render_registered_chart(chart, labelled, save_dir)
+            plt.close('all')
+    finally:
+        CHART_PROFILING = previous
+        flush_encoders()
+    
+    summary = summarize_chart_profiles(_chart_profiles[start:], top=top)
+    with open(os.path.join(save_dir, CHART_PROFILE_SUMMARY_NAME), 'w', encoding='utf-8') as fh:
+        json.dump(summary, fh, indent=2, ensure_ascii=False)
+        fh.write('\n')
+    print_profile_summary(summary)
+    return summary
+
+
+# ============================================================================
+# Per-cohort Fan-out
+# ============================================================================
+
+# Module settings copied into fan-out worker processes: every switch that changes what
+# a chart draws or writes. Settings sections added later extend this list.
+FANOUT_SETTINGS = [
+    # Fonts (workers resolve them again when these differ from the defaults)
+    'FONT_DIR', 'FONT_STACK', 'MISSING_GLYPH_POLICY',
+    # Export and encoding
+    'FIGURE_DPI', 'EXPORT_FORMATS', 'BACKGROUND_ENCODING', 'ENCODER_WORKERS',
+    'ENCODER_MAX_PENDING', 'PNG_COMPRESS_LEVEL', 'LAYOUT_MODE',
+    'WEB_EXPORT_DIR', 'WEB_BASE_WIDTH', 'WEB_SCALES', 'WEB_FORMATS', 'WEB_QUALITY',
+    'DATA_BUNDLES', 'DATA_BUNDLE_PRECISION', 'DATA_BUNDLE_SCORE_BINS',
+    # Instrumentation and profiling records
+    'CHART_INSTRUMENTATION', 'FIGURE_LEAK_POLICY', 'CHART_PROFILING',
+    # Chart content
+    'LABEL_OFFSET_RINGS', 'LABEL_OFFSET_DIRECTIONS', 'LABEL_LEADER_STYLE', 'LABEL_LEADER_MIN_GAP',
+    'HEATMAP_LARGE_ITEMS', 'HEATMAP_ANNOTATE_MIN_ABS', 'HEATMAP_ANNOTATE_TOP_K',
+    'HEATMAP_MAX_TICK_LABELS', 'HEATMAP_MIN_ANNOT_PT', 'CHORD_TANGENTIAL_LABELS',
+    'RISK_INTENTION_MAX_ITEMS',
+    'CI_WHISKERS', 'CI_LEVEL', 'CI_METHOD', 'CI_RESAMPLES', 'CI_SEED', 'CI_WHISKER_STYLE',
+    'SIGNIFICANCE_MARKERS', 'SIGNIFICANCE_LEVELS', 'OMNIBUS_CONTRAST', 'PERMUTATION_RESAMPLES',
+    'PERMUTATION_SEED', 'PERMUTATION_SHARD', 'PERMUTATION_BATCH_CELLS', 'PERMUTATION_WORKERS',
+    'PERMUTATION_PARALLEL_MIN_CELLS',
+    'SEGMENT_CLASSES', 'SEGMENT_STARTS', 'SEGMENT_MAX_ITER', 'SEGMENT_TOL', 'SEGMENT_BATCH_SIZE',
+    'SEGMENT_EPOCHS', 'SEGMENT_SEED', 'SEGMENT_PRIOR',
+]
+COHORT_INDEX_NAME = 'index.json'
+
+
+def chart_skip_reason(chart, df):
+    """Why a registered chart would only draw a placeholder for df, or None"""
+    spec = CHART_REGISTRY[chart]
+    if 'min_rows' not in spec:
+        return None
+    min_n, columns = spec['min_rows']
+    columns = [c for c in columns if c in df.columns]
+    n_complete = len(df[columns].dropna()) if columns else 0
+    if n_complete < min_n:
+        return f'{n_complete} complete rows, needs {min_n}'
+    return None
+
+
+def _cohort_dir_name(cohort_columns, key):
+    """'col=value' path segments for one cohort, safe for file systems"""
+    import os
+    import re
+    segments = []
+    for col, value in zip(cohort_columns, key):
+        text = re.sub(r'[\\/:*?"<>|\s]+', '_', f'{col}={value}')
+        segments.append(text)
+    return os.path.join(*segments)
+
+
+def _apply_settings(settings):
+    """Fan-out worker initializer: take over the parent's module settings"""
+    global _font_resolution
+    fonts_changed = any(settings.get(name, globals()[name]) != globals()[name]
+                        for name in ('FONT_DIR', 'FONT_STACK'))
+    globals().update(settings)
+    if fonts_changed:
+        _font_resolution = None
+        resolve_fonts()
+
+
+@background_encoding()
+def _render_cohort(cohort_df, cohort_dir, charts, web_dir=None):
+    """Draw the given charts for one cohort; data logs go to cohort_dir/render.log and
+    web variants (with WEB_EXPORT_DIR set) to web_dir"""
+    import os
+    import contextlib
+    os.makedirs(cohort_dir, exist_ok=True)
+    rendered, failed = {}, {}
+    with open(os.path.join(cohort_dir, 'render.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), export_settings(WEB_EXPORT_DIR=web_dir):
+        for chart in charts:
+            try:
+                path = render_registered_chart(chart, cohort_df, cohort_dir)
+                rendered[chart] = os.path.basename(path)
+            except Exception as exc:
+                failed[chart] = f'{type(exc).__name__}: {exc}'
+            finally:
+                plt.close('all')
+        try:
+            flush_encoders()
+        except RuntimeError as exc:
+            failed['_writes'] = str(exc)
+    return rendered, failed
+
+
+def render_cohorts(df, cohort_columns, out_dir, charts=None, workers=None, min_cohort_rows=1):
+    """
+    Render the chart set for every cohort into its own directory
     
-    # Add worry percentage values
-    for i, (bar, pct) in enumerate(zip(bars, worry_pcts)):
-        ax.text(pct + 1, bar.get_y() + bar.get_height()/2, f'{pct:.0f}%',
-               va='center', fontsize=10, fontweight='bold', color=UNIFIED_COLORS['primary'])
+    The data is split once with a single groupby; cohorts are drawn in parallel
+    worker processes (pyplot is not thread-safe) into out_dir/<col>=<value>/...
+    Charts whose registry min_rows check fails for a cohort are skipped without
+    being drawn, as are cohorts smaller than min_cohort_rows. A summary index of
+    cohort sizes, rendered files, skips and failures is written to
+    out_dir/COHORT_INDEX_NAME (plus index.csv).
     
-    # Draw intention difference points (on second x-axis)
-    scatter_x = intention_diffs
-    scatter_colors = [UNIFIED_COLORS['positive'] if d > 0 else UNIFIED_COLORS['negative'] for d in scatter_x]
+    Args:
+        df: Survey data
+        cohort_columns: Column name or list of names defining a cohort (e.g. campus, year)
+        out_dir: Root output directory
+        charts: Registry names to draw (default: all)
+        workers: Worker processes (default: CPU count; 1 renders in this process)
+        min_cohort_rows: Smallest cohort that is rendered at all
+    
+    Returns:
+        List of per-cohort index entries
+    """
+    import os
+    import json
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import multiprocessing
+    
+    if isinstance(cohort_columns, str):
+        cohort_columns = [cohort_columns]
+    charts = list(CHART_REGISTRY) if charts is None else list(charts)
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+    
+    # Compact and pack before slicing: every cohort frame is pickled to a worker
+    labelled = with_label_columns(pack_multi_select(compact_dtypes(df)))
+    entries, jobs = [], []
+    for key, cohort_df in labelled.groupby(cohort_columns, sort=True, observed=True):
+        key = key if isinstance(key, tuple) else (key,)
+        entry = {
+            'cohort': {col: (value.item() if hasattr(value, 'item') else value)
+                       for col, value in zip(cohort_columns, key)},
+            'dir': _cohort_dir_name(cohort_columns, key).replace(os.sep, '/'),
+            'n': len(cohort_df),
+            'charts': {},
+            'skipped': {},
+            'failed': {},
+        }
+        entries.append(entry)
+        if len(cohort_df) < min_cohort_rows:
+            entry['skipped'] = {chart: f'cohort has {len(cohort_df)} rows, needs {min_cohort_rows}'
+                                for chart in charts}
+            continue
+        to_draw = []
+        for chart in charts:
+            reason = chart_skip_reason(chart, cohort_df)
+            if reason:
+                entry['skipped'][chart] = reason
+            else:
+                to_draw.append(chart)
+        if to_draw:
+            # Chart names repeat across cohorts, so each gets its own web manifest
+            web_dir = os.path.join(WEB_EXPORT_DIR, entry['dir']) if WEB_EXPORT_DIR else None
+            jobs.append((entry, cohort_df, os.path.join(out_dir, entry['dir']), to_draw, web_dir))
+    
+    print(f"Fan-out: {len(entries)} cohorts by {', '.join(cohort_columns)}, "
+          f"{sum(len(job[3]) for job in jobs)} charts on {min(workers, max(len(jobs), 1))} worker(s)")
+    
+    if workers == 1 or len(jobs) <= 1:
+        for entry, cohort_df, cohort_dir, to_draw, web_dir in jobs:
+            entry['charts'], entry['failed'] = _render_cohort(cohort_df, cohort_dir, to_draw, web_dir)
+            print(f"  ✓ {entry['dir']} ({len(entry['charts'])} charts)")
+    else:
+        # Spawned workers start clean (no inherited encoder threads) and get the current settings
+        settings = {name: globals()[name] for name in FANOUT_SETTINGS}
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context,
+                                 initializer=_apply_settings, initargs=(settings,)) as pool:
+            futures = {pool.submit(_render_cohort, cohort_df, cohort_dir, to_draw, web_dir): entry
+                       for entry, cohort_df, cohort_dir, to_draw, web_dir in jobs}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    entry['charts'], entry['failed'] = future.result()
+                except Exception as exc:
+                    entry['failed'] = {'_cohort': f'{type(exc).__name__}: {exc}'}
+                print(f"  ✓ {entry['dir']} ({len(entry['charts'])} charts)")
+    
+    with open(os.path.join(out_dir, COHORT_INDEX_NAME), 'w', encoding='utf-8') as fh:
+        json.dump({'cohort_columns': cohort_columns, 'charts': charts, 'cohorts': entries},
+                  fh, indent=2, ensure_ascii=False, default=str)
+        fh.write('\n')
+    pd.DataFrame([{**entry['cohort'], 'dir': entry['dir'], 'n': entry['n'],
+                   'rendered': len(entry['charts']), 'skipped': len(entry['skipped']),
+                   'failed': len(entry['failed'])} for entry in entries]
+                 ).to_csv(os.path.join(out_dir, 'index.csv'), index=False, encoding='utf-8-sig')
+    
+    n_failed = sum(len(entry['failed']) for entry in entries)
+    if n_failed:
+        print(f"  ! {n_failed} chart(s) failed, see {COHORT_INDEX_NAME}")
+    return entries
+
+
+# ============================================================================
+# Incremental Aggregates
+# ============================================================================
+
+# Statistics tracked by SurveyAggregates for the charts that refresh from it
+AGGREGATE_COUNT_COLUMNS = ['性别', '在学类别', '能源经历', '专业_*', '能源转型了解度', '双碳了解度']
+AGGREGATE_MOMENT_BLOCKS = {'core': CORE_INDEX_VARS, 'trust': TRUST_ITEM_VARS}
+AGGREGATE_GROUPS = [('在学类别', 'core'), ('在学类别', 'trust')]
+AGGREGATE_STATE_VERSION = 3
+
+# Digest of the aggregated rows: sum of row_hash[i] * BASE**i modulo a prime, so
+# digests of consecutive chunks combine without revisiting the rows
+_DIGEST_PRIME = (1 << 61) - 1
+_DIGEST_BASE = 1_000_003
+
+# Moment states are pairwise-complete, like DataFrame.mean() per column and .corr():
+# for every column pair (i, j), over the rows where both are present,
+#   n[i, j]     number of rows
+#   mean[i, j]  mean of column i
+#   m2[i, j]    sum of squared deviations of column i
+#   cross[i, j] sum of cross-products of the deviations of columns i and j
+# The diagonals are the per-column count, mean and sum of squares.
+
+
+def _chunk_moments(values):
+    """Pairwise-complete (n, mean, m2, cross) moments of a 2-D array with NaN gaps"""
+    present = ~np.isnan(values)
+    # Shift by the column means first so the sums below do not lose precision
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)   # Columns with no values
+        shift = np.nan_to_num(np.nanmean(values, axis=0))
+    centered = np.where(present, values - shift, 0.0)
+    weights = present.astype(float)
+    n = weights.T @ weights
+    sums = centered.T @ weights                   # sums[i, j]: column i over pair rows
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pair_mean = np.where(n > 0, sums / n, 0.0)
+    m2 = (centered ** 2).T @ weights - sums * pair_mean
+    cross = centered.T @ centered - sums * pair_mean.T
+    return n, pair_mean + shift[:, None], m2, cross
+
+
+def _rows_digest(rows):
+    """Positional digest of a table's rows that does not depend on column dtypes"""
+    # Numbers hash as float so an int column that gains a NaN (and becomes float64),
+    # or is stored as nullable Int8, keeps the digest of its unchanged rows
+    values = pd.DataFrame({
+        col: (rows[col].to_numpy(dtype=float, na_value=np.nan)
+              if pd.api.types.is_numeric_dtype(rows[col]) or pd.api.types.is_bool_dtype(rows[col])
+              else rows[col].astype(str).to_numpy())
+        for col in rows.columns})
+    digest, weight = 0, 1
+    for row_hash in pd.util.hash_pandas_object(values, index=False).to_numpy():
+        digest = (digest + int(row_hash) * weight) % _DIGEST_PRIME
+        weight = weight * _DIGEST_BASE % _DIGEST_PRIME
+    return digest
+
+
+def _combine_digests(digest_a, n_a, digest_b):
+    """Digest of rows A followed by rows B, from the digests of each"""
+    return (digest_a + digest_b * pow(_DIGEST_BASE, n_a, _DIGEST_PRIME)) % _DIGEST_PRIME
+
+
+def _merge_moments(a, b):
+    """Combine two pairwise moment states (Chan et al. parallel update, per pair)"""
+    n_a, mean_a, m2_a, cross_a = a
+    n_b, mean_b, m2_b, cross_b = b
+    n = n_a + n_b
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(n > 0, n_b / n, 0.0)
+        pair_weight = np.where(n > 0, n_a * n_b / n, 0.0)
+    delta = mean_b - mean_a
+    return (n, mean_a + delta * weight, m2_a + m2_b + delta ** 2 * pair_weight,
+            cross_a + cross_b + delta * delta.T * pair_weight)
+
+
+class SurveyAggregates:
+    """
+    Mergeable summary statistics of an append-only survey table
     
-    ax2.scatter(scatter_x, y_pos, s=200, c=scatter_colors, 
-               edgecolors='white', linewidths=2, zorder=5, marker='D')
+    Keeps per-category counts, and for each moment block pairwise-complete counts,
+    means and co-moments (overall and per group), which give the same per-column
+    means and variances and pairwise correlations as the DataFrame methods,
+    without revisiting old rows. update() costs time proportional to the new
+    rows; state round-trips through JSON.
     
-    # Add error bars
-    ax2.errorbar(scatter_x, y_pos, xerr=error_bars, fmt='none', 
-                ecolor='#666666', elinewidth=1.5, capsize=4, capthick=1.5, zorder=4)
+    Args:
+        count_columns: Columns (or 'prefix_*' patterns) to count categories of
+        moment_blocks: {block name: columns} for means, variances and correlations
+        groups: (group column, block name) pairs to keep per-group moments for
+    """
     
-    # Add difference values (above points)
-    for i, (x, diff) in enumerate(zip(scatter_x, intention_diffs)):
-        ax2.text(x, y_pos[i] + 0.25, f'{diff:+.2f}', va='bottom', ha='center',
-                fontsize=11, fontweight='bold', color=scatter_colors[i],
-                bbox=dict(boxstyle='round,pad=0.2', facecolor='white', 
-                         edgecolor=scatter_colors[i], alpha=0.9))
+    def __init__(self, count_columns=None, moment_blocks=None, groups=None):
+        self.count_columns = list(AGGREGATE_COUNT_COLUMNS if count_columns is None else count_columns)
+        self.moment_blocks = {k: list(v) for k, v in
+                              (AGGREGATE_MOMENT_BLOCKS if moment_blocks is None else moment_blocks).items()}
+        self.groups = [tuple(g) for g in (AGGREGATE_GROUPS if groups is None else groups)]
+        self.n_rows = 0
+        self.rows_digest = 0       # _rows_digest of the rows aggregated so far
+        self.counts = {}          # {column: {value: count}}
+        self.moments = {}         # {block: (n, mean, m2, cross)}, see _chunk_moments
+        self.group_moments = {}   # {(group column, block): {group value: (n, mean, m2, cross)}}
+    
+    @classmethod
+    def from_frame(cls, df, **spec):
+        """Aggregates of a whole table"""
+        agg = cls(**spec)
+        agg.update(df)
+        return agg
+    
+    def _resolve_count_columns(self, columns):
+        import fnmatch
+        resolved = []
+        for pattern in self.count_columns:
+            resolved.extend(sorted(fnmatch.filter(columns, pattern)) if '*' in pattern else [pattern])
+        return [c for c in dict.fromkeys(resolved) if c in columns]
+    
+    def update(self, new_rows):
+        """Fold new rows into the state; returns self"""
+        if len(new_rows) == 0:
+            return self
+        for col in self._resolve_count_columns(list(new_rows.columns)):
+            col_counts = self.counts.setdefault(col, {})
+            for value, count in new_rows[col].value_counts().items():
+                value = value.item() if hasattr(value, 'item') else value
+                col_counts[value] = col_counts.get(value, 0) + int(count)
+        
+        for block, columns in self.moment_blocks.items():
+            if not set(columns) <= set(new_rows.columns):
+                continue
+            values = new_rows[columns].to_numpy(dtype=float)
+            chunk = _chunk_moments(values)
+            self.moments[block] = _merge_moments(self.moments[block], chunk) if block in self.moments else chunk
+            for group_col, group_block in self.groups:
+                if group_block != block or group_col not in new_rows.columns:
+                    continue
+                per_group = self.group_moments.setdefault((group_col, block), {})
+                codes, uniques = pd.factorize(new_rows[group_col])
+                for i, value in enumerate(uniques):
+                    value = value.item() if hasattr(value, 'item') else value
+                    chunk = _chunk_moments(values[codes == i])
+                    per_group[value] = _merge_moments(per_group[value], chunk) if value in per_group else chunk
+        
+        self.rows_digest = _combine_digests(self.rows_digest, self.n_rows, _rows_digest(new_rows))
+        self.n_rows += len(new_rows)
+        return self
     
-    # Zero line
-    ax2.axvline(x=0, color='#BDC3C7', linestyle='--', linewidth=1.5, alpha=0.7)
+    def extend(self, df):
+        """
+        Fold in the rows of df not yet seen (df must be the same table, appended to)
+        
+        Returns:
+            Number of new rows
+        
+        Raises:
+            ValueError: If df is shorter than the aggregated table, or any aggregated
+                row has a different value (dtype changes alone are accepted)
+        """
+        if len(df) < self.n_rows:
+            raise ValueError(f'table has {len(df)} rows, aggregates already cover {self.n_rows}')
+        if _rows_digest(df.iloc[:self.n_rows]) != self.rows_digest:
+            raise ValueError('rows already aggregated have changed; rebuild with SurveyAggregates.from_frame')
+        new_rows = df.iloc[self.n_rows:]
+        self.update(new_rows)
+        return len(new_rows)
+    
+    def merge(self, other):
+        """Combine with aggregates of the rows that follow this state's rows; returns self"""
+        for col, col_counts in other.counts.items():
+            mine = self.counts.setdefault(col, {})
+            for value, count in col_counts.items():
+                mine[value] = mine.get(value, 0) + count
+        for block, state in other.moments.items():
+            self.moments[block] = _merge_moments(self.moments[block], state) if block in self.moments else state
+        for key, per_group in other.group_moments.items():
+            mine = self.group_moments.setdefault(key, {})
+            for value, state in per_group.items():
+                mine[value] = _merge_moments(mine[value], state) if value in mine else state
+        self.rows_digest = _combine_digests(self.rows_digest, self.n_rows, other.rows_digest)
+        self.n_rows += other.n_rows
+        return self
+    
+    # ---- Derived statistics ----
+    
+    def value_counts(self, col):
+        """Category counts, sorted by category"""
+        return pd.Series(self.counts.get(col, {}), dtype=int).sort_index()
+    
+    def counts_present(self, block):
+        """Number of non-missing values per column of a moment block"""
+        return pd.Series(np.diag(self.moments[block][0]).astype(int), index=self.moment_blocks[block])
+    
+    def means(self, block):
+        """Per-column means over the non-missing values"""
+        n, mean, _, _ = self.moments[block]
+        with np.errstate(invalid='ignore'):
+            return pd.Series(np.where(np.diag(n) > 0, np.diag(mean), np.nan), index=self.moment_blocks[block])
+    
+    def variances(self, block, ddof=1):
+        n, _, m2, _ = self.moments[block]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(np.diag(m2) / (np.diag(n) - ddof), index=self.moment_blocks[block])
+    
+    def correlation(self, block):
+        """Pearson correlation matrix of a moment block, over pairwise-complete rows"""
+        _, _, m2, cross = self.moments[block]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cross / np.sqrt(m2 * m2.T)
+        columns = self.moment_blocks[block]
+        return pd.DataFrame(corr, index=columns, columns=columns)
+    
+    def group_means(self, group_col, block):
+        """Per-column block means per group value, indexed by sorted group value"""
+        per_group = self.group_moments.get((group_col, block), {})
+        return pd.DataFrame({value: np.where(np.diag(state[0]) > 0, np.diag(state[1]), np.nan)
+                             for value, state in sorted(per_group.items())},
+                            index=self.moment_blocks[block]).T
+    
+    # ---- Persistence ----
+    
+    def to_dict(self):
+        def encode(state):
+            n, mean, m2, cross = state
+            return {'n': n.astype(int).tolist(), 'mean': mean.tolist(), 'm2': m2.tolist(),
+                    'cross': cross.tolist()}
+        return {
+            'version': AGGREGATE_STATE_VERSION,
+            'spec': {'count_columns': self.count_columns, 'moment_blocks': self.moment_blocks,
+                     'groups': [list(g) for g in self.groups]},
+            'n_rows': self.n_rows,
+            'rows_digest': self.rows_digest,
+            'counts': {col: [[value, count] for value, count in c.items()] for col, c in self.counts.items()},
+            'moments': {block: encode(state) for block, state in self.moments.items()},
+            'group_moments': [{'group': g, 'block': b,
+                               'values': [[value, encode(state)] for value, state in per_group.items()]}
+                              for (g, b), per_group in self.group_moments.items()],
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != AGGREGATE_STATE_VERSION:
+            raise ValueError(f"unsupported aggregate state version {data.get('version')}")
+        
+        def decode(state):
+            return (np.array(state['n'], dtype=float), np.array(state['mean']),
+                    np.array(state['m2']), np.array(state['cross']))
+        agg = cls(**data['spec'])
+        agg.n_rows = data['n_rows']
+        agg.rows_digest = data['rows_digest']
+        agg.counts = {col: {value: count for value, count in pairs} for col, pairs in data['counts'].items()}
+        agg.moments = {block: decode(state) for block, state in data['moments'].items()}
+        agg.group_moments = {(entry['group'], entry['block']): {value: decode(state) for value, state in entry['values']}
+                             for entry in data['group_moments']}
+        return agg
+    
+    def save(self, path):
+        import json
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, ensure_ascii=False)
+        return path
+    
+    @classmethod
+    def load(cls, path):
+        import json
+        with open(path, encoding='utf-8') as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def _aggregate_state_version(path):
+    import json
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh).get('version')
+
+
+@background_encoding()
+def refresh_aggregate_charts(df, save_dir, state_path=None):
+    """
+    Update the persisted aggregates with rows appended since the last run and
+    redraw the charts that are drawn from aggregates only
     
-    # Set axes
-    ax.set_yticks(y_pos)
-    ax.set_yticklabels(labels, fontsize=12)
-    ax.set_xlabel('Worry Percentage (%)', fontsize=13, fontweight='bold', color=UNIFIED_COLORS['primary'])
-    ax.set_xlim(0, max(worry_pcts) * 1.3)
+    Args:
+        df: Full survey table, new rows appended (if earlier rows changed, the
+            aggregates are rebuilt from the whole table)
+        save_dir: Output directory, as for rebuild_charts
+        state_path: Aggregate state file (default: save_dir/.survey_aggregates.json)
     
-    ax2.set_xlabel('Intention Difference (Not Worried - Worried)', fontsize=13, fontweight='bold', color='#666666')
-    xlim_max = max(abs(min(scatter_x)), abs(max(scatter_x))) * 1.5
-    ax2.set_xlim(-xlim_max, xlim_max)
+    Returns:
+        The updated SurveyAggregates
+    """
+    import os
+    state_path = state_path or os.path.join(save_dir, '.survey_aggregates.json')
+    agg = None
+    if os.path.exists(state_path) and _aggregate_state_version(state_path) == AGGREGATE_STATE_VERSION:
+        agg = SurveyAggregates.load(state_path)
+        try:
+            n_new = agg.extend(df)
+        except ValueError as exc:
+            print(f"Aggregates rebuilt: {exc}")
+            agg = None
+    if agg is None:
+        agg = SurveyAggregates.from_frame(df)
+        n_new = len(df)
+    print(f"Aggregates: {n_new} new rows, {agg.n_rows} total")
+    
+    os.makedirs(save_dir, exist_ok=True)
+    output = lambda chart: os.path.join(save_dir, CHART_REGISTRY[chart]['output'])
+    edu_labels = CODEBOOK.labels('在学类别')
+    
+    plot_demographics(None, output('demographics'), counts={
+        col: agg.value_counts(col) for col in ['性别', '在学类别', '能源经历', '专业_理工类', '专业_经管类', '专业_人文社科类']})
+    trust_by_edu = agg.group_means('在学类别', 'trust').reindex([1, 2, 3])
+    plot_trust_radar(None, output('trust_radar'), means=agg.means('trust'),
+                     means_by_education=trust_by_edu, n_total=agg.n_rows)
+    spec = CHART_REGISTRY['dumbbell']['params']
+    plot_dumbbell_chart(None, spec['variables'], spec['var_labels'], spec['group_var'], edu_labels,
+                        output('dumbbell'), spec['title'],
+                        group_means=agg.group_means('在学类别', 'core'))
+    core_corr = named_correlation(agg.correlation('core'))
+    plot_correlation_heatmap(core_corr, output('correlation_heatmap'))
+    plot_correlation_network(core_corr, output('correlation_network'))
+    flush_encoders()
+    
+    agg.save(state_path)
+    return agg
+
+
+# ============================================================================
+# On-demand Chart Service
+# ============================================================================
+
+SERVICE_CONTENT_TYPES = {'png': 'image/png', 'webp': 'image/webp', 'jpg': 'image/jpeg',
+                         'svg': 'image/svg+xml', 'pdf': 'application/pdf'}
+
+
+def _parse_query_value(raw, default):
+    """Convert a query string value to the type of the parameter's default"""
+    if isinstance(default, (list, tuple)):
+        return [v.strip() for v in raw.split(',')]
+    if isinstance(default, bool):
+        return raw.lower() in ('1', 'true', 'yes')
+    if isinstance(default, (int, float)):
+        return type(default)(raw)
+    return raw
+
+
+def _filter_values(column, raw_values):
+    """
+    Query values converted exactly to a numeric column's dtype
     
-    # Legend
-    from matplotlib.patches import Patch
-    from matplotlib.lines import Line2D
-    legend_elements = [
-        Patch(facecolor=UNIFIED_COLORS['primary'], alpha=0.7, label='Worry %'),
-        Line2D([0], [0], marker='D', color='w', markerfacecolor=UNIFIED_COLORS['positive'],
-               markersize=10, label='Positive Diff (Not worried has higher int.)'),
-        Line2D([0], [0], marker='D', color='w', markerfacecolor=UNIFIED_COLORS['negative'],
-               markersize=10, label='Negative Diff (Worried has higher int.)'),
-    ]
-    ax.legend(handles=legend_elements, loc='lower right', fontsize=10, framealpha=0.95)
+    Values the column cannot hold (1.5 or 300 for an int8 column, text for any
+    numeric column) are a ValueError rather than being truncated or wrapped.
+    """
+    dtype = np.dtype(getattr(column.dtype, 'numpy_dtype', column.dtype))
+    if dtype.kind == 'b':
+        flags = {'1': True, 'true': True, 'yes': True, '0': False, 'false': False, 'no': False}
+        invalid = [raw for raw in raw_values if raw.lower() not in flags]
+        converted = [flags.get(raw.lower()) for raw in raw_values]
+    else:
+        numbers = pd.to_numeric(pd.Series(raw_values, dtype=object), errors='coerce').astype(float)
+        valid = np.isfinite(numbers)
+        if dtype.kind in 'iu':
+            info = np.iinfo(dtype)
+            valid &= (numbers % 1 == 0) & numbers.between(info.min, info.max)
+        invalid = [raw for raw, ok in zip(raw_values, valid) if not ok]
+        converted = numbers[valid].astype(dtype)
+    if invalid:
+        raise ValueError(f"invalid value(s) for '{column.name}' ({dtype}): {', '.join(invalid)}")
+    return converted
+
+
+class ChartService:
+    """
+    Render charts on demand from a resident DataFrame
     
-    ax.set_title('NEV Concerns vs Purchase Intention\n(Worry % vs Intention Difference)', 
-                fontsize=18, fontweight='bold', pad=20)
+    Rendered bytes are cached per request key (chart, format, filters, parameters)
+    with LRU eviction. Concurrent identical requests share a single render; distinct
+    renders are serialized because pyplot is process-global; export settings are
+    overridden for the rendering thread only (export_settings), so charts saved
+    concurrently by other threads keep the module settings. Chart logs are
+    discarded for the rendering thread only (thread_output).
     
-    sns.despine(ax=ax, left=True)
-    ax.tick_params(left=False)
-    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    Args:
+        df: Survey data kept in memory (dtype-compacted, multi-select blocks packed)
+            for the lifetime of the service
+        cache_size: Maximum number of rendered charts kept in the cache
+    """
     
-    # Add explanation
-    ax.text(0.02, 0.02, 'Positive difference means worry about this issue reduces purchase intention', 
-           transform=ax.transAxes, fontsize=9, color='#666666', style='italic')
+    def __init__(self, df, cache_size=64):
+        from collections import OrderedDict
+        self.df = with_label_columns(pack_multi_select(compact_dtypes(df)))
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+    
+    def parse_request(self, chart, query):
+        """
+        Split a query dict into the request key and render arguments
+        
+        Keys naming a DataFrame column (or an option of a packed multi-select
+        block) are filters (comma-separated values are OR-ed); keys naming a chart
+        parameter override its default; 'format' selects the output format.
+        Anything else is a ValueError.
+        """
+        if chart not in CHART_REGISTRY:
+            raise ValueError(f"unknown chart '{chart}'")
+        import inspect
+        defaults = CHART_REGISTRY[chart]['params']
+        signature = inspect.signature(CHART_REGISTRY[chart]['func']).parameters
+        
+        fmt = query.get('format', 'png').lower()
+        if fmt not in SERVICE_CONTENT_TYPES:
+            raise ValueError(f"unsupported format '{fmt}'")
+        filters, params = {}, {}
+        for key, raw in query.items():
+            if key == 'format':
+                continue
+            if has_option_column(self.df, key):
+                filters[key] = tuple(v.strip() for v in raw.split(','))
+            elif key in signature and key not in ('df', 'save_path', 'save_dir'):
+                default = defaults.get(key, signature[key].default)
+                params[key] = _parse_query_value(raw, default)
+            else:
+                raise ValueError(f"unknown filter or parameter '{key}'")
+        
+        request_key = (chart, fmt, tuple(sorted(filters.items())),
+                       tuple(sorted((k, repr(v)) for k, v in params.items())))
+        return request_key, fmt, filters, {**defaults, **params}
+    
+    def filtered_frame(self, filters):
+        """Rows matching every filter; values are converted to the column dtype"""
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, values in filters.items():
+            if col in self.df.columns:
+                column = self.df[col]
+            else:   # Option of a packed multi-select block
+                column = pd.Series(option_indicators(self.df, [col])[:, 0].astype(np.int8), name=col)
+            if pd.api.types.is_numeric_dtype(column):
+                values = _filter_values(column, values)
+            mask &= column.isin(values).to_numpy()
+        return self.df[mask]
+    
+    def render(self, chart, query=None):
+        """
+        Rendered chart bytes for a request, from cache when possible
+        
+        Returns:
+            (bytes, content type, cache status 'hit' / 'miss' / 'shared')
+        """
+        from concurrent.futures import Future
+        request_key, fmt, filters, params = self.parse_request(chart, query or {})
+        
+        with self._lock:
+            if request_key in self._cache:
+                self._cache.move_to_end(request_key)
+                self.hits += 1
+                return self._cache[request_key], SERVICE_CONTENT_TYPES[fmt], 'hit'
+            future = self._inflight.get(request_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[request_key] = Future()
+                self.misses += 1
+        
+        if not owner:
+            return future.result(), SERVICE_CONTENT_TYPES[fmt], 'shared'
+        
+        try:
+            data = self._render_uncached(chart, fmt, filters, params)
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[request_key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._inflight[request_key]
+            self._cache[request_key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        future.set_result(data)
+        return data, SERVICE_CONTENT_TYPES[fmt], 'miss'
+    
+    def _render_uncached(self, chart, fmt, filters, params):
+        """Render one chart into a scratch directory and return the file bytes"""
+        import os
+        import tempfile
+        
+        df = self.filtered_frame(filters)
+        if df.empty:
+            raise ValueError('no rows match the filters')
+        
+        with self._render_lock, tempfile.TemporaryDirectory(prefix='chart-') as tmp_dir:
+            try:
+                with thread_output(), \
+                        export_settings(EXPORT_FORMATS=[] if fmt == 'png' else [fmt],
+                                        BACKGROUND_ENCODING=False, WEB_EXPORT_DIR=None,
+                                        DATA_BUNDLES=False):
+                    png_path = render_registered_chart(chart, df, tmp_dir, params)
+            finally:
+                plt.close('all')
+            out_path = os.path.splitext(png_path)[0] + f'.{fmt}'
+            if not os.path.exists(out_path):
+                raise ValueError(f"chart '{chart}' could not be drawn for this selection")
+            with open(out_path, 'rb') as fh:
+                return fh.read()
+    
+    def describe(self):
+        """Chart names with their overridable parameters, and cache statistics"""
+        import inspect
+        charts = {}
+        for name, spec in CHART_REGISTRY.items():
+            params = {key: spec['params'].get(key, p.default)
+                      for key, p in inspect.signature(spec['func']).parameters.items()
+                      if key not in ('df', 'save_path', 'save_dir')}
+            charts[name] = {k: (None if v is inspect.Parameter.empty else v) for k, v in params.items()}
+        return {'charts': charts, 'formats': list(SERVICE_CONTENT_TYPES),
+                'cache': {'size': len(self._cache), 'capacity': self.cache_size,
+                          'hits': self.hits, 'misses': self.misses}}
+
+
+def serve_charts(df, host='127.0.0.1', port=8765, cache_size=64):
+    """
+    Serve charts over HTTP until interrupted
     
-    save_fig(fig, os.path.join(save_dir, 'Advanced_Risk_Intention.png'))
+    GET /                      -> JSON list of charts, parameters and cache stats
+    GET /chart/<name>?...      -> rendered chart, e.g.
+        /chart/raincloud?专业_理工类=1
+        /chart/radar_experience?在学类别=3&format=svg
+    """
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qsl, unquote
+    
+    service = ChartService(df, cache_size)
+    
+    class ChartRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type, extra_headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (extra_headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            self._send(status, body, 'application/json; charset=utf-8')
+        
+        def do_GET(self):
+            url = urlsplit(self.path)
+            parts = [unquote(p) for p in url.path.split('/') if p]
+            if not parts:
+                return self._send_json(200, service.describe())
+            if len(parts) != 2 or parts[0] != 'chart' or parts[1] not in CHART_REGISTRY:
+                return self._send_json(404, {'error': f'no route for {url.path}'})
+            try:
+                data, content_type, status = service.render(parts[1], dict(parse_qsl(url.query)))
+            except (ValueError, KeyError) as exc:
+                return self._send_json(400, {'error': f'{type(exc).__name__}: {exc}'})
+            except Exception as exc:
+                return self._send_json(500, {'error': f'{type(exc).__name__}: {exc}'})
+            self._send(200, data, content_type, {'X-Chart-Cache': status})
+    
+    server = ThreadingHTTPServer((host, port), ChartRequestHandler)
+    print(f"Serving {len(CHART_REGISTRY)} charts on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()